@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+
+'''
+Description
+    Benchmark of the -archive output of Par_reconstructPar against the time directories. A decomposed case is reconstructed
+    into ASCII time directories, into an npz archive and, if h5py is installed, into an HDF5 archive. The values of every
+    archive are checked against the time directories, and the size, the writing time and the time to read a field of one
+    time (all of it and a subset of faces) are printed.
+
+    python3 bench_archive.py -path <decomposed case> [-o <output folder>] [-subset <faces>]
+'''
+
+import numpy as np
+import sys
+import os
+import io
+import time as timex
+import argparse
+import contextlib
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import Par_reconstructPar
+
+##########################################  Benchmark  ##############################################################
+
+def folder_size(path):
+    size = 0
+    for root, dirs, files in os.walk(path):
+        for file in files:
+            size += os.path.getsize(os.path.join(root, file))
+    return size
+
+def reconstruct(path, output, archive): #seconds spent writing the time directories (archive = '') or the archive
+    start = timex.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        r = Par_reconstructPar.runCase(path, 'on', 'on', 'on', 'on', 'on', 'on', 'on', 'on', 0, archive = archive)
+        r.write_output(output, 1, -1, True)
+    return [r, timex.perf_counter()-start]
+
+def read_ascii(output, name, time, type):
+    list = []
+    iF = Par_reconstructPar.get_field_input(output+'/'+str(time)+'/'+name, list, type)
+    return np.asarray(iF['field'], dtype=np.float64)
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Size and read time of the archives of Par_reconstructPar against the time directories')
+    parser.add_argument('-path', type=str, help='decomposed case', default='')
+    parser.add_argument('-o', type=str, help='folder of the outputs (a temporary folder by default)', default='')
+    parser.add_argument('-subset', type=int, help='number of faces of the subset read', default=1000)
+    args = parser.parse_args()
+
+    path = args.path
+    if path == '':
+        path = os.getcwd()
+    output = args.o
+    if output == '':
+        output = tempfile.mkdtemp()
+    shutil.rmtree(output+'/ascii', ignore_errors=True)
+    os.makedirs(output+'/ascii')
+
+    [r, t_ascii] = reconstruct(path, output+'/ascii', '')
+    print('Case = '+path+'  times = '+str(len(r.t))+'  faces = '+str(r.nF))
+    print('   ascii  size = '+str(round(folder_size(output+'/ascii')/1e6, 2))+' MB  write = '+str(round(t_ascii, 3))+' s')
+    archives = [output+'/fields.npz']
+    try:
+        import h5py
+        archives.append(output+'/fields.h5')
+    except ImportError:
+        print('   h5py is not installed, the HDF5 archive is not tested')
+
+    names = []
+    for name in ['h', 'Cv', 'deltac0', 'deltah0', 'Us', 'tau', 'pb']:
+        if os.path.exists(output+'/ascii/'+str(r.t[-1])+'/'+name) == True:
+            names.append(name)
+    faces = slice(0, min(args.subset, r.nF))
+    ok = True
+    for archive in archives:
+        [r, t_write] = reconstruct(path, output, archive)
+        for t in r.t:
+            for name in names:
+                if name == 'Us' or name == 'tau':
+                    type = 'vector'
+                else:
+                    type = 'scalar'
+                if os.path.exists(output+'/ascii/'+str(t)+'/'+name) == True:
+                    ok = ok and np.array_equal(read_ascii(output+'/ascii', name, t, type), Par_reconstructPar.read_archive(archive, name, t))
+        time = r.t[-1]
+        start = timex.perf_counter()
+        read_ascii(output+'/ascii', names[0], time, 'scalar')
+        t_ascii_read = timex.perf_counter()-start
+        start = timex.perf_counter()
+        Par_reconstructPar.read_archive(archive, names[0], time)
+        t_read = timex.perf_counter()-start
+        start = timex.perf_counter()
+        Par_reconstructPar.read_archive(archive, names[0], time, faces)
+        t_subset = timex.perf_counter()-start
+        print('   '+Par_reconstructPar.archive_format(archive)+'  size = '+str(round(os.path.getsize(archive)/1e6, 2))+' MB  write = '+str(round(t_write, 3))+' s  identical = '+str(ok))
+        print('      read '+names[0]+' at time '+str(time)+': ascii = '+str(round(t_ascii_read, 4))+' s  archive = '+str(round(t_read, 4))+' s  '+str(faces.stop)+' faces = '+str(round(t_subset, 4))+' s')
+    if ok == False:
+        raise ValueError('the archive differs from the time directories')
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+
+'''
+Description
+    Benchmark of the field reader of read_debris_case. A field of a reconstructed case is read with read_field, which parses the
+    nonuniform internalField in bulk with numpy, and with the token path it replaced (get_input, read_dictionary and the float
+    conversion of internalField.correct_input). Both results must have the same internal values, and the time of both is printed.
+
+    python3 bench_reader.py -path <case> [-time <time>] [-fields h,Us] [-repeat <n>]
+'''
+
+import numpy as np
+import sys
+import os
+import time as timex
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import read_debris_case
+
+##########################################  Benchmark  ##############################################################
+
+def read_tokens(path, file, type, number, faBoundary): #the reader before the bulk parsing of the internalField
+    list = []
+    read_debris_case.get_input(path+'/'+file, list)
+    field = {}
+    read_debris_case.read_dictionary(list, field)
+    dimension = read_debris_case.dimensions(field['dimensions'])
+    boundaryfield = read_debris_case.boundaryField(field['boundaryField'], type, faBoundary)
+    internalfield = read_debris_case.internalField(field, type, number)
+    return read_debris_case.areaField(type, internalfield, boundaryfield, dimension)
+
+def read_bulk(path, file, type, number, faBoundary):
+    return read_debris_case.read_field(path, file, type, number, faBoundary)
+
+def best_time(function, repeat):
+    best = float('inf')
+    for i in range(repeat):
+        start = timex.perf_counter()
+        function()
+        best = min(best, timex.perf_counter()-start)
+    return best
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Bulk numpy reader against the token reader of read_debris_case')
+    parser.add_argument('-path', type=str, help='reconstructed case', default='')
+    parser.add_argument('-time', type=str, help='time of the fields (the last one by default)', default='')
+    parser.add_argument('-fields', type=str, help='fields read, separated by commas', default='h,Us')
+    parser.add_argument('-repeat', type=int, help='repetitions, the best one is reported', default=3)
+    args = parser.parse_args()
+
+    path = args.path
+    if path == '':
+        path = os.getcwd()
+    times = read_debris_case.case_index(path)['times']
+    if args.time == '':
+        time = times[-1]
+    else:
+        time = args.time
+    number = read_debris_case.get_number_faces(path)
+    faBoundary = {}
+    read_debris_case.read_faBoundary(path, faBoundary)
+    print('Case = '+path+'  time = '+time+'  faces = '+str(number))
+
+    ok = True
+    for name in args.fields.split(','):
+        if name == 'Us' or name == 'tau' or name == 'n' or name == 'c':
+            type = 'vector'
+        else:
+            type = 'scalar'
+        file = time+'/'+name
+        old = read_tokens(path, file, type, number, faBoundary)
+        new = read_bulk(path, file, type, number, faBoundary)
+        same = np.array_equal(np.asarray(old.iF.field, dtype=np.float64), np.asarray(new.iF.field, dtype=np.float64))
+        ok = ok and same
+        t_old = best_time(lambda: read_tokens(path, file, type, number, faBoundary), args.repeat)
+        t_new = best_time(lambda: read_bulk(path, file, type, number, faBoundary), args.repeat)
+        print('   '+name+'  identical = '+str(same)+'  tokens = '+str(round(t_old, 4))+' s  bulk = '+str(round(t_new, 4))+' s  speedup = '+str(round(t_old/t_new, 1)))
+    if ok == False:
+        raise ValueError('the bulk reader differs from the token reader')
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+
+'''
+Description
+    Equivalence check and throughput benchmark of the reconstruction of Par_reconstructPar. The area fields (h, Us) and the
+    edge field (Q) of a time of a decomposed case are reconstructed with the index-array scatter of create_areaField and
+    create_edgeField, and with the element by element loops they replaced, which are kept here as reference. The reference
+    does not use the addressing of runCase: it reads faceProcAddressing and edgeProcAddressing again, places the patch edges
+    with the exact edge centres as before the scatter reconstruction, and finds the patch positions with fB.index. Both
+    results must be identical, and the faces (edges) per second of both are printed. Without -path the check runs on the
+    small decomposed case of synthetic_case.py, written in a temporary folder.
+
+    python3 bench_scatter.py [-path <decomposed case>] [-time <time>] [-repeat <n>] [-nx <faces>] [-ny <faces>] [-processors <n>]
+'''
+
+import numpy as np
+import sys
+import os
+import io
+import time as timex
+import argparse
+import contextlib
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import Par_reconstructPar
+import synthetic_case
+
+##########################################  Reference loops  ##########################################################
+
+def reference_addressing(path): #faceProcAddressing and edgeProcAddressing of every processor, with the patch edges placed as before the scatter tables
+    P = Par_reconstructPar
+    a = {}
+    a['np'] = P.number_processors(path)
+    a['fB'] = {}
+    P.read_faBoundary(path, a['fB'])
+    a['nE'] = {'internal': P.get_number_edges(path)}
+    a['nE']['Total'] = a['nE']['internal'] + sum([len(a['fB']['boundaries'][key]) for key in a['fB']['boundaries'].keys()])
+    a['proc_fB'] = {}
+    P.read_proc_faBoundary(path, a['np'], a['proc_fB'])
+    a['proc_nF'] = {}
+    P.read_proc_number_faces(path, a['np'], a['proc_nF'])
+    a['proc_nE'] = {}
+    P.read_proc_number_edges(path, a['np'], a['proc_nE'], a['proc_fB'])
+    a['faceaddr'] = {}
+    P.read_proc_faceaddr(path, a['np'], a['faceaddr'])
+    a['edgeaddr'] = {}
+    P.read_proc_edgeaddr(path, a['np'], a['edgeaddr'])
+    ec = {}
+    P.read_ec(path, ec, a['nE']['internal'], a['fB'])
+    proc_ec = {}
+    P.read_ec_proc(path, proc_ec, a['np'], a['proc_fB'], a['proc_nE'])
+
+    indexes_internal = []
+    for proc_key in a['proc_fB'].keys():
+        for patch_key in a['proc_fB'][proc_key]['boundaries'].keys():
+            for index in a['proc_fB'][proc_key]['boundaries'][patch_key]:
+                if a['edgeaddr'][proc_key][index] < a['nE']['internal'] and not(a['edgeaddr'][proc_key][index] in indexes_internal):
+                    indexes_internal.append(a['edgeaddr'][proc_key][index])
+    indexes_internal.sort()
+    centres = {'internal': [indexes_internal, [tuple(ec['0'].iF.field[i]) for i in indexes_internal]]}
+    for key in ec['0'].bF.d.keys():
+        centres[key] = [a['fB']['boundaries'][key], [tuple(point) for point in ec['0'].bF.d[key]['value']['List']]]
+    for key in centres.keys(): #first edge with every centre, as list.index
+        position = {}
+        for i in range(len(centres[key][1])):
+            position.setdefault(centres[key][1][i], i)
+        centres[key].append(position)
+    for proc_key in proc_ec['0'].keys():
+        for patch_key in proc_ec['0'][proc_key].bF.d.keys():
+            if patch_key in ec['0'].bF.d.keys():
+                [labels, points, position] = centres[patch_key]
+            else:
+                [labels, points, position] = centres['internal']
+            values = proc_ec['0'][proc_key].bF.d[patch_key]['value']['List']
+            for i in range(len(values)):
+                a['edgeaddr'][proc_key][a['proc_fB'][proc_key]['boundaries'][patch_key][i]] = labels[position[tuple(values[i])]]
+    return a
+
+def loop_areaField(a, field_proc, time, type): #internal field and patch values as the loops before the scatter reconstruction
+    list = [-9999]*sum([a['proc_nF'][key] for key in a['proc_nF'].keys()])
+    for p in range(a['np']):
+        proc_field = field_proc[str(time)]['processor'+str(p)]
+        for i in range(a['proc_nF']['processor'+str(p)]):
+            if proc_field.iF.u == 'uniform':
+                list[a['faceaddr']['processor'+str(p)][i]] = proc_field.iF.field[0]
+            else:
+                list[a['faceaddr']['processor'+str(p)][i]] = proc_field.iF.field[i]
+    patches = {}
+    for proc_key in field_proc[str(time)].keys():
+        for patch_key in field_proc[str(time)][proc_key].bF.d.keys():
+            d = field_proc[str(time)][proc_key].bF.d[patch_key]
+            if d['type'] == 'fixedValue' or d['type'] == 'calculated':
+                fB = a['fB']['boundaries'][patch_key]
+                proc_fB = a['proc_fB'][proc_key]['boundaries'][patch_key]
+                if (patch_key in patches) == False:
+                    patches[patch_key] = [-9999]*len(fB)
+                for i in range(len(proc_fB)):
+                    index = fB.index(a['edgeaddr'][proc_key][proc_fB[i]])
+                    if d['value']['uniform'] == 'yes':
+                        patches[patch_key][index] = d['value']['List'][0]
+                    else:
+                        patches[patch_key][index] = d['value']['List'][i]
+    return [list, patches]
+
+def loop_edgeField(a, field_proc, time, type):
+    list = [-9999]*a['nE']['Total']
+    for p in range(a['np']):
+        proc_key = 'processor'+str(p)
+        proc_field = field_proc[str(time)][proc_key]
+        for i in range(a['proc_nE'][proc_key]['internal']):
+            if proc_field.iF.u == 'uniform':
+                list[a['edgeaddr'][proc_key][i]] = proc_field.iF.field[0]
+            else:
+                list[a['edgeaddr'][proc_key][i]] = proc_field.iF.field[i]
+        for key in a['proc_fB'][proc_key]['boundaries'].keys():
+            for i in range(len(a['proc_fB'][proc_key]['boundaries'][key])):
+                index = a['proc_fB'][proc_key]['boundaries'][key][i]
+                if proc_field.bF.d[key]['value']['uniform'] == 'yes':
+                    list[a['edgeaddr'][proc_key][index]] = proc_field.bF.d[key]['value']['List'][0]
+                else:
+                    list[a['edgeaddr'][proc_key][index]] = proc_field.bF.d[key]['value']['List'][i]
+    patches = {}
+    for key in a['fB']['boundaries'].keys():
+        patches[key] = [list[edge] for edge in a['fB']['boundaries'][key]]
+    return [list[:a['nE']['internal']], patches]
+
+##########################################  Benchmark  ##############################################################
+
+def same(a, b):
+    return np.array_equal(np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64))
+
+def check(name, reference, field):
+    [list, patches] = reference
+    ok = same(list, field.iF.field)
+    for key in patches.keys():
+        ok = ok and same(patches[key], field.bF.d[key]['value']['List'])
+    print('   '+name+' identical = '+str(ok))
+    return ok
+
+def best_time(function, repeat):
+    best = float('inf')
+    for i in range(repeat):
+        start = timex.perf_counter()
+        function()
+        best = min(best, timex.perf_counter()-start)
+    return best
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Equivalence and throughput of the scatter reconstruction of Par_reconstructPar')
+    parser.add_argument('-path', type=str, help='decomposed case (the case of synthetic_case.py in a temporary folder by default)', default='')
+    parser.add_argument('-time', type=str, help='time reconstructed (the last one by default)', default='')
+    parser.add_argument('-repeat', type=int, help='repetitions, the best one is reported', default=3)
+    parser.add_argument('-nx', type=int, help='faces along x of the synthetic case', default=40)
+    parser.add_argument('-ny', type=int, help='faces along y of the synthetic case', default=60)
+    parser.add_argument('-processors', type=int, help='processors of the synthetic case', default=4)
+    args = parser.parse_args()
+
+    path = args.path
+    if path == '':
+        path = synthetic_case.make_case(tempfile.mkdtemp()+'/case', args.nx, args.ny, args.processors)
+    with contextlib.redirect_stdout(io.StringIO()):
+        r = Par_reconstructPar.runCase(path, 'on', 'off', 'off', 'on', 'on', 'off', 'off', 'off', 0)
+    a = reference_addressing(path)
+    if args.time == '':
+        time = r.t[-1]
+    else:
+        time = r.t[[str(t) for t in r.t].index(args.time)]
+    print('Case = '+path+'  time = '+str(time)+'  faces = '+str(r.nF)+'  edges = '+str(r.nE['Total'])+'  processors = '+str(r.np))
+
+    ok = True
+    fields = [['h', r.h_proc, r.get_h, r.h, 'scalar', r.create_areaField, loop_areaField, r.nF],
+              ['Us', r.Us_proc, r.get_Us, r.Us, 'vector', r.create_areaField, loop_areaField, r.nF],
+              ['Q', r.Q_proc, r.get_Q, r.Q, 'scalar', r.create_edgeField, loop_edgeField, r.nE['Total']]]
+    for [name, field_proc, field_func, field, type, create, loop, number] in fields:
+        if (name in Par_reconstructPar.create_files_list(path+'/processor0', time)) == False:
+            print('   '+name+' not found, skipped')
+            continue
+        field_func(False, time)
+        create(time, field_proc, field_func, field, type)
+        ok = check(name, loop(a, field_proc, time, type), field[str(time)]) and ok
+        old = best_time(lambda: loop(a, field_proc, time, type), args.repeat)
+        new = best_time(lambda: create(time, field_proc, field_func, field, type), args.repeat)
+        print('   '+name+'  loops = '+str(round(number/old/1e6, 2))+'M/s  scatter = '+str(round(number/new/1e6, 2))+'M/s  speedup = '+str(round(old/new, 1)))
+    if ok == False:
+        raise ValueError('the scatter reconstruction differs from the reference loops')
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+
+'''
+Description
+    Small decomposed finite-area case written in code, so the benchmarks can be run without the outputs of a simulation. The mesh is a
+    grid of nx x ny square faces on an inclined plane with the patches minX, maxX, minY and maxY, decomposed in strips of faces along x.
+    Every processor has the constant/faMesh files, the 0/ec edge centres and the h, Us and Q fields of the times. h has a uniform fixedValue
+    patch and Us a nonuniform one, and the blocks of the patches in edgeProcAddressing are reversed, so the reconstruction has to place the
+    boundary edges with the edge centres as in the outputs of decomposePar.
+
+    python3 synthetic_case.py -path <case> [-nx <faces>] [-ny <faces>] [-processors <n>]
+'''
+
+import numpy as np
+import sys
+import os
+import shutil
+import argparse
+
+##########################################  Files  ##################################################################
+
+HEADER = '''/*--------------------------------*- C++ -*----------------------------------*\\
+  =========                 |
+  \\\\      /  F ield         | OpenFOAM: The Open Source CFD Toolbox
+   \\\\    /   O peration     | Website:  https://openfoam.org
+    \\\\  /    A nd           | Version:  8
+     \\\\/     M anipulation  |
+\\*---------------------------------------------------------------------------*/
+FoamFile
+{
+    version     2.0;
+    format      ascii;
+    class       %s;
+    location    "%s";
+    object      %s;
+}
+// * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * //
+
+'''
+FOOTER = '\n\n// ************************************************************************* //\n'
+
+def value(v):
+    if isinstance(v, tuple) == True:
+        return '('+' '.join(value(x) for x in v)+')'
+    return repr(v)
+
+def List(values):
+    return str(len(values))+'\n(\n'+''.join(value(v)+'\n' for v in values)+')\n'
+
+def write(path, type, location, name, body):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(HEADER % (type, location, name))
+        f.write(body)
+        f.write(FOOTER)
+
+def write_faBoundary(path, patches): #patches = [[name, type, edge labels, [[keyword, value], ...]], ...]
+    body = str(len(patches))+'\n(\n'
+    for [name, type, labels, entries] in patches:
+        body += '    '+name+'\n    {\n        type            '+type+';\n'
+        body += '        edgeLabels      List<label> \n'+List(labels)+';\n'
+        body += '        ngbPolyPatchIndex -1;\n'
+        for [keyword, v] in entries:
+            body += '        '+keyword+' '+str(v)+';\n'
+        body += '    }\n'
+    write(path+'/constant/faMesh/faBoundary', 'faBoundaryMesh', 'constant/faMesh', 'faBoundary', body+')\n')
+
+def write_field(path, time, name, type, dimensions, internal, patches): #patches = [[name, type, None, a uniform value or a list], ...]
+    kind = type[4:-5].lower()  #scalar or vector of areaScalarField, edgeVectorField ...
+    body = 'dimensions      ['+dimensions+'];\n\n'
+    body += 'internalField   nonuniform List<'+kind+'> \n'+List(internal)+';\n\n'
+    body += 'boundaryField\n{\n'
+    for [patch, patch_type, uniform, values] in patches:
+        body += '    '+patch+'\n    {\n        type            '+patch_type+';\n'
+        if uniform != None:
+            body += '        value           uniform '+value(uniform)+';\n'
+        elif values != None:
+            body += '        value           nonuniform List<'+kind+'> \n'+List(values)+';\n'
+        body += '    }\n'
+    write(path+'/'+str(time)+'/'+name, type, str(time), name, body+'}\n')
+
+##########################################  Case  ###################################################################
+
+def make_case(path, nx = 40, ny = 60, processors = 4, times = [0, 0.5, 1]):
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+    point = lambda i, j: j*(nx+1)+i
+    face = lambda i, j: j*nx+i
+    centre = lambda x, y: (float(x), float(y), 0.25*y)
+
+    #edges of the global mesh: the internal ones ordered by owner and neighbour and then the patches //AG
+    internal = []
+    for j in range(ny):
+        for i in range(nx):
+            if i < nx-1:
+                internal.append([face(i, j), face(i+1, j), centre(i+1, j+0.5)])
+            if j < ny-1:
+                internal.append([face(i, j), face(i, j+1), centre(i+0.5, j+1)])
+    internal.sort(key=lambda e: (e[0], e[1]))
+    boundaries = {'minX': [[face(0, j), -1, centre(0, j+0.5)] for j in range(ny)],
+                  'maxX': [[face(nx-1, j), -1, centre(nx, j+0.5)] for j in range(ny)],
+                  'minY': [[face(i, 0), -1, centre(i+0.5, 0)] for i in range(nx)],
+                  'maxY': [[face(i, ny-1), -1, centre(i+0.5, ny)] for i in range(nx)]}
+    edges = list(internal)
+    labels = {}
+    for key in boundaries.keys():
+        labels[key] = list(range(len(edges), len(edges)+len(boundaries[key])))
+        edges += boundaries[key]
+    faces = [[point(i, j), point(i+1, j), point(i+1, j+1), point(i, j+1)] for j in range(ny) for i in range(nx)]
+    nF = len(faces)
+
+    def h(f, t): #fields of the faces and edges, with values that differ in every face and edge
+        return round(1+float(np.sin(0.37*f+t)), 6)
+    def Us(f, t):
+        return (round(float(np.cos(0.11*f+t)), 6), round(-2*h(f, t), 6), round(0.01*f, 6))
+    def Q(e, t):
+        return round(float(np.sin(0.23*e-t))*3, 6)
+
+    write(path+'/0/faFaces', 'faceList', '0', 'faFaces', str(nF)+'\n(\n'+''.join('4'+value(tuple(f))+'\n' for f in faces)+')\n')
+    write(path+'/0/edgeNeighbour', 'labelList', '0', 'edgeNeighbour', List([e[1] for e in internal]))
+    write_faBoundary(path, [[key, 'patch', labels[key], []] for key in labels.keys()])
+    write_field(path, 0, 'ec', 'edgeVectorField', '0 1 0 0 0 0 0', [e[2] for e in internal], [[key, 'calculated', None, [e[2] for e in boundaries[key]]] for key in labels.keys()])
+
+    #the faces are decomposed in strips along x, so every processor has the patches minY and maxY //AG
+    owner = [min(i*processors//nx, processors-1) for j in range(ny) for i in range(nx)]
+    for p in range(processors):
+        proc_path = path+'/processor'+str(p)
+        proc_faces = [f for f in range(nF) if owner[f] == p]
+        local = {f: i for i, f in enumerate(proc_faces)}
+        proc_internal = [e for e in range(len(internal)) if owner[internal[e][0]] == p and owner[internal[e][1]] == p]
+        proc_internal.sort(key=lambda e: (local[internal[e][0]], local[internal[e][1]]))
+        patches = []
+        for key in labels.keys():
+            patch = [e for e in labels[key] if owner[edges[e][0]] == p]
+            if len(patch) > 0:
+                patches.append([key, 'patch', patch, []])
+        for q in [p-1, p+1]:
+            if q >= 0 and q < processors:
+                patch = [e for e in range(len(internal)) if sorted([owner[internal[e][0]], owner[internal[e][1]]]) == sorted([p, q])]
+                patches.append(['procBoundary'+str(p)+'to'+str(q), 'processor', patch, [['myProcNo', p], ['neighbProcNo', q]]])
+        proc_edges = list(proc_internal)
+        proc_labels = []
+        addressing = list(proc_internal)
+        for patch in patches:
+            proc_labels.append(list(range(len(proc_edges), len(proc_edges)+len(patch[2]))))
+            proc_edges += patch[2]
+            addressing += patch[2][::-1]  #reversed, the patch edges are placed with the edge centres
+        write_faBoundary(proc_path, [[patch[0], patch[1], proc_labels[i], patch[3]] for i, patch in enumerate(patches)])
+        write(proc_path+'/constant/faMesh/faceLabels', 'labelList', 'constant/faMesh', 'faceLabels', List(list(range(len(proc_faces)))))
+        write(proc_path+'/constant/faMesh/faceProcAddressing', 'labelList', 'constant/faMesh', 'faceProcAddressing', List(proc_faces))
+        write(proc_path+'/constant/faMesh/edgeProcAddressing', 'labelList', 'constant/faMesh', 'edgeProcAddressing', List(addressing))
+
+        for t in times:
+            edge_patches = []
+            for patch in patches:
+                if patch[1] == 'processor':
+                    edge_patches.append([patch[0], 'processor', None, [Q(e, t) for e in patch[2]]])
+                else:
+                    edge_patches.append([patch[0], 'calculated', None, [Q(e, t) for e in patch[2]]])
+            write_field(proc_path, t, 'Q', 'edgeScalarField', '0 3 -1 0 0 0 0', [Q(e, t) for e in proc_internal], edge_patches)
+            h_patches = []
+            Us_patches = []
+            for patch in patches:
+                near = [edges[e][0] if owner[edges[e][0]] == p else edges[e][1] for e in patch[2]]
+                if patch[1] == 'processor':
+                    h_patches.append([patch[0], 'processor', None, [h(f, t) for f in near]])
+                    Us_patches.append([patch[0], 'processor', None, [Us(f, t) for f in near]])
+                elif patch[0] == 'maxY':
+                    h_patches.append([patch[0], 'fixedValue', 0.0, None])
+                    Us_patches.append([patch[0], 'zeroGradient', None, None])
+                elif patch[0] == 'minY':
+                    h_patches.append([patch[0], 'zeroGradient', None, None])
+                    Us_patches.append([patch[0], 'fixedValue', None, [Us(f, t) for f in near]])
+                else:
+                    h_patches.append([patch[0], 'zeroGradient', None, None])
+                    Us_patches.append([patch[0], 'zeroGradient', None, None])
+            write_field(proc_path, t, 'h', 'areaScalarField', '0 1 0 0 0 0 0', [h(f, t) for f in proc_faces], h_patches)
+            write_field(proc_path, t, 'Us', 'areaVectorField', '0 1 -1 0 0 0 0', [Us(f, t) for f in proc_faces], Us_patches)
+        write_field(proc_path, 0, 'ec', 'edgeVectorField', '0 1 0 0 0 0 0', [internal[e][2] for e in proc_internal], [[patch[0], patch[1] if patch[1] == 'processor' else 'calculated', None, [edges[e][2] for e in patch[2]]] for patch in patches])
+    return path
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Small decomposed finite-area case for the benchmarks')
+    parser.add_argument('-path', type=str, help='folder of the case (removed if it exists)', default='')
+    parser.add_argument('-nx', type=int, help='faces along x', default=40)
+    parser.add_argument('-ny', type=int, help='faces along y', default=60)
+    parser.add_argument('-processors', type=int, help='processors (strips of faces along x)', default=4)
+    args = parser.parse_args()
+
+    if args.path == '':
+        raise ValueError('the folder of the case is needed (-path)')
+    make_case(args.path, args.nx, args.ny, args.processors)
+    print('Case = '+args.path+'  faces = '+str(args.nx*args.ny)+'  processors = '+str(args.processors))
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
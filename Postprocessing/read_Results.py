@@ -15,6 +15,7 @@ import matplotlib.colors as mcolors
 from matplotlib.pyplot import text
 from matplotlib.ticker import (AutoMinorLocator, MultipleLocator)
 import os
+import gzip
 import shutil
 import math
 
@@ -68,27 +69,23 @@ def clean_dots(list):
         if k == len(list):
             break
 
-def clean_spaces_string(list):
-    k = 0
-    while True:
-        if list[k] == '\n':
-            list.remove('\n')
-        elif list[k].split()[0] == '//':
-            list.remove(list[k])
-        else: 
-            k += 1
-        if k == len(list):
-            break
-
-def clean_spaces_list(list):
-    k = 0
-    while True:
-        if len(list[k]) == 0:
-            list.remove([])
-        else: 
-            k += 1
-        if k == len(list):
-            break
+#The files are tokenized line by line: every line that is not empty or a comment gives the list of its words, without the ';'.
+#tokenize is a generator, so the lines are read from the file as the tokens are used and the file is never held in memory as a list of lines
+def read_lines(path): #the lines of a file, read one by one from a buffered binary handle
+    with open_file(path, 'rb') as f:
+        for line in f:
+            yield line.decode()
+
+def tokenize(lines, OF_header = True):
+    for i, line in enumerate(lines):
+        if OF_header == True and i < 16:
+            continue
+        tokens = line.split()
+        if len(tokens) == 0 or tokens[0] == '//':
+            continue
+        clean_dots(tokens)
+        if len(tokens) > 0:
+            yield tokens
 
 def read_entry(list,dict):
     dict[list[0]] = list[1]
@@ -182,18 +179,58 @@ def read_dictionary(list,dict):
         if len(list) == 0:
             break
 
+#Results written by read_debris_case.py can be compressed afterwards (gzip -r Results). Every file is opened through open_file,
+#which falls back to the compressed file when the plain one does not exist, and create_files_list lists both as the plain name.
+def open_file(path, mode = 'r'):
+    if os.path.exists(path) == False and os.path.exists(path+'.gz') == True:
+        if mode == 'r':
+            mode = 'rt'
+        return gzip.open(path+'.gz', mode)
+    return open(path, mode)
+
+files_lists = {}  #mtime and list of every Results directory listed with os.scandir, every reader looks up the same list while the mtime does not change
+
+def create_files_list(path):
+    mtime = os.stat(path).st_mtime_ns
+    if (path in files_lists) == False or files_lists[path][0] != mtime:
+        listdir = []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                name = entry.name
+                if name[-3:] == '.gz':
+                    name = name[:-3]
+                listdir.append(name)
+        files_lists[path] = [mtime, listdir]
+    return files_lists[path][1]
+
+#Indices of the times chosen with the -time, -latestTime and -stride options. time is a list of values and ranges separated by commas, like '0.5,10:20' or ':5',
+#stride keeps one of every stride of those times and latestTime adds the last time (only the last time if neither time nor stride are given)
+def select_time(times, time = '', latestTime = False, stride = 1):
+    index = []
+    for i in range(len(times)):
+        if time == '':
+            index.append(i)
+        for entry in time.split(','):
+            if entry == '':
+                continue
+            if ':' in entry:
+                [start, end] = entry.split(':')
+                if (start == '' or float(times[i]) >= float(start)) and (end == '' or float(times[i]) <= float(end)):
+                    index.append(i)
+                    break
+            elif float(times[i]) == float(entry):
+                index.append(i)
+                break
+    index = index[::max(int(stride), 1)]
+    if latestTime == True and len(times) > 0:
+        if time == '' and stride == 1:
+            index = []
+        if ((len(times)-1) in index) == False:
+            index.append(len(times)-1)
+    return index
+
 def get_input(path,list, OF_header = True):
-    input = []
-    with open(path) as f:
-        for line in f:
-            input.append(line)
-    if OF_header == True:
-        input= input[16:(len(input))]
-    clean_spaces_string(input)
-    for i in range(len(input)):
-        list.append(input[i].split())
-        clean_dots(list[i])
-    clean_spaces_list(list)
+    list.extend(tokenize(read_lines(path), OF_header))
 
 def read_dict(path, name, output):
     list = []
@@ -301,12 +338,14 @@ def dist(v1,v2):
 
 #This class is used to read the results written by the output class //AG
 class Results:
-        def __init__(self, path, name = 'Results', basic = 'on', h='off',pb='off',Cv='off',deltaz0='off',Us='off',tau='off',phi2s='off',Q='off',Sm='off',rho='off',V='off',M='off',Vsed='off',rcg='off'):
+        def __init__(self, path, name = 'Results', basic = 'on', h='off',pb='off',Cv='off',deltaz0='off',Us='off',tau='off',phi2s='off',Q='off',Sm='off',rho='off',V='off',M='off',Vsed='off',rcg='off', time='', latestTime=False, stride=1):
                 self.x  = []
                 self.y  = []
                 self.z  = []
                 self.he = []
                 self.t  = []
+                self.t_index = []  #position of every selected time in the t file
+                self.time_selection = [time, latestTime, stride]
                 self.p  = path+'/'+name
                 self.tps = {}
                                 
@@ -457,7 +496,7 @@ class Results:
                     self.read_scalartimefield('rcg_z', self.rcg, 2)
 
         def read_scalartimefield(self, name, output, index):
-                listdir = os.listdir(self.p+'/'+ str(self.t[0]))
+                listdir = create_files_list(self.p+'/'+ str(self.t[0]))
                 if name in listdir:               
                     for t in range(len(self.t)):
                         read_value(self.p+'/'+str(self.t[t]), name, output, t, index)
@@ -473,6 +512,9 @@ class Results:
         def get_rF_VyM(self):
                 read_list(self.p, 'rF_V', self.rF_V)
                 read_list(self.p, 'rF_M', self.rF_M)
+                if len(self.t_index) == len(self.t):
+                    self.rF_V[:] = [self.rF_V[i] for i in self.t_index]
+                    self.rF_M[:] = [self.rF_M[i] for i in self.t_index]
 
         def get_z(self):
                 if self.basic_flag == 'on' or self.basic_flag == 'yes' or self.basic_flag == True:
@@ -489,6 +531,8 @@ class Results:
                     for i in range(len(self.t)):
                         if float(self.t[i]) == int(self.t[i]):
                             self.t[i] = int(self.t[i])                  
+                    self.t_index = select_time(self.t, self.time_selection[0], self.time_selection[1], self.time_selection[2])
+                    self.t[:] = [self.t[i] for i in self.t_index]
 
         def get_h(self):
                 if self.h_flag == 'on' or self.h_flag == 'yes' or self.h_flag == True:
@@ -544,14 +588,14 @@ class Results:
                     self.read_scalarfield('tau_m', self.tau_m)
 
         def read_scalarfield(self, name, output):
-                listdir = os.listdir(self.p+'/'+ str(self.t[0]))
+                listdir = create_files_list(self.p+'/'+ str(self.t[0]))
                 if name in listdir:               
                     for t in range(len(self.t)):
                         read_matrix(self.p+'/'+str(self.t[t]), name, output[t,:,:])
 
         def get_lp(self):
                 if self.basic_flag == 'on' or self.basic_flag == 'yes' or self.basic_flag == True:
-                    listdir = os.listdir(self.p)
+                    listdir = create_files_list(self.p)
                     if 'lp' in listdir:            
                         read_dict(self.p, 'lp', self.lp)
                         lp_cx = {}
@@ -568,7 +612,7 @@ class Results:
                     
         def get_tp(self):
                 if self.basic_flag == 'on' or self.basic_flag == 'yes' or self.basic_flag == True:
-                    listdir = os.listdir(self.p)
+                    listdir = create_files_list(self.p)
                     if ('tp_x' in listdir and 'tp_x' in listdir):
                         tp_x = {}
                         tp_y = {}
@@ -593,7 +637,7 @@ class Results:
                     self.read_scalarlpfield('phi2s', self.phi2s)
 
         def read_scalarlpfield(self, name, output):
-                listdir = os.listdir(self.p+'/'+ str(self.t[0]))
+                listdir = create_files_list(self.p+'/'+ str(self.t[0]))
                 if name in listdir:            
                     for key in self.lp.keys():
                         output[key] = np.zeros((len(self.t), len(self.lp[key])))
@@ -663,7 +707,7 @@ class Results:
 
         def read_scalartpfield(self, name, output, Max = False,  button = False):
                 if button == False:
-                    listdir = os.listdir(self.p+'/'+ str(self.t[0]))
+                    listdir = create_files_list(self.p+'/'+ str(self.t[0]))
                     if name in listdir:            
                         for key in self.lp.keys():
                             output[key] = []                               
@@ -678,7 +722,7 @@ class Results:
                                         list[i] = max(list[i])
                                 output[key].append(list)
                 else:
-                    listdir = os.listdir(self.p)
+                    listdir = create_files_list(self.p)
                     if name in listdir:            
                         for key in self.lp.keys():
                             output[key] = []                               
@@ -1992,8 +2036,9 @@ class Results:
 ##########################################  Comparison class  ##############################################################
 
 class Comparison:
-        def __init__(self, path = '', list_names = []):
+        def __init__(self, path = '', list_names = [], time = '', latestTime = False, stride = 1):
                 self.p = path
+                self.time_selection = [time, latestTime, stride]  #times loaded by every Results
                 
                 self.list_names = list_names
                 self.list_Results = []
@@ -2048,13 +2093,13 @@ class Comparison:
                         if 'Results' in sub_listdir:
                             self.list_paths.append(self.p+'/'+dir)
                             self.list_names.append(dir)
-                            self.list_Results.append(Results(self.p+'/'+dir))
+                            self.list_Results.append(Results(self.p+'/'+dir, time = self.time_selection[0], latestTime = self.time_selection[1], stride = self.time_selection[2]))
                 else:
                     for i in range(len(self.list_names)):
                         sub_listdir = os.listdir(self.p+'/'+self.list_names[i])
                         if 'Results' in sub_listdir:
                             self.list_paths.append(self.p+'/'+self.list_names[i])
-                            self.list_Results.append(Results(self.p+'/'+self.list_names[i]))
+                            self.list_Results.append(Results(self.p+'/'+self.list_names[i], time = self.time_selection[0], latestTime = self.time_selection[1], stride = self.time_selection[2]))
 
         def get_basic_data(self):
                 self.x  = self.list_Results[0].x
@@ -2468,8 +2513,9 @@ class Comparison:
 ##########################################  Comparison2 class  ##############################################################
                 
 class Comparison2:
-        def __init__(self, path = '', list_list_names = []):
+        def __init__(self, path = '', list_list_names = [], time = '', latestTime = False, stride = 1):
                 self.p = path
+                self.time_selection = [time, latestTime, stride]  #times loaded by every Results
                 
                 self.list_list_names = list_list_names
                 self.list_list_Results = []
@@ -2515,7 +2561,7 @@ class Comparison2:
                         sub_listdir = os.listdir(self.p+'/'+self.list_list_names[i][j])
                         if 'Results' in sub_listdir:
                             list_paths.append(self.p+'/'+self.list_list_names[i][j])
-                            list_Results.append(Results(self.p+'/'+self.list_list_names[i][j]))
+                            list_Results.append(Results(self.p+'/'+self.list_list_names[i][j], time = self.time_selection[0], latestTime = self.time_selection[1], stride = self.time_selection[2]))
                         
                     self.list_list_Results.append(list_Results)
                     self.list_list_paths.append(list_paths) 
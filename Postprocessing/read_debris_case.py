@@ -16,10 +16,17 @@ import matplotlib.pyplot as plt
 from matplotlib.ticker import (AutoMinorLocator, MultipleLocator)
 import matplotlib.colors as mcolors
 import os
+import re
+import gzip
+import collections
+import concurrent.futures
+import multiprocessing
+import json
 import math
 from operator import itemgetter
 import argparse
 import shutil
+import copy
 
 ##########################################  Definitions  ##############################################################
 
@@ -71,27 +78,23 @@ def clean_dots(list):
         if k == len(list):
             break
 
-def clean_spaces_string(list):
-    k = 0
-    while True:
-        if list[k] == '\n':
-            list.remove('\n')
-        elif list[k].split()[0] == '//':
-            list.remove(list[k])
-        else: 
-            k += 1
-        if k == len(list):
-            break
-
-def clean_spaces_list(list):
-    k = 0
-    while True:
-        if len(list[k]) == 0:
-            list.remove([])
-        else: 
-            k += 1
-        if k == len(list):
-            break
+#The files are tokenized line by line: every line that is not empty or a comment gives the list of its words, without the ';'.
+#tokenize is a generator, so the lines are read from the file as the tokens are used and the file is never held in memory as a list of lines
+def read_lines(path): #the lines of a file, read one by one from a buffered binary handle
+    with open_file(path, 'rb') as f:
+        for line in f:
+            yield line.decode()
+
+def tokenize(lines, OF_header = True):
+    for i, line in enumerate(lines):
+        if OF_header == True and i < 16:
+            continue
+        tokens = line.split()
+        if len(tokens) == 0 or tokens[0] == '//':
+            continue
+        clean_dots(tokens)
+        if len(tokens) > 0:
+            yield tokens
 
 def read_entry(list,dict):
     dict[list[0]] = list[1]
@@ -126,7 +129,7 @@ def read_constant(list, dict):
 def read_subdictionary(list,output,name,type):
     subdict = {}
     while True:
-        pop = list.pop(0)
+        pop = list.popleft()
         if pop[0] == '}':
             break
         clean_brackets(pop)
@@ -136,10 +139,10 @@ def read_subdictionary(list,output,name,type):
             read_constant(pop,subdict)
         else:
             if list[0][0]=='{':
-                list.remove(list[0])
+                list.popleft()
                 read_subdictionary(list,subdict,pop[0],'dict')
             elif list[0][0]=='(':
-                list.remove(list[0])
+                list.popleft()
                 read_sublist(list,subdict,pop[0],'dict')
     if type == 'dict':
         output[name] = subdict
@@ -150,13 +153,13 @@ def read_subdictionary(list,output,name,type):
 def read_sublist(list,output,name,type):
     sublist = []
     while True:
-        pop = list.pop(0)
+        pop = list.popleft()
         if pop[0] == ')':
             break
         clean_brackets(pop)
         if len(pop)==1:
             if list[0][0]=='{':
-                list.remove(list[0])
+                list.popleft()
                 read_subdictionary(list,sublist,pop[0],'list')
             else:
                 sublist.append(pop[0])
@@ -168,62 +171,310 @@ def read_sublist(list,output,name,type):
         output.append(name)
         output.append(sublist)
 
-def read_dictionary(list,dict):
+def read_dictionary(list,dict): #the tokens are taken from a deque, so every line is removed in constant time
+    list = collections.deque(list)
     while True:
-        pop = list.pop(0)
+        pop = list.popleft()
         if len(pop)==2:
             read_entry(pop,dict)
         elif len(pop)==1:
             if list[0][0]=='{':
-                list.remove(list[0])
+                list.popleft()
                 read_subdictionary(list,dict,pop[0],'dict')
             elif list[0][0]=='(':
-                list.remove(list[0])
+                list.popleft()
                 read_sublist(list,dict,pop[0],'dict')
         elif len(pop)>2:
             read_constant(pop,dict)          
         if len(list) == 0:
             break
         
-def read_face(List):
-    subList = []
-    if len(List) < 10:
-        subList.append(int(List[0][2:]))
-    else:
-        subList.append(int(List[0][3:]))
-    for i in range(len(List)-2):
-        subList.append(int(List[i+1]))
-    subList.append(int(List[-1][:-1]))
-    return subList
-       
 def get_input(path,list, OF_header = True):
-    input = []
-    with open(path) as f:
-        for line in f:
-            input.append(line)
-    if OF_header == True:
-        input= input[16:(len(input))]
-    clean_spaces_string(input)
-    for i in range(len(input)):
-        list.append(input[i].split())
-        clean_dots(list[i])
-    clean_spaces_list(list)
+    if is_binary(path) == True:
+        data = read_file(path)
+        [text, iF] = binary_to_text(data, get_format(data), '')
+        split_input(text.splitlines(True), list, OF_header)
+    else:
+        list.extend(tokenize(read_lines(path), OF_header))
+
+def split_input(input, list, OF_header = True):
+    list.extend(tokenize(input, OF_header))
+
+#The nonuniform internalField is the biggest block in every field file, so it is parsed with numpy in blocks of 4 MB as it is read
+#and given to the tokenizer as 'internalField nonuniform;'. The rest of the file (dimensions and boundaryField) is tokenized line by line.
+#If the block cannot be parsed the whole file is tokenized as before.
+#With boundary = False the file is cut at the boundaryField keyword and an empty boundaryField is returned, for the readers that only use the internal values.
+def get_field_input(path, list, type, OF_header = True, boundary = True):
+    if is_binary(path) == True:
+        data = read_file(path)
+        [text, iF] = binary_to_text(data, get_format(data), type, boundary)
+        split_input(text.splitlines(True), list, OF_header)
+        return iF
+    iF = {}
+    with open_file(path, 'rb') as f:
+        try:
+            list.extend(tokenize(field_lines(f, type, iF, boundary), OF_header))
+        except ValueError:
+            iF.clear()
+            list.clear()
+            f.seek(0)
+            list.extend(tokenize(field_lines(f, '', iF, boundary), OF_header))
+    return iF
+
+def field_lines(f, type, iF, boundary = True): #the lines of a field file, with the nonuniform internalField of the given type read into iF
+    header = re.compile(r'^\s*internalField\s+nonuniform\s+List<'+type+r'>')
+    start = re.compile(r'List<'+type+r'>\s*([0-9]+)\s*\(')
+    stop = re.compile(r'^\s*boundaryField\b')
+    pending = collections.deque() #lines already read from f after the internalField
+    while True:
+        if len(pending) > 0:
+            line = pending.popleft()
+        else:
+            line = f.readline().decode()
+            if line == '':
+                return
+        if type != '' and iF == {} and header.match(line) != None:
+            text = line
+            match = start.search(text)
+            while match == None and len(text) < 4096: #the size and the '(' can be in the next lines
+                text += f.readline().decode()
+                match = start.search(text)
+            if match == None:
+                raise ValueError('internalField of '+type+' without size')
+            n = int(match.group(1))
+            rest = text[match.end():]
+            if rest.rstrip().endswith(';'): #the whole list in one line
+                values = read_List_values(rest[:rest.rindex(')')], type)
+                rest = ''
+            else:
+                [values, rest] = read_List_block(f, rest.encode(), type, n)
+            if type == 'vector' and len(values) == 3*n:
+                iF['field'] = values.reshape(n,3)
+            elif type == 'scalar' and len(values) == n:
+                iF['field'] = values
+            else:
+                raise ValueError('internalField with '+str(len(values))+' values instead of '+str(n))
+            iF['u'] = 'nonuniform'
+            pending.extend(rest.splitlines(True))
+            yield 'internalField   nonuniform;\n'
+        elif boundary == False and stop.match(line) != None:
+            yield 'boundaryField\n'
+            yield '{\n'
+            yield '}\n'
+            return
+        else:
+            yield line
+
+def read_List_block(f, data, type, n): #values of a list of size n whose data starts with data and goes on in f, and the text read after its ')'
+    closing = re.compile(rb'\n\s*\)') #the ')' that closes the list is the first one at the beginning of a line
+    if type == 'vector':
+        n = 3*n
+    values = np.empty(n)
+    i = 0
+    while True:
+        match = closing.search(data)
+        if match != None:
+            block = read_List_values(data[:match.start()].decode(), type)
+        else:
+            chunk = f.read(1 << 22)
+            if len(chunk) == 0:
+                raise ValueError('List without end')
+            k = max(data.rfind(b'\n'), 0)
+            block = read_List_values(data[:k].decode(), type)
+            data = data[k:]+chunk
+        if i+len(block) > n:
+            raise ValueError('List with more than '+str(n)+' values')
+        values[i:i+len(block)] = block
+        i += len(block)
+        if match != None:
+            return [values[:i], data[match.end():].decode()]
+
+#With 'writeCompression on' the solver writes h.gz, Us.gz, ... instead of h, Us, ... Every reader opens the files through open_file,
+#which falls back to the compressed file when the plain one does not exist.
+def open_file(path, mode = 'r'):
+    if os.path.exists(path) == False and os.path.exists(path+'.gz') == True:
+        if mode == 'r':
+            mode = 'rt'
+        return gzip.open(path+'.gz', mode)
+    return open(path, mode)
+
+def read_file(path): #the file is read into a bytearray, so the arrays created from it with np.frombuffer are writable
+    if os.path.exists(path) == False and os.path.exists(path+'.gz') == True:
+        data = bytearray()
+        with gzip.open(path+'.gz', 'rb') as f: #decompressed in chunks, the compressed file is never held in memory
+            while True:
+                chunk = f.read(1 << 22)
+                if len(chunk) == 0:
+                    break
+                data += chunk
+        return data
+    with open(path, 'rb') as f:
+        data = bytearray(os.fstat(f.fileno()).st_size)
+        f.readinto(data)
+    return data
+
+#Files written with 'writeFormat binary' keep the FoamFile header and the dictionary entries as text, only the contents of the
+#nonuniform lists are raw bytes. Their sizes and byte order are given by the 'arch' entry of the header. //AG
+def get_format(data):
+    format = {'binary': False, 'label': np.dtype('<i4'), 'scalar': np.dtype('<f8')}
+    header = re.search(rb'FoamFile\s*\{[^}]*\}', data[:4096])
+    if header != None:
+        match = re.search(rb'format\s+(\w+)\s*;', header.group(0))
+        if match != None and match.group(1) == b'binary':
+            format['binary'] = True
+        arch = re.search(rb'arch\s+"([^"]*)"', header.group(0))
+        if arch != None:
+            order = '<'
+            if b'MSB' in arch.group(1):
+                order = '>'
+            label = re.search(rb'label=([0-9]+)', arch.group(1))
+            scalar = re.search(rb'scalar=([0-9]+)', arch.group(1))
+            if label != None:
+                format['label'] = np.dtype(order+'i'+str(int(label.group(1))//8))
+            if scalar != None:
+                format['scalar'] = np.dtype(order+'f'+str(int(scalar.group(1))//8))
+    return format
+
+def read_binary_List(data, start, n, type, format): #returns the values of a binary list whose data starts at start, and the position after its ')'
+    if type == 'label':
+        dtype = format['label']
+    else:
+        dtype = format['scalar']
+    count = n
+    if type == 'vector':
+        count = 3*n
+    values = np.frombuffer(data, dtype=dtype, count=count, offset=start)
+    if type == 'vector':
+        values = values.reshape(n,3)
+    return [values, start+count*dtype.itemsize+1]
+
+def binary_to_text(data, format, type, boundary = True): #writes every binary List<...> in ascii, except a nonuniform internalField of the given type, which is returned as iF
+    iF = {}
+    text = []
+    pos = 0
+    pattern = re.compile(rb'List<(label|scalar|vector)>\s*([0-9]+)\s*\(')
+    stop_pattern = re.compile(rb'^\s*boundaryField\b', re.M)
+    while True:
+        match = pattern.search(data, pos)
+        if boundary == False:
+            stop = stop_pattern.search(data, pos)
+            if stop != None and (match == None or stop.start() < match.start()): #the binary lists of the patches are never decoded
+                text.append(data[pos:stop.start()].decode('latin-1'))
+                text.append('boundaryField\n{\n}\n')
+                return [''.join(text), iF]
+        if match == None:
+            break
+        text.append(data[pos:match.start()].decode('latin-1'))
+        list_type = match.group(1).decode()
+        n = int(match.group(2))
+        [values, pos] = read_binary_List(data, match.end(), n, list_type, format)
+        internal = re.search(r'internalField\s+nonuniform\s+$', text[-1])
+        if internal != None and list_type == type and iF == {}:
+            iF['u'] = 'nonuniform'
+            iF['field'] = values
+            text[-1] = text[-1][:internal.start()]+'internalField   nonuniform;'
+            end = re.compile(rb'\s*;').match(data, pos)
+            if end != None:
+                pos = end.end()
+        elif n == 0:
+            text.append('List<'+list_type+'> 0()')
+        else:
+            lines = []
+            if list_type == 'vector':
+                for v in values.tolist():
+                    lines.append('('+str(v[0])+' '+str(v[1])+' '+str(v[2])+')')
+            else:
+                for v in values.tolist():
+                    lines.append(str(v))
+            text.append('List<'+list_type+'> \n'+str(n)+'\n(\n'+'\n'.join(lines)+'\n)')
+    text.append(data[pos:].decode('latin-1'))
+    return [''.join(text), iF]
+
+def is_binary(path):
+    with open_file(path, 'rb') as f:
+        data = f.read(4096)
+    return get_format(data)['binary']
+
+def get_binary_List(path, type): #the list of a binary labelList, scalarField or vectorField file, like faceProcAddressing or faPoints
+    data = read_file(path)
+    header = re.search(rb'FoamFile\s*\{[^}]*\}', data)
+    match = re.compile(rb'([0-9]+)\s*\(').search(data, header.end())
+    [values, pos] = read_binary_List(data, match.end(), int(match.group(1)), type, get_format(data))
+    return values
+
+def get_binary_faces(path): #faceList files are a list of binary labelLists, faceCompactList files have the offsets and the labels of all the faces. Returns [offsets, labels]
+    data = read_file(path)
+    format = get_format(data)
+    header = re.search(rb'FoamFile\s*\{[^}]*\}', data)
+    pattern = re.compile(rb'\s*([0-9]+)\s*\(')
+    match = pattern.search(data, header.end())
+    if re.search(rb'class\s+\w*Compact', header.group(0)) != None:
+        [offsets, pos] = read_binary_List(data, match.end(), int(match.group(1)), 'label', format)
+        match = pattern.search(data, pos)
+        [labels, pos] = read_binary_List(data, match.end(), int(match.group(1)), 'label', format)
+        return [offsets.astype(np.int64), labels.astype(np.int64)]
+    pos = match.end()
+    sizes = []
+    faces = []
+    for i in range(int(match.group(1))):
+        match = pattern.match(data, pos)
+        [values, pos] = read_binary_List(data, match.end(), int(match.group(1)), 'label', format)
+        sizes.append(len(values))
+        faces.append(values)
+    offsets = np.zeros(len(sizes)+1, dtype=np.int64)
+    offsets[1:] = np.cumsum(sizes)
+    if len(faces) == 0:
+        return [offsets, np.zeros(0, dtype=np.int64)]
+    return [offsets, np.concatenate(faces).astype(np.int64)]
+
+def get_ascii_List(path, type): #the list of an ascii labelList, scalarField or vectorField file, parsed at once
+    data = read_file(path)
+    header = re.search(rb'FoamFile\s*\{[^}]*\}', data)
+    match = re.compile(rb'([0-9]+)\s*\(').search(data, header.end())
+    n = int(match.group(1))
+    values = read_List_values(data[match.end():data.rindex(b')')].decode('latin-1'), type)
+    if type == 'vector':
+        values = values[:3*n].reshape(-1,3)
+    elif type == 'label':
+        values = values[:n].astype(np.int64)
+    return values
+
+def get_ascii_faces(path): #offsets and labels of an ascii faceList file. Every face is n(l0 l1 ...), the sizes are read first and then removed from the labels
+    data = read_file(path)
+    header = re.search(rb'FoamFile\s*\{[^}]*\}', data)
+    match = re.compile(rb'([0-9]+)\s*\(').search(data, header.end())
+    block = data[match.end():data.rindex(b')')]
+    sizes = np.array([int(n) for n in re.findall(rb'([0-9]+)\s*\(', block)], dtype=np.int64)
+    offsets = np.zeros(len(sizes)+1, dtype=np.int64)
+    offsets[1:] = np.cumsum(sizes)
+    values = read_List_values(block.decode('latin-1'), 'vector').astype(np.int64)
+    mask = np.ones(len(values), dtype=bool)
+    mask[offsets[:-1]+np.arange(len(sizes))] = False
+    return [offsets, values[mask]]
+
+def get_binary_number(path): #the size of the list of a binary file, read from the beginning of the file only
+    with open_file(path, 'rb') as f:
+        data = f.read(4096)
+    header = re.search(rb'FoamFile\s*\{[^}]*\}', data)
+    match = re.compile(rb'([0-9]+)\s*\(').search(data, header.end())
+    return int(match.group(1))
+
+def read_List_values(block, type):
+    if type == 'vector':
+        block = block.replace('(',' ').replace(')',' ')
+    try:
+        values = np.fromstring(block, dtype=np.float64, sep=' ')
+    except ValueError:
+        values = np.zeros(0)
+    return values
     
 def get_input_number(path,list):
-    input = []
-    with open(path) as f:
-        i = 0
-        for line in f:
-            input.append(line)
-            i += 1
-            if i == 19:
-                break
-    input= input[16:(len(input))]
-    clean_spaces_string(input)
-    for i in range(len(input)):
-        list.append(input[i].split())
-        clean_dots(list[i])
-    clean_spaces_list(list)
+    if is_binary(path) == True:
+        list.append([str(get_binary_number(path))])
+        return
+    with open_file(path, 'rb') as f:
+        lines = [f.readline().decode() for i in range(19)]
+    list.extend(tokenize(lines))
 
 def get_number_faces(path):  
     list = []
@@ -305,68 +556,255 @@ def read_faBoundary(path,dict):
         dict['boundaries'] = subsubdict
         dict['number'] = n
     
-def read_faces(path,dict):  
-    list = []
-    get_input(path+'/0/faFaces',list)  
-    faces = len(list)-3
-    subList = []
-    for i in range(faces):
-        subList.append(read_face(list[i+2]))    
-    dict['faces'] = subList
-    dict['number'] = faces
+def read_faces(path,dict): #faces in CSR form, the points of the face i are labels[offsets[i]:offsets[i+1]]
+    if is_binary(path+'/0/faFaces') == True:
+        [dict['offsets'], dict['labels']] = get_binary_faces(path+'/0/faFaces')
+    else:
+        [dict['offsets'], dict['labels']] = get_ascii_faces(path+'/0/faFaces')
+    dict['number'] = len(dict['offsets'])-1
 
 def read_points(path,dict):  
-    list = []
-    get_input(path+'/0/faPoints',list)
-    subdict = {}
-    points = str(len(list)-3)
-    read_dictionary(list,subdict)
-    dict['points'] = subdict[points]
-    dict['number'] = int(points)
+    if is_binary(path+'/0/faPoints') == True:
+        dict['points'] = get_binary_List(path+'/0/faPoints', 'vector')
+    else:
+        dict['points'] = get_ascii_List(path+'/0/faPoints', 'vector')
+    dict['number'] = len(dict['points'])
 
 def read_edgeOwner(path,dict):  
-    list = []
-    get_input(path+'/0/edgeOwner',list)
-    subdict = {}
-    edges = str(len(list)-3)
-    read_dictionary(list,subdict)
-    dict['edges'] = subdict[edges]
-    dict['number'] = int(edges)
+    dict['edges'] = read_labelList(path+'/0/edgeOwner')
+    dict['number'] = len(dict['edges'])
     
 def read_edgeNeighbour(path,dict):  
-    list = []
-    get_input(path+'/0/edgeNeighbour',list)    
-    subdict = {}
-    edges = str(len(list)-3)
-    read_dictionary(list,subdict)
-    dict['edges'] = subdict[edges]
-    dict['number'] = int(edges)
+    dict['edges'] = read_labelList(path+'/0/edgeNeighbour')
+    dict['number'] = len(dict['edges'])
+
+#The case index has the times of a case sorted numerically, the number of processor directories and the size and mtime of the files of the times
+#that have been listed by Par_reconstructPar. It is built with os.scandir and kept in path/.caseIndex.json. While the mtime of the case directory does
+#not change the times are taken from it.
+indexes = {}  #case indexes already read in this process
+
+def case_index(path):
+    mtime = os.stat(path).st_mtime_ns
+    old = indexes.get(path)
+    if old == None and os.path.exists(path+'/.caseIndex.json') == True:
+        try:
+            with open(path+'/.caseIndex.json') as f:
+                old = json.load(f)
+        except (OSError, ValueError):
+            old = None
+    if old == None:
+        old = {'mtime': -1, 'times': [], 'processors': 0, 'files': {}}
+    if old['mtime'] == mtime:
+        times = old['times']
+        processors = old['processors']
+    else:
+        times = []
+        processors = 0
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir() == False:
+                    continue
+                if is_number(entry.name) == True:
+                    times.append(entry.name)
+                elif entry.name[:9] == 'processor' and entry.name[9:].isdigit() == True:
+                    processors = max(processors, int(entry.name[9:])+1)
+        times.sort(key=float)
+    files = {}
+    for time in times:
+        if (time in old['files']) == True and time != times[-1] and time != old['times'][-1]:
+            files[time] = old['files'][time]
+    index = {'mtime': mtime, 'times': times, 'processors': processors, 'files': files}
+    if index != old:
+        save_index(path, index)
+    indexes[path] = index
+    return index
+
+def save_index(path, index):
+    try:
+        mtime = os.stat(path).st_mtime_ns
+        with open(path+'/.caseIndex.json', 'w') as f:
+            json.dump(index, f)
+        if mtime == index['mtime'] and os.stat(path).st_mtime_ns != mtime: #creating the index changed the mtime of the directory, the index is kept for the new one
+            index['mtime'] = os.stat(path).st_mtime_ns
+            with open(path+'/.caseIndex.json', 'w') as f:
+                json.dump(index, f)
+    except OSError: #read-only cases are indexed again in every run
+        pass
 
 def number_processors(path):
-    listdir = os.listdir(path)
-    n_processors = 0
-    for i in range(len(listdir)):
-        if listdir[i][:9] == 'processor':
-            if n_processors < int(listdir[i][9:]):
-                n_processors = int(listdir[i][9:])
-    return (n_processors+1)
+    return max(case_index(path)['processors'], 1)
     
 def create_time(path, time):
     del time [:]
-    listdir = os.listdir(path)
-    k = 0
-    while True:
-        if is_number(listdir[k])==True:
-            if float(listdir[k]) == int(float(listdir[k])):
-                time.append(int(float(listdir[k])))
-            else:
-                time.append(float(listdir[k]))
-            k += 1
+    for name in case_index(path)['times']:
+        if float(name) == int(float(name)):
+            time.append(int(float(name)))
         else:
-            listdir.remove(listdir[k])
-        if k == len(listdir):
+            time.append(float(name))
+
+#Indices of the times chosen with the -time, -latestTime and -stride options. time is a list of values and ranges separated by commas, like '0.5,10:20' or ':5',
+#stride keeps one of every stride of those times and latestTime adds the last time (only the last time if neither time nor stride are given)
+def select_time(times, time = '', latestTime = False, stride = 1):
+    index = []
+    for i in range(len(times)):
+        if time == '':
+            index.append(i)
+        for entry in time.split(','):
+            if entry == '':
+                continue
+            if ':' in entry:
+                [start, end] = entry.split(':')
+                if (start == '' or float(times[i]) >= float(start)) and (end == '' or float(times[i]) <= float(end)):
+                    index.append(i)
+                    break
+            elif float(times[i]) == float(entry):
+                index.append(i)
+                break
+    index = index[::max(int(stride), 1)]
+    if latestTime == True and len(times) > 0:
+        if time == '' and stride == 1:
+            index = []
+        if ((len(times)-1) in index) == False:
+            index.append(len(times)-1)
+    return index
+
+#OpenFOAM ends every file with the '// ****' line, so a file that is still being written does not have it yet
+def file_complete(path):
+    if os.path.exists(path) == False and os.path.exists(path+'.gz') == True:
+        try:
+            data = read_file(path)
+        except (EOFError, OSError):
+            return False
+    else:
+        with open(path, 'rb') as f:
+            f.seek(max(os.path.getsize(path)-200, 0))
+            data = f.read()
+    lines = data.rstrip().splitlines()
+    return len(lines) > 0 and lines[-1].startswith(b'// *')
+
+def complete_time(path, time, names): #True when every file of names exists in path/time and is completely written
+    for name in names:
+        file = path+'/'+str(time)+'/'+name
+        if os.path.exists(file) == False and os.path.exists(file+'.gz') == False:
+            return False
+        if file_complete(file) == False:
+            return False
+    return True
+
+#With several ranks the times are taken one by one from a counter of rank 0 as the ranks finish the previous one, so a rank that gets quick times
+#(the first ones, with a small flow extent) takes more of them instead of waiting for the ranks with the slow ones. The counter is an MPI window
+#increased with Fetch_and_op, so rank 0 does not wait for requests and writes times as the other ranks. //AG
+def queue_times(comm, times):
+    from mpi4py import MPI
+    if comm.Get_rank() == 0:
+        window = MPI.Win.Allocate(8, 8, comm=comm)  #the memory of Allocate lets the ranks of a node increase the counter without rank 0
+        window.Lock(0, MPI.LOCK_EXCLUSIVE)
+        np.frombuffer(window.tomemory(), dtype=np.int64)[0] = 0
+        window.Unlock(0)
+    else:
+        window = MPI.Win.Allocate(0, 8, comm=comm)
+    comm.Barrier()
+    one = np.ones(1, dtype=np.int64)
+    next = np.zeros(1, dtype=np.int64)
+    while True:
+        window.Lock(0, MPI.LOCK_SHARED)
+        window.Fetch_and_op(one, next, 0, 0, MPI.SUM)
+        window.Unlock(0)
+        if next[0] >= len(times):
             break
-    time.sort()
+        yield times[int(next[0])]
+    window.Free()
+
+#comm.bcast pickles what it sends, which is slow for big addressing and interpolation data. bcast_arrays sends a dictionary of numpy arrays of
+#rank 0 as a single byte buffer with comm.Bcast, and the other ranks get the arrays as views of that buffer. //AG
+def bcast_arrays(comm, arrays):
+    if comm.Get_rank() == 0:
+        layout = []
+        size = 0
+        for key in arrays.keys():
+            array = np.ascontiguousarray(arrays[key])
+            layout.append([key, array.dtype.str, array.shape, size])
+            size += -(-array.nbytes//8)*8  #every array starts at a multiple of 8 bytes
+        buffer = np.zeros(size, dtype=np.uint8)
+        for [key, dtype, shape, start] in layout:
+            data = np.ascontiguousarray(arrays[key]).reshape(-1).view(np.uint8)
+            buffer[start:start+len(data)] = data
+        comm.bcast([layout, size], root=0)
+    else:
+        [layout, size] = comm.bcast(None, root=0)
+        buffer = np.empty(size, dtype=np.uint8)
+    comm.Bcast(buffer, root=0)
+    if comm.Get_rank() == 0:
+        return arrays
+    output = {}
+    for [key, dtype, shape, start] in layout:
+        output[key] = np.frombuffer(buffer, dtype=dtype, count=int(np.prod(shape)), offset=start).reshape(shape)
+    return output
+
+def bcast_output(comm, o): #the outPut of rank 0 in every rank. The interpolation arrays go with bcast_arrays and the matrices are rebuilt from them
+    if comm.Get_rank() == 0:
+        light = copy.copy(o)
+        for name in ['index_matrix', 'alpha_matrix', 'index_array', 'cell_array', 'alpha_array']:
+            setattr(light, name, [])
+        comm.bcast(light, root=0)
+        bcast_arrays(comm, {'index': o.index_array, 'cell': o.cell_array, 'alpha': o.alpha_array})
+        return o
+    o = comm.bcast(None, root=0)
+    arrays = bcast_arrays(comm, {})
+    o.index_array = arrays['index']
+    o.cell_array = arrays['cell']
+    o.alpha_array = arrays['alpha']
+    o.get_index_lists()
+    return o
+
+def report_ranks(comm, times, busy): #times written and seconds spent by every rank, printed by rank 0
+    report = comm.gather([times, busy], root=0)
+    if comm.Get_rank() == 0:
+        for i in range(len(report)):
+            print('Rank = '+str(i)+'  times = '+str(report[i][0])+'  busy = '+str(round(report[i][1], 2))+' s')
+
+#With the processes backend the times are written by a pool of processes instead of MPI ranks. The processes are forked from the main one, so the
+#outPut built there is shared as copy-on-write memory instead of being sent, and they take the times one by one from the queue of the pool. //AG
+shared = {}  #the outPut of a process of the pool
+
+def share_case(case, ranks):
+    pools.clear()  #the pools of the main process cannot be used in a forked one
+    case.rank = ranks.get()
+    shared['case'] = case
+
+def write_pool_time(path, time):
+    case = shared['case']
+    case.write_queued_time(path, time)
+    return [case.rank, len(case.t_rank), case.t_busy]
+
+def write_processes(case, path, times, processes):
+    if ('fork' in multiprocessing.get_all_start_methods()) == True:
+        context = multiprocessing.get_context('fork')
+    else: #without fork the outPut is pickled for every process
+        context = multiprocessing.get_context()
+    ranks = context.Queue()
+    for i in range(1, processes+1):
+        ranks.put(i)
+    report = {}
+    with concurrent.futures.ProcessPoolExecutor(max_workers=processes, mp_context=context, initializer=share_case, initargs=(case, ranks)) as pool:
+        for [rank, number, busy] in pool.map(write_pool_time, [path]*len(times), times):
+            report[rank] = [number, busy]
+    for rank in sorted(report.keys()):
+        print('Rank = '+str(rank)+'  times = '+str(report[rank][0])+'  busy = '+str(round(report[rank][1], 2))+' s')
+
+#The files of every processor can be read by a pool of processes (workers > 1). The pool is created on first use and reused by every reader.
+#The readers send back numpy arrays and dictionaries of arrays, which are much cheaper to pickle than lists of python objects. //AG
+pools = {}
+
+def get_pool(workers):
+    if (workers in pools.keys()) == False:
+        pools[workers] = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+    return pools[workers]
+
+def map_processors(function, args, workers = 1):
+    if workers > 1 and len(args) > 1:
+        return list(get_pool(workers).map(function, *zip(*args)))
+    return [function(*arg) for arg in args]
 
 def read_proc_number_faces(path, n_proc, output):
     for p in range(n_proc):
@@ -374,38 +812,39 @@ def read_proc_number_faces(path, n_proc, output):
         get_input_number(path+'/processor'+str(p)+'/constant/faMesh/faceLabels',list) 
         output['processor'+str(p)] = int(list[0][0])
 
-def read_proc_faBoundary(path, n_proc, output):
+def read_proc_faBoundary(path, n_proc, output, workers = 1):
+    args = [(path+'/processor'+str(p),) for p in range(n_proc)]
+    dicts = map_processors(get_faBoundary_dict, args, workers)
     for p in range(n_proc):
-        dict = {}
-        read_faBoundary(path+'/processor'+str(p), dict)
-        output['processor'+str(p)] = dict
+        output['processor'+str(p)] = dicts[p]
 
-def read_proc_faceaddr(path, n_proc, output):
+def get_faBoundary_dict(path):
+    dict = {}
+    read_faBoundary(path, dict)
+    return dict
+
+def read_proc_faceaddr(path, n_proc, output, workers = 1):
+    args = [(path+'/processor'+str(p)+'/constant/faMesh/faceProcAddressing',) for p in range(n_proc)]
+    lists = map_processors(read_labelList, args, workers)
     for p in range(n_proc):
-        list = []
-        get_input(path+'/processor'+str(p)+'/constant/faMesh/faceProcAddressing',list)
-        list = list[2:-1]
-        for i in range(len(list)):
-            list[i] = int(list[i][0])
-        output['processor'+str(p)] = list               
+        output['processor'+str(p)] = lists[p].tolist()
 
-def read_proc_edgeaddr(path, n_proc, output):
+def read_proc_edgeaddr(path, n_proc, output, workers = 1):
+    args = [(path+'/processor'+str(p)+'/constant/faMesh/edgeProcAddressing',) for p in range(n_proc)]
+    lists = map_processors(read_labelList, args, workers)
     for p in range(n_proc):
-        list = []
-        get_input(path+'/processor'+str(p)+'/constant/faMesh/edgeProcAddressing',list)
-        list = list[2:-1]
-        for i in range(len(list)):
-            list[i] = int(list[i][0])
-        output['processor'+str(p)] = list 
+        output['processor'+str(p)] = lists[p].tolist()
 
-def read_proc_edgeOwners(path, n_proc, dict):                    
+def read_proc_edgeOwners(path, n_proc, dict, workers = 1):
+    args = [(path+'/processor'+str(p)+'/0/edgeOwner',) for p in range(n_proc)]
+    lists = map_processors(read_labelList, args, workers)
     for p in range(n_proc):
-        list = []
-        get_input(path+'/processor'+str(p)+'/0/edgeOwner',list)
-        list = list[2:-1]
-        for i in range(len(list)):
-            list[i] = int(list[i][0])
-        dict['processor'+str(p)] = list
+        dict['processor'+str(p)] = lists[p].tolist()
+
+def read_labelList(path): #labels of a faceProcAddressing, edgeProcAddressing or edgeOwner file
+    if is_binary(path) == True:
+        return get_binary_List(path, 'label')
+    return get_ascii_List(path, 'label')
 
 def read_proc_number_edges(path, n_proc, output, proc_fB):
     for p in range(n_proc):
@@ -420,16 +859,8 @@ def read_proc_number_edges(path, n_proc, output, proc_fB):
         output['processor'+str(p)] = dict
                        
 def read_lp(path,dict):
-    input = []
-    with open(path) as f:
-        for line in f:
-            input.append(line)
-    clean_spaces_string(input)
     list = []
-    for i in range(len(input)):
-        list.append(input[i].split())
-        clean_dots(list[i])
-    clean_spaces_list(list)
+    list.extend(tokenize(read_lines(path), False))
     
     n_Channels = int(list[0][1])
     
@@ -448,16 +879,8 @@ def read_lp(path,dict):
         dict[name] = subdict
 
 def read_tp(path,dict):
-    input = []
-    with open(path) as f:
-        for line in f:
-            input.append(line)
-    clean_spaces_string(input)
     list = []
-    for i in range(len(input)):
-        list.append(input[i].split())
-        clean_dots(list[i])
-    clean_spaces_list(list)
+    list.extend(tokenize(read_lines(path), False))
     
     n_Channels = int(list[0][1])
     
@@ -488,6 +911,78 @@ class areaField:
                 self.iF= internalField
                 self.bF= boundaryField
                 self.dim = dimension
+
+        def nbytes(self):
+                nbytes = np.asarray(self.iF.field).nbytes
+                for key in self.bF.d.keys():
+                    if isinstance(self.bF.d[key].get('value'), dict) == True:
+                        nbytes += np.asarray(self.bF.d[key]['value']['List']).nbytes
+                return nbytes
+
+#Class timeField keeps the areaFields of a runCase field keyed by str(time). A time that is not loaded is read on first access with
+#load(False, time), which is the get_ function of the field, and with memory > 0 (MB) the least recently used times are removed
+#when the loaded fields exceed that memory. hits, misses and evictions count the accesses. //AG
+class timeField(dict):
+        def __init__(self, load = None, times = [], memory = 0):
+                dict.__init__(self)
+                self.load = load
+                self.times = times
+                self.memory = memory
+                self.sizes = {}
+                self.hits = 0
+                self.misses = 0
+                self.evictions = 0
+
+        def __reduce__(self):
+                return (timeField, (self.load, self.times, self.memory), self.__dict__, None, iter(dict.items(self)))
+
+        def __getitem__(self, key):
+                if dict.__contains__(self, key) == True:
+                    self.hits += 1
+                    value = dict.pop(self, key)
+                    dict.__setitem__(self, key, value)
+                    return value
+                return self.__missing__(key)
+
+        def __missing__(self, key):
+                times = [t for t in self.times if str(t) == key]
+                if self.load == None or times == []:
+                    raise KeyError(key)
+                self.misses += 1
+                self.load(False, times[0])
+                return dict.__getitem__(self, key)
+
+        def __setitem__(self, key, value):
+                self.pop(key, None)
+                dict.__setitem__(self, key, value)
+                self.sizes[key] = value.nbytes()
+                self.evict()
+
+        def __delitem__(self, key):
+                self.sizes.pop(key, None)
+                dict.__delitem__(self, key)
+
+        def pop(self, key, *default):
+                self.sizes.pop(key, None)
+                return dict.pop(self, key, *default)
+
+        def clear(self):
+                self.sizes = {}
+                dict.clear(self)
+
+        def evict(self):
+                if self.memory > 0:
+                    while len(self) > 1 and sum(self.sizes.values()) > self.memory*1e6:
+                        self.pop(next(iter(self)))
+                        self.evictions += 1
+
+        def preload(self): #times read by the get_ functions with time = -1, with a memory limit they are read on first access
+                if self.memory > 0:
+                    return []
+                return self.times
+
+        def stats(self):
+                return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'loaded': len(self), 'MB': sum(self.sizes.values())/1e6}
                                                 
 class vector:
         def __init__(self,x=0, y=0, z=0):
@@ -542,9 +1037,44 @@ class vector:
 def distxy(v1,v2):
         return round(math.sqrt((v1.x-v2.x)**2+(v1.y-v2.y)**2),6)
 
+def distxy_array(x,y,List): #distxy between the point (x,y) and every row of a (n,3) array
+        return np.round(np.sqrt((x-List[:,0])**2+(y-List[:,1])**2),6)
+
 def dist(v1,v2):
         return round(math.sqrt((v1.x-v2.x)**2+(v1.y-v2.y)**2+(v1.z-v2.z)**2),6)
 
+#The edge centres of the processors are matched with the global ones through a hash of their coordinates divided by the tolerance.
+#A centre is looked for in its cell and in the 26 cells around it, so two centres closer than the tolerance are always found. //AG
+def hash_points(points, tolerance):
+    grid = {}
+    cells = np.floor(np.asarray(points, dtype=np.float64).reshape(-1,3)/tolerance).astype(np.int64)
+    for i, cell in enumerate(cells.tolist()):
+        grid.setdefault(tuple(cell), []).append(i)
+    return grid
+
+def find_points(grid, points, targets, tolerance): #index in points of every target, the closest one within the tolerance
+    points = np.asarray(points, dtype=np.float64).reshape(-1,3).tolist()
+    targets = np.asarray(targets, dtype=np.float64).reshape(-1,3)
+    cells = np.floor(targets/tolerance).astype(np.int64).tolist()
+    targets = targets.tolist()
+    around = [(0,0,0)] + [(i,j,k) for i in (-1,0,1) for j in (-1,0,1) for k in (-1,0,1) if (i,j,k) != (0,0,0)]
+    indexes = []
+    for n, cell in enumerate(cells):
+        index = -1
+        distance = tolerance
+        for offset in around:
+            for i in grid.get((cell[0]+offset[0], cell[1]+offset[1], cell[2]+offset[2]), []):
+                d = max(abs(points[i][0]-targets[n][0]), abs(points[i][1]-targets[n][1]), abs(points[i][2]-targets[n][2]))
+                if d <= distance:
+                    index = i
+                    distance = d
+            if distance == 0:
+                break
+        if index == -1:
+            raise ValueError('edge centre '+str(targets[n])+' without match within '+str(tolerance))
+        indexes.append(index)
+    return indexes
+
 class dimensions:
         def __init__(self,List):
                 self.M= float(List[0][0])
@@ -573,13 +1103,12 @@ class internalField:
                             for i in range(n):
                                 self.field.append(float(list[i]))
                         elif type == 'vector':
-                            for i in range(n):
-                                self.field.append(vector(list[i][0],list[i][1],list[i][2]))
+                            self.field = np.array(list[:n], dtype=np.float64).reshape(n,3)
                     elif self.u == 'uniform':
                         if type == 'scalar':
                             self.field.append(float(dict['internalField'][0][1]))
                         elif type == 'vector':
-                            self.field.append(vector(dict['internalField'][0][1:][0],dict['internalField'][0][1:][1],dict['internalField'][0][1:][2]))
+                            self.field = np.array([dict['internalField'][0][1:4]], dtype=np.float64)
                 else:
                     self.u = dict['u']
                     self.field = dict['field']
@@ -637,10 +1166,12 @@ class boundaryField:
                                     sublist = []
                                     if faBoundary['boundaries'][key] != 0:
                                         if type == 'vector':
-                                            v = vector(value[1:][0],value[1:][1],value[1:][2])
+                                            v = value[1:4]
                                         elif type == 'scalar':
                                             v= float(value[1:][0])
                                         sublist.append(v)                            
+                                    if type == 'vector':
+                                        sublist = np.array(sublist, dtype=np.float64).reshape(len(sublist),3)
                                     subdict['List'] = sublist
                                     self.d[key]['value'] = subdict
                                 elif self.d[key]['value'][0][0] == 'nonuniform':
@@ -652,10 +1183,12 @@ class boundaryField:
                                         value = self.d[key].pop(str(len(faBoundary['boundaries'][key])))
                                         for i in range(len(value)):
                                             if type == 'vector':
-                                                v = vector(value[i][0],value[i][1],value[i][2])
+                                                v = value[i]
                                             elif type == 'scalar':
                                                 v= float(value[i])
                                             sublist.append(v)
+                                    if type == 'vector':
+                                        sublist = np.array(sublist, dtype=np.float64).reshape(len(sublist),3)
                                     subdict['List'] = sublist
                                     self.d[key]['value'] = subdict
                         else:
@@ -664,92 +1197,156 @@ class boundaryField:
                         self.d.pop(key)
 
 #Right now, read_areaField and read_edgeField are the same, probably in the past there were some differences. I will conserve both for the moment.  //AG                         
-def read_areaField(path,time,name,type,output,number_faces,faBoundary):
+def read_areaField(path,time,name,type,output,number_faces,faBoundary, cache = False, boundary = True):
+    output[str(time)] = read_field(path, str(time)+'/'+name, type, number_faces, faBoundary, cache, False, boundary)
+
+def read_edgeField(path,time,name,type,output,number_edges,faBoundary, cache = False):
+    output[str(time)] = read_field(path, str(time)+'/'+name, type, number_edges, faBoundary, cache)
+
+def read_field(path, file, type, number, faBoundary, cache = False, proc = False, boundary = True):
+    if cache == True:
+        source = source_stat(path+'/'+file)
+        field = read_cache(path, file, type, source, boundary)
+        if field != None:
+            return field
     list = []
-    get_input(path+'/'+str(time)+'/'+name,list)
+    iF = get_field_input(path+'/'+file,list,type,True,boundary)
+    if proc == True:
+        list = correct_bFEdgeFields(list,type)
     field = {}
     read_dictionary(list,field)
     dimension = dimensions(field['dimensions'])
     boundaryfield = boundaryField(field['boundaryField'],type,faBoundary)
-    internalfield = internalField(field,type,number_faces)
-    output[str(time)] = areaField(type,internalfield,boundaryfield,dimension)
+    if iF != {}:
+        internalfield = internalField(iF,type,number,False)
+    else:
+        internalfield = internalField(field,type,number)
+    output = areaField(type,internalfield,boundaryfield,dimension)
+    if cache == True:
+        write_cache(path, file, type, output, source, boundary)
+    return output
 
-def read_edgeField(path,time,name,type,output,number_edges,faBoundary):
-    list = []
-    get_input(path+'/'+str(time)+'/'+name,list)
-    field = {}
-    read_dictionary(list,field)
-    dimension = dimensions(field['dimensions'])
-    boundaryfield = boundaryField(field['boundaryField'],type,faBoundary)
-    internalfield = internalField(field,type,number_edges)
-    output[str(time)] = areaField(type,internalfield,boundaryfield,dimension)
+#With the cache activated every parsed field is stored in path/.npyCache as .npy files (internal field and value of every patch) and a .json file
+#with the rest of the field. The next runs memory-map the .npy files instead of parsing the case again, unless the mtime or the size of the source file changed.
+def cache_path(path, file):
+    return path+'/.npyCache/'+file
+
+def source_stat(path):
+    if os.path.exists(path) == False and os.path.exists(path+'.gz') == True:
+        path = path+'.gz'
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+def read_cache(path, file, type, source, boundary = True):
+    cache = cache_path(path, file)
+    if os.path.exists(cache+'.json') == False:
+        return None
+    try:
+        with open(cache+'.json') as f:
+            info = json.load(f)
+        if info['source'] != source or (boundary == True and info.get('boundary', True) == False):
+            return None
+        return load_cache(cache, type, info)
+    except (OSError, ValueError, KeyError): #a cache file cut by an interrupted run is a cache miss, the field is parsed and cached again
+        return None
+
+def load_cache(cache, type, info):
+    iF = {}
+    iF['u'] = info['u']
+    if iF['u'] == 'nonuniform':
+        iF['field'] = np.load(cache+'.npy', mmap_mode='c') #copy-on-write, the fields are corrected in place but the cache files are never modified
+    else:
+        iF['field'] = np.load(cache+'.npy')
+        if type == 'scalar':
+            iF['field'] = iF['field'].tolist()
+    bF = info['boundaryField']
+    for key in bF.keys():
+        if isinstance(bF[key].get('value'), dict) == True:
+            List = np.load(cache+'.'+key+'.npy')
+            if type == 'scalar':
+                List = List.tolist()
+            bF[key]['value']['List'] = List
+    internalfield = internalField(iF,type,0,False)
+    boundaryfield = boundaryField(bF,type,{},False)
+    return areaField(type,internalfield,boundaryfield,dimensions([info['dimensions']]))
+
+def write_cache(path, file, type, field, source, boundary = True):
+    cache = cache_path(path, file)
+    os.makedirs(os.path.dirname(cache), exist_ok=True)
+    np.save(cache+'.npy', np.asarray(field.iF.field, dtype=np.float64))
+    bF = {}
+    for key in field.bF.d.keys():
+        bF[key] = dict(field.bF.d[key])
+        if isinstance(bF[key].get('value'), dict) == True:
+            np.save(cache+'.'+key+'.npy', np.asarray(bF[key]['value']['List'], dtype=np.float64))
+            bF[key]['value'] = {'uniform': bF[key]['value']['uniform'], 'List': []}
+    info = {'source': source, 'boundary': boundary, 'u': field.iF.u, 'dimensions': field.dim.List(), 'boundaryField': bF}
+    with open(cache+'.json', 'w') as f: #written at the end, a cache without its .json file is never read
+        json.dump(info, f)
        
-def read_h(path, time, output, number_faces,faBoundary):
-    read_areaField(path, time, 'h','scalar',output, number_faces,faBoundary)
+def read_h(path, time, output, number_faces,faBoundary, cache = False, boundary = True):
+    read_areaField(path, time, 'h','scalar',output, number_faces,faBoundary, cache, boundary)
                 
-def read_pb(path, time, output, number_faces,faBoundary):
-    read_areaField(path, time, 'pb','scalar',output, number_faces,faBoundary)
+def read_pb(path, time, output, number_faces,faBoundary, cache = False, boundary = True):
+    read_areaField(path, time, 'pb','scalar',output, number_faces,faBoundary, cache, boundary)
         
-def read_Cv(path, time, output, number_faces,faBoundary):
-    read_areaField(path, time, 'Cv','scalar',output, number_faces,faBoundary)
+def read_Cv(path, time, output, number_faces,faBoundary, cache = False, boundary = True):
+    read_areaField(path, time, 'Cv','scalar',output, number_faces,faBoundary, cache, boundary)
                 
-def read_deltac0(path, time, output, number_faces,faBoundary):
-    read_areaField(path, time, 'deltac0','scalar',output, number_faces,faBoundary)
+def read_deltac0(path, time, output, number_faces,faBoundary, cache = False, boundary = True):
+    read_areaField(path, time, 'deltac0','scalar',output, number_faces,faBoundary, cache, boundary)
 
-def read_deltah0(path, time, output, number_faces,faBoundary):
-    read_areaField(path, time, 'deltah0','scalar',output, number_faces,faBoundary)
+def read_deltah0(path, time, output, number_faces,faBoundary, cache = False, boundary = True):
+    read_areaField(path, time, 'deltah0','scalar',output, number_faces,faBoundary, cache, boundary)
 
-def read_Us(path, time, output, number_faces,faBoundary):
-    read_areaField(path, time, 'Us','vector',output, number_faces,faBoundary)
+def read_Us(path, time, output, number_faces,faBoundary, cache = False, boundary = True):
+    read_areaField(path, time, 'Us','vector',output, number_faces,faBoundary, cache, boundary)
 
-def read_tau(path, time, output, number_faces,faBoundary):
-    read_areaField(path, time, 'tau','vector',output, number_faces,faBoundary)
+def read_tau(path, time, output, number_faces,faBoundary, cache = False, boundary = True):
+    read_areaField(path, time, 'tau','vector',output, number_faces,faBoundary, cache, boundary)
         
-def read_n(path, time, output, number_faces,faBoundary):
-    read_areaField(path, time, 'n','vector',output, number_faces ,faBoundary)
+def read_n(path, time, output, number_faces,faBoundary, cache = False, boundary = True):
+    read_areaField(path, time, 'n','vector',output, number_faces ,faBoundary, cache, boundary)
 
-def read_he(path, time, output, number_faces,faBoundary):
-    read_areaField(path, time, 'he','scalar',output, number_faces,faBoundary)
+def read_he(path, time, output, number_faces,faBoundary, cache = False, boundary = True):
+    read_areaField(path, time, 'he','scalar',output, number_faces,faBoundary, cache, boundary)
 
-def read_c(path, time, output, number_faces,faBoundary):
-    read_areaField(path, time, 'c','vector',output, number_faces ,faBoundary)
+def read_c(path, time, output, number_faces,faBoundary, cache = False, boundary = True):
+    read_areaField(path, time, 'c','vector',output, number_faces ,faBoundary, cache, boundary)
 
-def read_ec(path,output, number_edges,faBoundary):
-    read_edgeField(path, 0, 'ec','vector',output, number_edges,faBoundary)
+def read_ec(path,output, number_edges,faBoundary, cache = False):
+    read_edgeField(path, 0, 'ec','vector',output, number_edges,faBoundary, cache)
 
-def read_A(path,time, output, number_faces,faBoundary):
-    read_areaField(path, time, 'A','scalar',output, number_faces ,faBoundary)
+def read_A(path,time, output, number_faces,faBoundary, cache = False, boundary = True):
+    read_areaField(path, time, 'A','scalar',output, number_faces ,faBoundary, cache, boundary)
         
-def read_phi2s(path, time, output, number_edges,faBoundary):
-    read_edgeField(path, time, 'phi2s','scalar',output, number_edges ,faBoundary)
+def read_phi2s(path, time, output, number_edges,faBoundary, cache = False):
+    read_edgeField(path, time, 'phi2s','scalar',output, number_edges ,faBoundary, cache)
         
-def read_Q(path, time, output, number_edges, faBoundary):
-    read_edgeField(path, time, 'Q','scalar',output, number_edges, faBoundary)
+def read_Q(path, time, output, number_edges, faBoundary, cache = False):
+    read_edgeField(path, time, 'Q','scalar',output, number_edges, faBoundary, cache)
 
-def read_c_proc(path, time, output, n_processors, proc_fB, proc_nF):
-    read_areaField_proc(path, time, 'c','vector',output, n_processors, proc_fB, proc_nF)
+def read_c_proc(path, time, output, n_processors, proc_fB, proc_nF, cache = False, workers = 1):
+    read_areaField_proc(path, time, 'c','vector',output, n_processors, proc_fB, proc_nF, cache, workers)
         
-def read_ec_proc(path,output,n_processors, proc_fB, proc_nE):
-    read_edgeField_proc(path, 0, 'ec','vector',output, n_processors, proc_fB, proc_nE) 
+def read_ec_proc(path,output,n_processors, proc_fB, proc_nE, cache = False, workers = 1):
+    read_edgeField_proc(path, 0, 'ec','vector',output, n_processors, proc_fB, proc_nE, cache, workers) 
        
-def read_Q_proc(path, time, output, n_processors, proc_fB, proc_nE):
-    read_edgeField_proc(path, time, 'Q', 'scalar', output, n_processors, proc_fB, proc_nE)
+def read_Q_proc(path, time, output, n_processors, proc_fB, proc_nE, cache = False, workers = 1):
+    read_edgeField_proc(path, time, 'Q', 'scalar', output, n_processors, proc_fB, proc_nE, cache, workers)
 
-def read_phi2s_proc(path, time, output, n_processors, proc_fB, proc_nE):
-    read_edgeField_proc(path, time, 'phi2s', 'scalar', output, n_processors, proc_fB, proc_nE)
+def read_phi2s_proc(path, time, output, n_processors, proc_fB, proc_nE, cache = False, workers = 1):
+    read_edgeField_proc(path, time, 'phi2s', 'scalar', output, n_processors, proc_fB, proc_nE, cache, workers)
 
-def read_areaField_proc(path, time, name, type, output, n_processors, proc_fB, proc_nF):
+def read_areaField_proc(path, time, name, type, output, n_processors, proc_fB, proc_nF, cache = False, workers = 1):
+    args = []
+    for p in range(n_processors):
+        file = 'processor'+str(p)+'/'+str(time)+'/'+name
+        args.append((path, file, type, proc_nF['processor'+str(p)], proc_fB['processor'+str(p)], cache, True))
+    fields = map_processors(read_field, args, workers)
     dict = {}
     for p in range(n_processors):
-        list = []
-        get_input(path+'/processor'+str(p)+'/'+str(time)+'/'+name,list)
-        list = correct_bFEdgeFields(list,type)
-        field = {}
-        read_dictionary(list,field)
-        dimension = dimensions(field['dimensions'])
-        boundaryfield = boundaryField(field['boundaryField'],type,proc_fB['processor'+str(p)])
-        internalfield = internalField(field,type,proc_nF['processor'+str(p)])
-        dict['processor'+str(p)] = areaField(type,internalfield,boundaryfield,dimension)
+        dict['processor'+str(p)] = fields[p]
     output[str(time)] = dict
 
 def correct_bFEdgeFields(list,type): #This is incredibly inefficient. It must be improved in a future version. //AG
@@ -764,18 +1361,15 @@ def correct_bFEdgeFields(list,type): #This is incredibly inefficient. It must be
         new_list.append(list[i])
     return new_list
 
-def read_edgeField_proc(path, time, name, type, output, n_processors, proc_fB, proc_nE):
+def read_edgeField_proc(path, time, name, type, output, n_processors, proc_fB, proc_nE, cache = False, workers = 1):
+    args = []
+    for p in range(n_processors):
+        file = 'processor'+str(p)+'/'+str(time)+'/'+name
+        args.append((path, file, type, proc_nE['processor'+str(p)]['internal'], proc_fB['processor'+str(p)], cache, True))
+    fields = map_processors(read_field, args, workers)
     dict = {}
     for p in range(n_processors):
-        list = []
-        get_input(path+'/processor'+str(p)+'/'+str(time)+'/'+name,list)
-        list = correct_bFEdgeFields(list,type)
-        field = {}
-        read_dictionary(list,field)
-        dimension = dimensions(field['dimensions'])
-        boundaryfield = boundaryField(field['boundaryField'],type,proc_fB['processor'+str(p)])
-        internalfield = internalField(field,type,proc_nE['processor'+str(p)]['internal'])
-        dict['processor'+str(p)] = areaField(type,internalfield,boundaryfield,dimension)
+        dict['processor'+str(p)] = fields[p]
     output[str(time)] = dict
 
 #When running the code in parallel the reconstructed fields are created in ascending order,
@@ -793,17 +1387,17 @@ def correct_edge_proc(internal_field, procBoundary_owner, procBoundary_edgeList)
 
 #Class runCase is used to read the outputs of the OpenFOAM simulation. Just a few calculations are performed inside this class //AG  
 class runCase:
-        def __init__(self,path,lp_name='',tp_name='',h='on',pb='off',Cv='on',deltaz0='on',Us='on',tau='off',phi2s='off',Q='on',c='off',n='off',he='off', A='off'):
+        def __init__(self,path,lp_name='',tp_name='',h='on',pb='off',Cv='on',deltaz0='on',Us='on',tau='off',phi2s='off',Q='on',c='off',n='off',he='off', A='off', cache='off', memory=0, workers=1, time='', latestTime=False, stride=1, boundary='on', tolerance=1e-6, decomposed='off'):
                 self.t= []
-                self.h = {}               
-                self.pb = {}
-                self.Cv = {}
-                self.deltah0 = {}
-                self.deltac0 = {}
-                self.Us = {}
-                self.tau = {}
-                self.Q = {}
-                self.phi2s = {}
+                self.h = timeField(self.get_h, self.t, memory)
+                self.pb = timeField(self.get_pb, self.t, memory)
+                self.Cv = timeField(self.get_Cv, self.t, memory)
+                self.deltah0 = timeField(self.get_deltah0, self.t, memory)
+                self.deltac0 = timeField(self.get_deltac0, self.t, memory)
+                self.Us = timeField(self.get_Us, self.t, memory)
+                self.tau = timeField(self.get_tau, self.t, memory)
+                self.Q = timeField(self.get_Q, self.t, memory)
+                self.phi2s = timeField(self.get_phi2s, self.t, memory)
                 self.n = {}
                 self.he = {}
                 self.c = {}
@@ -852,6 +1446,13 @@ class runCase:
                 self.A_flag  = A
                 self.n_flag  = n
                 self.he_flag = he
+                self.cache = (cache == 'on' or cache == 'yes' or cache == True)  #.npy field cache
+                self.workers = workers  #processes reading the processor files
+                self.time_selection = [time, latestTime, stride]  #-time, -latestTime and -stride options
+                self.boundary = (boundary == 'on' or boundary == 'yes' or boundary == True)  #patch values of the area fields
+                self.tolerance = tolerance  #largest distance between the edge centres of a processor and the global ones of the same edge
+                self.decomposed = (decomposed == 'on' or decomposed == 'yes' or decomposed == True)  #fields of the times read from the processor directories
+                self.rec = None  #Par_reconstructPar runCase used by the decomposed option
                 
                 self.xi = 0
                 self.xf = 0
@@ -873,8 +1474,6 @@ class runCase:
         def get_case(self):
                 self.get_faBoundary()
                 self.get_nEdges()
-                self.get_faces()
-                self.get_points()
                 self.get_lp()
                 self.get_time()
                 self.get_ec()
@@ -924,19 +1523,37 @@ class runCase:
         def get_time(self, report = True):
                 if report == True:
                     print ('Reading times ...')
-                create_time(self.p, self.t)
+                if self.decomposed == True:
+                    create_time(self.p+'/processor0', self.t)
+                else:
+                    create_time(self.p, self.t)
+                index = select_time(self.t, self.time_selection[0], self.time_selection[1], self.time_selection[2])
+                self.t[:] = [self.t[i] for i in index]
+
+        def field_names(self): #files read by the get_ functions for every time
+                names = []
+                for [flag, name] in [[self.h_flag,'h'],[self.pb_flag,'pb'],[self.Cv_flag,'Cv'],[self.Us_flag,'Us'],[self.tau_flag,'tau'],[self.Q_flag,'Q'],[self.phi2s_flag,'phi2s']]:
+                    if (flag == 'on' or flag == 'yes' or flag == True):
+                        names.append(name)
+                if (self.deltaz0_flag == 'on' or self.deltaz0_flag == 'yes' or self.deltaz0_flag == True):
+                    if self.tps == {}:
+                        self.get_transportProperties(False)
+                    if self.tps['terrainModification'] == 'on' or self.tps['terrainModification'] == True:
+                        names.append('deltac0')
+                    elif self.tps['entrainmentModel'] != 'entrainmentOff' and self.tps['depositionModel'] != 'depositionOff':
+                        names.append('deltah0')
+                    self.clean_tps()
+                return names
 
         def get_ec(self, report = True):
                 if report == True:
                     print('Reading ec field ...')
-                read_ec(self.p,self.ec, self.nE['internal'], self.fB)
-                field = [vector(-9999,-9999,-9999)]*self.nE['Total']
-                for i in range(self.nE['internal']):
-                    field[i] = self.ec['0'].iF.field[i]
+                read_ec(self.p,self.ec, self.nE['internal'], self.fB, self.cache)
+                field = np.full((self.nE['Total'],3), -9999.0)
+                field[:self.nE['internal']] = self.ec['0'].iF.field[:self.nE['internal']]
                 for patch_key in self.ec['0'].bF.d.keys():
                     list = self.ec['0'].bF.d[patch_key]['value']['List']
-                    for i in range(len(list)):
-                        field[self.fB['boundaries'][patch_key][i]] = list[i]
+                    field[self.fB['boundaries'][patch_key][:len(list)]] = list
                 self.ec['0'].iF.field = field
                 
         def get_limits(self, report = True):
@@ -953,15 +1570,10 @@ class runCase:
                 dict = self.ec['0'].bF.d
                 for key in dict.keys():
                     list = dict[key]['value']['List']
-                    sublist_x = []
-                    sublist_y = []
-                    for i in range(len(list)):
-                        sublist_x.append(list[i].x)
-                        sublist_y.append(list[i].y)
-                    min_x = min(sublist_x)
-                    max_x = max(sublist_x)
-                    min_y = min(sublist_y)
-                    max_y = max(sublist_y)
+                    min_x = list[:,0].min()
+                    max_x = list[:,0].max()
+                    min_y = list[:,1].min()
+                    max_y = list[:,1].max()
 
                     if min_x <= self.xi:
                         self.xi = min_x
@@ -990,7 +1602,7 @@ class runCase:
                 read_edgeNeighbour(self.p,self.eN) 
 
         def get_proc_faBoundary(self):          
-                read_proc_faBoundary(self.p, self.np, self.proc_fB)
+                read_proc_faBoundary(self.p, self.np, self.proc_fB, self.workers)
 
         def get_proc_nF(self):
                 read_proc_number_faces(self.p, self.np, self.proc_nF)
@@ -999,16 +1611,16 @@ class runCase:
                 read_proc_number_edges(self.p, self.np, self.proc_nE, self.proc_fB)
             
         def get_proc_ec(self):
-                read_ec_proc(self.p,self.proc_ec,self.np, self.proc_fB, self.proc_nE)
+                read_ec_proc(self.p,self.proc_ec,self.np, self.proc_fB, self.proc_nE, self.cache, self.workers)
 
         def get_proc_edgeaddr(self):          
-                read_proc_edgeaddr(self.p, self.np, self.proc_edgeaddr)
+                read_proc_edgeaddr(self.p, self.np, self.proc_edgeaddr, self.workers)
 
         def get_proc_faceaddr(self):          
-                read_proc_faceaddr(self.p, self.np, self.proc_faceaddr)
+                read_proc_faceaddr(self.p, self.np, self.proc_faceaddr, self.workers)
 
         def get_proc_edgeOwners(self):          
-                read_proc_edgeOwners(self.p, self.np, self.proc_edgeOwners)
+                read_proc_edgeOwners(self.p, self.np, self.proc_edgeOwners, self.workers)
 
         def get_parallel_data(self, report = True):
                 if self.np > 1 and ((self.Q_flag == 'on' or self.Q_flag == 'yes' or self.Q_flag == True) or (self.phi2s_flag == 'on' or self.phi2s_flag == 'yes' or self.phi2s_flag == True)):
@@ -1070,56 +1682,38 @@ class runCase:
                 self.clean_proc_dicts()                                                                                    
 
         def order_proc_faBoundary(self):
-                indexes_internal = []
+                indexes_internal = set()
                 for proc_key in self.proc_fB.keys():  
                     for patch_key in self.proc_fB[proc_key]['boundaries'].keys():
-                        for i in range(len(self.proc_fB[proc_key]['boundaries'][patch_key])):
-                            index = self.proc_fB[proc_key]['boundaries'][patch_key][i]            
+                        for index in self.proc_fB[proc_key]['boundaries'][patch_key]:
                             if self.proc_edgeaddr[proc_key][index] < self.nE['internal']:
-                                if not(self.proc_edgeaddr[proc_key][index] in indexes_internal):
-                                    indexes_internal.append(self.proc_edgeaddr[proc_key][index])                                    
-                indexes_internal.sort()
+                                indexes_internal.add(self.proc_edgeaddr[proc_key][index])
+                indexes_internal = sorted(indexes_internal)
                 
                 ec_dict = {}
-                ec_list1 = []
-                ec_list2 = []
-                for i in indexes_internal:
-                    ec_list1.append(i)
-                    ec_list2.append(self.ec['0'].iF.field[i])
-                ec_dict['internal'] = [ec_list1, ec_list2]
+                ec_dict['internal'] = [indexes_internal, self.ec['0'].iF.field[indexes_internal]]
                 ec_patch_dict = {}
                 for key in self.ec['0'].bF.d.keys():
-                    ec_patch_list1 = []
-                    ec_patch_list2 = []
-                    for i in range(len(self.ec['0'].bF.d[key]['value']['List'])):
-                        ec_patch_list1.append(self.fB['boundaries'][key][i])
-                        ec_patch_list2.append(self.ec['0'].bF.d[key]['value']['List'][i])
-                    ec_patch_dict[key] = [ec_patch_list1, ec_patch_list2]
+                    ec_patch_dict[key] = [self.fB['boundaries'][key], self.ec['0'].bF.d[key]['value']['List']]
                 ec_dict['boundary'] = ec_patch_dict
 
-                ec_proc_dict = {}
+                grids = {}
+                grids['internal'] = hash_points(ec_dict['internal'][1], self.tolerance)
+                for key in ec_dict['boundary'].keys():
+                    grids[key] = hash_points(ec_dict['boundary'][key][1], self.tolerance)
+                                            
                 for proc_key in self.proc_ec['0'].keys():
-                    patch_dict = {}
                     for patch_key in self.proc_ec['0'][proc_key].bF.d.keys():
-                        proc_patch_list1 = []
-                        proc_patch_list2 = []
-                        for i in range(len(self.proc_ec['0'][proc_key].bF.d[patch_key]['value']['List'])):
-                            index = self.proc_fB[proc_key]['boundaries'][patch_key][i]
-                            proc_patch_list1.append(index)
-                            proc_patch_list2.append(self.proc_ec['0'][proc_key].bF.d[patch_key]['value']['List'][i])
-                        patch_dict[patch_key] = [proc_patch_list1, proc_patch_list2]
-                    ec_proc_dict[proc_key] = patch_dict
-                                            
-                for key_proc in ec_proc_dict.keys():
-                    for key_patch in ec_proc_dict[key_proc].keys():
-                        if key_patch in ec_dict['boundary'].keys():
-                            for i in range(len(ec_proc_dict[key_proc][key_patch][0])):
-                                index = ec_dict['boundary'][key_patch][1].index(ec_proc_dict[key_proc][key_patch][1][i])
-                                self.proc_edgeaddr[key_proc][ec_proc_dict[key_proc][key_patch][0][i]] = ec_dict['boundary'][key_patch][0][index]
+                        if patch_key in ec_dict['boundary'].keys():
+                            [labels, points] = ec_dict['boundary'][patch_key]
+                            grid = grids[patch_key]
                         else:
-                            for i in range(len(ec_proc_dict[key_proc][key_patch][0])):
-                                index = ec_dict['internal'][1].index(ec_proc_dict[key_proc][key_patch][1][i])
-                                self.proc_edgeaddr[key_proc][ec_proc_dict[key_proc][key_patch][0][i]] = ec_dict['internal'][0][index]
+                            [labels, points] = ec_dict['internal']
+                            grid = grids['internal']
+                        targets = self.proc_ec['0'][proc_key].bF.d[patch_key]['value']['List']
+                        indexes = find_points(grid, points, targets, self.tolerance)
+                        for i in range(len(indexes)):
+                            self.proc_edgeaddr[proc_key][self.proc_fB[proc_key]['boundaries'][patch_key][i]] = labels[indexes[i]]
 
 #Here only the edgeOwners related to the patches of type 'processor' are corrected. The reason is that correcting the others is complicated
 #The truth is that the edgeOwners of all the boundaries are wrong, but here only a few are used //AG                               
@@ -1137,35 +1731,67 @@ class runCase:
                                     proc_owner = self.proc_faceaddr[proc_key].index(ngb)
                                 self.proc_edgeOwners[proc_key][self.proc_fB[proc_key]['boundaries'][patch_key][i]] = proc_owner
                     
+#With the decomposed option the fields of the times are not read from a reconstructed case but from the processor directories. They are reconstructed
+#in memory by the runCase of Par_reconstructPar, so no reconstructed time directory is written to the disk. //AG
+        def get_decomposed(self, name, time, output):
+                if self.rec == None:
+                    import Par_reconstructPar
+                    self.rec = Par_reconstructPar.runCase(self.p, self.h_flag, self.Cv_flag, self.deltaz0_flag, self.Us_flag, self.Q_flag, self.pb_flag, self.tau_flag, self.phi2s_flag, 0, self.workers, tolerance = self.tolerance)
+                field = self.rec.reconstruct_field(name, time)
+                dict_iF = {}
+                dict_iF['field'] = field.iF.field
+                dict_iF['u'] = field.iF.u
+                internalfield = internalField(dict_iF, field.ty, 0, False)
+                boundaryfield = boundaryField(field.bF.d, field.ty, {}, False)
+                output[str(time)] = areaField(field.ty, internalfield, boundaryfield, dimensions([field.dim.List()]))
+
         def get_h(self, report = True, time = -1):                
                 if (self.h_flag == 'on' or self.h_flag == 'yes' or self.h_flag == True):
                     if report == True:
                         print('Reading h field ...')
                     if time == -1:
-                        for t in self.t:
-                            read_h(self.p, t, self.h,self.nF, self.fB)
+                        for t in self.h.preload():
+                            if self.decomposed == True:
+                                self.get_decomposed('h', t, self.h)
+                            else:
+                                read_h(self.p, t, self.h,self.nF, self.fB, self.cache, self.boundary)
                     else:
-                        read_h(self.p, time, self.h,self.nF, self.fB)
+                        if self.decomposed == True:
+                            self.get_decomposed('h', time, self.h)
+                        else:
+                            read_h(self.p, time, self.h,self.nF, self.fB, self.cache, self.boundary)
                                             
         def get_pb(self, report = True, time = -1):                
                 if (self.pb_flag == 'on' or self.pb_flag == 'yes' or self.pb_flag == True):
                     if report == True:
                         print('Reading pb field ...')
                     if time == -1:
-                        for t in self.t:
-                            read_pb(self.p, t, self.pb,self.nF, self.fB)
+                        for t in self.pb.preload():
+                            if self.decomposed == True:
+                                self.get_decomposed('pb', t, self.pb)
+                            else:
+                                read_pb(self.p, t, self.pb,self.nF, self.fB, self.cache, self.boundary)
                     else:
-                        read_pb(self.p, time, self.pb,self.nF, self.fB)
+                        if self.decomposed == True:
+                            self.get_decomposed('pb', time, self.pb)
+                        else:
+                            read_pb(self.p, time, self.pb,self.nF, self.fB, self.cache, self.boundary)
 
         def get_Cv(self, report = True, time = -1):               
                 if (self.Cv_flag == 'on' or self.Cv_flag == 'yes' or self.Cv_flag == True):
                     if report == True:
                         print('Reading Cv field ...')
                     if time == -1:
-                        for t in self.t:
-                            read_Cv(self.p, t, self.Cv,self.nF, self.fB)
+                        for t in self.Cv.preload():
+                            if self.decomposed == True:
+                                self.get_decomposed('Cv', t, self.Cv)
+                            else:
+                                read_Cv(self.p, t, self.Cv,self.nF, self.fB, self.cache, self.boundary)
                     else:
-                        read_Cv(self.p, time, self.Cv,self.nF, self.fB)
+                        if self.decomposed == True:
+                            self.get_decomposed('Cv', time, self.Cv)
+                        else:
+                            read_Cv(self.p, time, self.Cv,self.nF, self.fB, self.cache, self.boundary)
 
         def get_deltaz0(self, report = True, time = -1):
                 if (self.deltaz0_flag == 'on' or self.deltaz0_flag == 'yes' or self.deltaz0_flag == True):
@@ -1183,31 +1809,49 @@ class runCase:
                     if report == True:
                         print('Reading deltah0 field ...')
                     if time == -1:
-                        for t in self.t:
-                            read_deltah0(self.p, t, self.deltah0,self.nF, self.fB)
+                        for t in self.deltah0.preload():
+                            if self.decomposed == True:
+                                self.get_decomposed('deltah0', t, self.deltah0)
+                            else:
+                                read_deltah0(self.p, t, self.deltah0,self.nF, self.fB, self.cache, self.boundary)
                     else:
-                        read_deltah0(self.p, time, self.deltah0,self.nF, self.fB)
+                        if self.decomposed == True:
+                            self.get_decomposed('deltah0', time, self.deltah0)
+                        else:
+                            read_deltah0(self.p, time, self.deltah0,self.nF, self.fB, self.cache, self.boundary)
 
         def get_deltac0(self, report = True, time = -1):                
                 if (self.deltaz0_flag == 'on' or self.deltaz0_flag == 'yes' or self.deltaz0_flag == True):
                     if report == True:
                         print('Reading deltac0 field ...')
                     if time == -1:
-                        for t in self.t:
-                            read_deltac0(self.p, t, self.deltac0,self.nF, self.fB)
+                        for t in self.deltac0.preload():
+                            if self.decomposed == True:
+                                self.get_decomposed('deltac0', t, self.deltac0)
+                            else:
+                                read_deltac0(self.p, t, self.deltac0,self.nF, self.fB, self.cache, self.boundary)
                     else:
-                        read_deltac0(self.p, time, self.deltac0,self.nF, self.fB)
+                        if self.decomposed == True:
+                            self.get_decomposed('deltac0', time, self.deltac0)
+                        else:
+                            read_deltac0(self.p, time, self.deltac0,self.nF, self.fB, self.cache, self.boundary)
 
         def get_Us(self, report = True, time = -1):                
                 if (self.Us_flag == 'on' or self.Us_flag == 'yes' or self.Us_flag == True):
                     if report == True:
                         print('Reading Us field ...')
                     if time == -1:
-                        for t in self.t:
-                            read_Us(self.p, t, self.Us,self.nF, self.fB)
-                        self.check_h_U_values(False)
+                        for t in self.Us.preload():
+                            if self.decomposed == True:
+                                self.get_decomposed('Us', t, self.Us)
+                            else:
+                                read_Us(self.p, t, self.Us,self.nF, self.fB, self.cache, self.boundary)
+                            self.check_h_U_values(False, t)
                     else:
-                        read_Us(self.p, time, self.Us,self.nF, self.fB)
+                        if self.decomposed == True:
+                            self.get_decomposed('Us', time, self.Us)
+                        else:
+                            read_Us(self.p, time, self.Us,self.nF, self.fB, self.cache, self.boundary)
                         self.check_h_U_values(False, time)
                                 
         def get_tau(self, report = True, time = -1):                
@@ -1215,34 +1859,56 @@ class runCase:
                     if report == True:
                         print('Reading tau field ...')
                     if time == -1:
-                        for t in self.t:
-                            read_tau(self.p, t, self.tau,self.nF, self.fB)
+                        for t in self.tau.preload():
+                            if self.decomposed == True:
+                                self.get_decomposed('tau', t, self.tau)
+                            else:
+                                read_tau(self.p, t, self.tau,self.nF, self.fB, self.cache, self.boundary)
                     else:
-                        read_tau(self.p, time, self.tau,self.nF, self.fB)
+                        if self.decomposed == True:
+                            self.get_decomposed('tau', time, self.tau)
+                        else:
+                            read_tau(self.p, time, self.tau,self.nF, self.fB, self.cache, self.boundary)
 
         def get_Q(self, report = True, time = -1):               
                 if (self.Q_flag == 'on' or self.Q_flag == 'yes' or self.Q_flag == True):
                     if report == True:
                         print('Reading Q field ...')
                     if time == -1:
-                        for t in self.t:
-                            read_Q(self.p, t, self.Q, self.nE['internal'], self.fB)
+                        for t in self.Q.preload():
+                            if self.decomposed == True:
+                                self.get_decomposed('Q', t, self.Q)
+                            else:
+                                read_Q(self.p, t, self.Q, self.nE['internal'], self.fB, self.cache)
+                            if self.np>1:
+                                self.correct_parallel_Q(False, t)
                     else:
-                        read_Q(self.p, time, self.Q, self.nE['internal'], self.fB)
-                    if self.np>1:
-                        self.correct_parallel_Q(False, time)
+                        if self.decomposed == True:
+                            self.get_decomposed('Q', time, self.Q)
+                        else:
+                            read_Q(self.p, time, self.Q, self.nE['internal'], self.fB, self.cache)
+                        if self.np>1:
+                            self.correct_parallel_Q(False, time)
 
         def get_phi2s(self, report = True, time = -1):                
                 if (self.phi2s_flag == 'on' or self.phi2s_flag == 'yes' or self.phi2s_flag == True):
                     if report == True:
                         print('Reading phi2s field ...')
                     if time == -1:
-                        for t in self.t:
-                            read_phi2s(self.p, t, self.phi2s, self.nE['internal'], self.fB)
+                        for t in self.phi2s.preload():
+                            if self.decomposed == True:
+                                self.get_decomposed('phi2s', t, self.phi2s)
+                            else:
+                                read_phi2s(self.p, t, self.phi2s, self.nE['internal'], self.fB, self.cache)
+                            if self.np>1:
+                                self.correct_parallel_phi2s(False, t)
                     else:
-                        read_phi2s(self.p, time, self.phi2s, self.nE['internal'], self.fB)
-                    if self.np>1:
-                        self.correct_parallel_phi2s(False, time)
+                        if self.decomposed == True:
+                            self.get_decomposed('phi2s', time, self.phi2s)
+                        else:
+                            read_phi2s(self.p, time, self.phi2s, self.nE['internal'], self.fB, self.cache)
+                        if self.np>1:
+                            self.correct_parallel_phi2s(False, time)
                   
         def get_c(self, report = True, time = -1):
                 if report == True:
@@ -1250,11 +1916,11 @@ class runCase:
                 if (self.c_flag == 'on' or self.c_flag == 'yes' or self.c_flag == True):
                     if time == -1:
                         for t in self.t:
-                            read_c(self.p, t, self.c,self.nF, self.fB)
+                            read_c(self.p, t, self.c,self.nF, self.fB, self.cache, self.boundary)
                     else:
-                        read_c(self.p, time, self.c,self.nF, self.fB)
+                        read_c(self.p, time, self.c,self.nF, self.fB, self.cache, self.boundary)
                 else:    
-                    read_c(self.p,'0',self.c,self.nF, self.fB)
+                    read_c(self.p,'0',self.c,self.nF, self.fB, self.cache, self.boundary)
 
         def get_n(self, report = True, time = -1):
                 if report == True:
@@ -1262,11 +1928,11 @@ class runCase:
                 if (self.n_flag == 'on' or self.n_flag == 'yes' or self.n_flag == True):
                     if time == -1:
                         for t in self.t:
-                            read_n(self.p, t, self.n,self.nF, self.fB)
+                            read_n(self.p, t, self.n,self.nF, self.fB, self.cache, self.boundary)
                     else:
-                        read_n(self.p, time, self.n,self.nF, self.fB)
+                        read_n(self.p, time, self.n,self.nF, self.fB, self.cache, self.boundary)
                 else:    
-                    read_n(self.p,'0',self.n,self.nF, self.fB)
+                    read_n(self.p,'0',self.n,self.nF, self.fB, self.cache, self.boundary)
 
         def get_he(self, report = True, time = -1):
                 if report == True:
@@ -1274,11 +1940,11 @@ class runCase:
                 if (self.he_flag == 'on' or self.he_flag == 'yes' or self.he_flag == True):
                     if time == -1:
                         for t in self.t:
-                            read_he(self.p, t, self.he,self.nF, self.fB)
+                            read_he(self.p, t, self.he,self.nF, self.fB, self.cache, self.boundary)
                     else:
-                        read_he(self.p, time, self.he,self.nF, self.fB)
+                        read_he(self.p, time, self.he,self.nF, self.fB, self.cache, self.boundary)
                 else:
-                    read_he(self.p,'0',self.he,self.nF, self.fB)
+                    read_he(self.p,'0',self.he,self.nF, self.fB, self.cache, self.boundary)
  
         def get_A(self, report = True, time = -1):
                 if report == True:
@@ -1286,11 +1952,11 @@ class runCase:
                 if (self.A_flag == 'on' or self.A_flag == 'yes' or self.A_flag == True):
                     if time == -1:
                         for t in self.t:
-                            read_A(self.p, t, self.A,self.nF, self.fB)
+                            read_A(self.p, t, self.A,self.nF, self.fB, self.cache, self.boundary)
                     else:
-                        read_A(self.p, time, self.A,self.nF, self.fB)
+                        read_A(self.p, time, self.A,self.nF, self.fB, self.cache, self.boundary)
                 else:
-                    read_A(self.p,'0',self.A,self.nF, self.fB)
+                    read_A(self.p,'0',self.A,self.nF, self.fB, self.cache, self.boundary)
                                               
         def check_h_U_values(self, report = True, time = -1):
                 if (self.h_flag == 'on' or self.h_flag == 'yes' or self.h_flag == True) and (self.Us_flag == 'on' or self.Us_flag == 'yes' or self.Us_flag == True):
@@ -1307,10 +1973,8 @@ class runCase:
         def correct_h_U_values(self, time):
                 if (str(time) in self.h.keys()) == False:
                     self.get_h(False, time)
-                h = self.h[str(time)].iF.field
-                for i in range(len(h)):
-                    if h[i]<= self.hmin*10:
-                        self.Us[str(time)].iF.field[i] = vector(0,0,0)            
+                h = np.asarray(self.h[str(time)].iF.field)
+                self.Us[str(time)].iF.field[:len(h)][h <= self.hmin*10] = 0
                          
         def correct_parallel_Q(self, report = True, time = -1):
                 if (self.Q_flag == 'on' or self.Q_flag == 'yes' or self.Q_flag == True):
@@ -1586,6 +2250,68 @@ def write_vector(l, fi, key, lvl):
 
            
 #This class needs as input a runCase object, which has all the functions to read inputs. Class output performs all the calculations and write the results. //AG             
+class faMesh: #mesh topology in CSR form: the points of the face i are point_labels[point_offsets[i]:point_offsets[i+1]] and its edges edge_labels[edge_offsets[i]:edge_offsets[i+1]]
+        def __init__(self, point_offsets, point_labels, points, owner, neighbour, edge_offsets = [], edge_labels = []):
+                self.point_offsets = np.asarray(point_offsets, dtype=np.int64)
+                self.point_labels = np.asarray(point_labels, dtype=np.int64)
+                self.points = np.asarray(points, dtype=np.float64).reshape(-1,3)
+                self.owner = np.asarray(owner, dtype=np.int64)
+                self.neighbour = np.asarray(neighbour, dtype=np.int64)
+                self.nF = len(self.point_offsets)-1
+                if len(edge_offsets) == 0:
+                    self.get_edge_faces()
+                else:
+                    self.edge_offsets = np.asarray(edge_offsets, dtype=np.int64)
+                    self.edge_labels = np.asarray(edge_labels, dtype=np.int64)
+
+        def get_edge_faces(self): #the edges of every face, first the edges it owns and then its neighbour edges, as they appear in edgeOwner and edgeNeighbour
+                faces = np.concatenate((self.owner, self.neighbour))
+                edges = np.concatenate((np.arange(len(self.owner)), np.arange(len(self.neighbour))))
+                order = np.argsort(faces, kind='stable')
+                self.edge_labels = edges[order]
+                self.edge_offsets = np.zeros(self.nF+1, dtype=np.int64)
+                self.edge_offsets[1:] = np.cumsum(np.bincount(faces, minlength=self.nF))
+
+        def order_edges(self, ec): #the edges of every face are ordered, now the labels follow the order of the face points
+                sizes = np.diff(self.edge_offsets)
+                for n in np.unique(sizes).tolist(): #faces are grouped by their number of edges, so every group is ordered at once
+                    faces = np.flatnonzero(sizes == n)
+                    points = self.points[self.point_labels[self.point_offsets[faces][:,None]+np.arange(n)]]
+                    index_e = self.edge_offsets[faces][:,None]+np.arange(n)
+                    edges = self.edge_labels[index_e]
+                    mid = (points+np.roll(points,-1,axis=1))/2
+                    e = ec[edges]
+                    dist = np.round(np.sqrt((mid[:,:,None,0]-e[:,None,:,0])**2+(mid[:,:,None,1]-e[:,None,:,1])**2),6)
+                    index = n-1-np.argmin(dist[:,:,::-1], axis=2) #the last closest edge, as in the original loop
+                    index[:,-1] = np.argmin(dist[:,-1,:], axis=1) #the first closest edge for the closing edge of the face
+                    self.edge_labels[index_e] = np.take_along_axis(edges, index, axis=1)
+
+        def face_points(self, i): #(n,3) array with the points of the face i
+                return self.points[self.point_labels[self.point_offsets[i]:self.point_offsets[i+1]]]
+
+        def face_edges(self, i):
+                return self.edge_labels[self.edge_offsets[i]:self.edge_offsets[i+1]].tolist()
+
+        def is_neighbour(self, i1, i2): #two faces are neighbours if they share an edge
+                return len(set(self.face_edges(i1)) & set(self.face_edges(i2))) > 0
+
+        def save(self, path, source):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'wb') as f:
+                    np.savez(f, point_offsets=self.point_offsets, point_labels=self.point_labels, points=self.points, owner=self.owner, neighbour=self.neighbour, edge_offsets=self.edge_offsets, edge_labels=self.edge_labels, source=np.array(source, dtype=np.int64))
+
+def mesh_source(path): #the mesh files the faMesh is built from
+    return [source_stat(path+'/0/'+file) for file in ['faFaces','faPoints','edgeOwner','edgeNeighbour','ec']]
+
+def read_faMesh_cache(path, source): #the faMesh saved with the case, None if there is none or the mesh files have changed
+    file = cache_path(path, '0/faMesh.npz')
+    if os.path.exists(file) == False:
+        return None
+    with np.load(file) as data:
+        if np.array_equal(data['source'], np.array(source, dtype=np.int64)) == False:
+            return None
+        return faMesh(data['point_offsets'], data['point_labels'], data['points'], data['owner'], data['neighbour'], data['edge_offsets'], data['edge_labels'])
+
 class outPut:
         def __init__(self,runCase,d_x,d_y,r_x,r_y,alpha=0,n_iterations=0,alpha_field=0,n_iterations_field=0,dist =0,n_tp=100,rank=0,Sm='off',rho='off',rcg='off',M='off',Vsed ='off',V='off'):
                 self.r  = runCase
@@ -1598,9 +2324,7 @@ class outPut:
                 self.t  = runCase.t
                 self.p  = runCase.p #path
                 
-                self.face_points = []  #for every face we have the points that form it
-                self.edge_faces  = []  #for every face we have the edges that form it
-                self.face_neighbour = []  #for every face we have its neighbors
+                self.mesh = None  #faMesh, for every face the points and the edges that form it
                 self.edges_sense = {}  #defined to deal with the sign problem with Q and phi2s for parallel simulations in the patches type processor.
                 self.edges_list  = {}  #defined to deal with the sign problem with Q and phi2s for parallel simulations in the patches type processor.
                 
@@ -1645,7 +2369,8 @@ class outPut:
                 self.n_tp = n_tp
 
                 self.rank = rank
-                self.t_size = []
+                self.t_rank = []  #times written by this rank when running in parallel
+                self.t_busy = 0  #seconds spent writing them
                 
                 self.Sm_flag  = Sm
                 self.rho_flag = rho
@@ -1663,25 +2388,19 @@ class outPut:
                 self.get_transversal_profiles(dist)
                 self.get_tp_index_matrix()
                 self.get_tp_alpha_matrix()                              
-                self.get_face_points()
-                self.get_edge_faces()
-                self.get_edges()
-                self.get_face_neighbour()
+                self.get_mesh()
                 self.get_scalar_flux_edges()
 
 ##########################################  main functions  ##############################################################
 
         def order_c(self,c_x,c_y):
-                list = []
-                for c in self.r.c['0'].iF.field:
-                    list.append(c.List())
-                for i in range(len(list)):
-                    list[i].append(i)
-                list_x= sorted(list,key=itemgetter(0))
-                list_y= sorted(list,key=itemgetter(1))
-                for i in range(len(list)):
-                    c_x.append([list_x[i][0],list_x[i][3]])
-                    c_y.append([list_y[i][1],list_y[i][3]])
+                c = self.r.c['0'].iF.field
+                index_x = np.argsort(c[:,0], kind='stable')
+                index_y = np.argsort(c[:,1], kind='stable')
+                for x, i in zip(c[index_x,0].tolist(), index_x.tolist()):
+                    c_x.append([x,i])
+                for y, i in zip(c[index_y,1].tolist(), index_y.tolist()):
+                    c_y.append([y,i])
                     
         def correct_xy(self, r_x, r_y, c_x, c_y):
                 break_x = False
@@ -1701,8 +2420,8 @@ class outPut:
         def get_index_matrix(self, r_x, r_y): #the result is a matrix with the labels of the nearer faces to every (x,y) coordinate
                 if self.rank == 0:
                     print('Creating index matrix ...')
-                if self.r.c == {}:
-                    self.r.get_c(False)                                
+                if ('0' in self.r.c.keys()) == False:
+                    self.r.get_c(False, 0)                                
                 c_x= []; c_y = []
                 self.order_c(c_x,c_y)
                 list_x = []; list_y = []
@@ -1726,36 +2445,63 @@ class outPut:
         def get_alpha_matrix(self): #Generates a matrix which elements are list object, each one with an alpha<1 value.
                 if self.rank == 0:
                     print('Creating alpha matrix ...')                
+                self.get_index_arrays()
+                c = self.r.c['0'].iF.field
+                x = self.x[self.cell_array//len(self.y)]
+                y = self.y[self.cell_array%len(self.y)]
+                w = (1/(distxy_array(x,y,c[self.index_array])+10**-6))**2
+                l = np.bincount(self.cell_array, weights=w, minlength=len(self.x)*len(self.y))
+                self.alpha_array = w/l[self.cell_array]
+                alpha_list = self.alpha_array.tolist()
+                k = 0
                 for i in range(len(self.x)):
                     list = []
                     for j in range(len(self.y)):
-                        sublist = []
-                        l = 0
-                        v1 = vector(self.x[i],self.y[j],0)
-                        for index in self.index_matrix[i][j]:
-                            l += (1/(distxy(v1,self.r.c['0'].iF.field[index])+10**-6))**2
-                        for index in self.index_matrix[i][j]:
-                            alpha = ((1/(distxy(v1,self.r.c['0'].iF.field[index])+10**-6))**2)/l
-                            sublist.append(alpha)
-                        list.append(sublist)  
+                        n = len(self.index_matrix[i][j])
+                        list.append(alpha_list[k:k+n])
+                        k += n
                     self.alpha_matrix.append(list)
+
+        def get_index_arrays(self): #flattens index_matrix, so a field can be interpolated with a single bincount
+                index_list = []
+                cell_list = []
+                for i in range(len(self.x)):
+                    for j in range(len(self.y)):
+                        index_list += self.index_matrix[i][j]
+                        cell_list += [i*len(self.y)+j]*len(self.index_matrix[i][j])
+                self.index_array = np.array(index_list, dtype=np.int64)
+                self.cell_array = np.array(cell_list, dtype=np.int64)
+
+        def get_index_lists(self): #index_matrix and alpha_matrix rebuilt from index_array, cell_array and alpha_array
+                counts = np.bincount(self.cell_array, minlength=len(self.x)*len(self.y)).tolist()
+                index_list = self.index_array.tolist()
+                alpha_list = self.alpha_array.tolist()
+                self.index_matrix = []
+                self.alpha_matrix = []
+                k = 0
+                for i in range(len(self.x)):
+                    sublist_index = []
+                    sublist_alpha = []
+                    for j in range(len(self.y)):
+                        n = counts[i*len(self.y)+j]
+                        sublist_index.append(index_list[k:k+n])
+                        sublist_alpha.append(alpha_list[k:k+n])
+                        k += n
+                    self.index_matrix.append(sublist_index)
+                    self.alpha_matrix.append(sublist_alpha)
+
+        def interpolate(self, values): #values is a numpy array with one value per face
+                field = np.bincount(self.cell_array, weights=values[self.index_array]*self.alpha_array, minlength=len(self.x)*len(self.y))
+                return field.reshape((len(self.x),len(self.y)))
                                     
         def get_z_interpolation(self): #calculate the z-matrix
                 if self.rank == 0:
                     print('Creating z interpolation ...')
                 max_z = -math.inf
-                z = np.zeros((len(self.x),len(self.y)))
-                for i in range(len(self.x)):
-                    for j in range(len(self.y)):                        
-                        for k in range(len(self.index_matrix[i][j])):
-                            index = self.index_matrix[i][j][k]
-                            z[i,j] += self.r.c['0'].iF.field[index].z*self.alpha_matrix[i][j][k]
-                        if z[i,j] != 0:
-                            max_z = max(max_z, z[i,j])
-                for i in range(len(self.x)):
-                    for j in range(len(self.y)):                        
-                        if z[i,j] == 0:
-                            z[i,j] = max_z
+                z = self.interpolate(self.r.c['0'].iF.field[:,2])
+                if (z != 0).any():
+                    max_z = z[z != 0].max()
+                z[z == 0] = max_z
                             
                 self.z = np.zeros((len(self.x),len(self.y)))
                 surface_smoother(z,self.z,self.alpha,self.niter) #smooth the z-matrix using the values in the neighbors N/S/E/W
@@ -1763,23 +2509,18 @@ class outPut:
         def get_he_interpolation(self, report = True):
                 if report == True:
                     print('Creating he interpolation ...')
-                if self.r.he == {}:
-                    self.r.get_he(False)                    
+                if ('0' in self.r.he.keys()) == False: #he is an input of time 0, read even if the time selection leaves 0 out
+                    self.r.get_he(False, 0)
                 self.he = np.zeros((len(self.x),len(self.y)))
                 self.get_scalarinput_interpolation(self.r.he, self.r.get_he, self.he, self.alphafield, self.niterfield, 0)
                             
         def get_nz_interpolation(self): #calculate the nz-matrix
                 if self.rank == 0:
                     print('Creating nz interpolation ...')
-                if self.r.n == {}:
-                    self.r.get_n(False)
+                if ('0' in self.r.n.keys()) == False:
+                    self.r.get_n(False, 0)
                 self.n0 = self.r.n['0'].iF.field
-                nz = np.zeros((len(self.x),len(self.y)))
-                for i in range(len(self.x)):
-                    for j in range(len(self.y)):                        
-                        for k in range(len(self.index_matrix[i][j])):
-                            index = self.index_matrix[i][j][k]
-                            nz[i,j] += -self.n0[index].List()[2]*self.alpha_matrix[i][j][k]
+                nz = self.interpolate(-self.n0[:,2])
                 
                 self.nz = np.zeros((len(self.x),len(self.y)))
                 surface_smoother(nz,self.nz,self.alpha,self.niter) #smooth the nz-matrix using the values in the neighbors N/S/E/W
@@ -1930,6 +2671,7 @@ class outPut:
                 if self.r.lp_name != '':
                     if self.rank == 0:
                         print('Creating transversal profiles alpha matrix ...') 
+                    c = self.r.c['0'].iF.field
                     for key in self.tp.keys():
                         tp = self.tp[key]
                         tp_alpha_matrix = []
@@ -1938,109 +2680,42 @@ class outPut:
                             for j in range(self.n_tp+1):
                                 list = []
                                 v = tp[i][j]
-                                l = 0
-                                for index in self.tp_index_matrix[key][i][j]:
-                                    l += (1/(distxy(v,self.r.c['0'].iF.field[index])+10**-6))**2
-                                k = 0
-                                while True:
-                                    index = self.tp_index_matrix[key][i][j][k]
-                                    alpha = ((1/(distxy(v,self.r.c['0'].iF.field[index])+10**-6))**2)/l
-                                    if alpha < 0.01:
-                                        pop = self.tp_index_matrix[key][i][j].pop(k)
-                                    else:
-                                        k += 1
-                                    if k == len(self.tp_index_matrix[key][i][j]):
-                                        break
-                                l = 0
-                                for index in self.tp_index_matrix[key][i][j]:
-                                    l += (1/(distxy(v,self.r.c['0'].iF.field[index])+10**-6))**2                                
-                                for index in self.tp_index_matrix[key][i][j]:
-                                    alpha = ((1/(distxy(v,self.r.c['0'].iF.field[index])+10**-6))**2)/l                                    
-                                    list.append(round(alpha,6))                             
+                                index = np.array(self.tp_index_matrix[key][i][j])
+                                w = (1/(distxy_array(v.x,v.y,c[index])+10**-6))**2
+                                keep = w/w.sum() >= 0.01
+                                self.tp_index_matrix[key][i][j] = index[keep].tolist()
+                                w = w[keep]
+                                for alpha in (w/w.sum()).tolist():
+                                    list.append(round(alpha,6))
                                 sub_index.append(list)
                             tp_alpha_matrix.append(sub_index)
                         
                         self.tp_alpha_matrix[key] = tp_alpha_matrix   
 
-        def get_face_points(self): #for very face we have a list with the points that form it
+        def get_mesh(self): #creates self.mesh. With the runCase cache it is saved with the case and only built again when the mesh files change
                 if self.rank == 0:
-                    print('Creating face-points list ...')
-                if self.r.faces == {}:
-                    self.r.get_faces(False)
-                if self.r.points == {}:
-                    self.r.get_points(False)
-                for i in range(self.r.nF):
-                    List = self.r.faces['faces'][i]
-                    subList = []
-                    for j in range(len(List)):
-                        p = self.r.points['points'][List[j]]
-                        subList.append(vector(p[0],p[1],p[2]))
-                    self.face_points.append(subList)
-                    
+                    print('Creating mesh topology ...')
+                source = mesh_source(self.p)
+                if self.r.cache == True:
+                    self.mesh = read_faMesh_cache(self.p, source)
+                if self.mesh == None:
+                    if self.r.faces == {}:
+                        self.r.get_faces(False)
+                    if self.r.points == {}:
+                        self.r.get_points(False)
+                    if self.r.eO == {}:
+                        self.r.get_edgeOwner(False)
+                    if self.r.eN == {}:
+                        self.r.get_edgeNeighbour(False)
+                    if self.r.ec == {}:
+                        self.r.get_ec(False)
+                    self.mesh = faMesh(self.r.faces['offsets'], self.r.faces['labels'], self.r.points['points'], self.r.eO['edges'], self.r.eN['edges'])
+                    self.mesh.order_edges(self.r.ec['0'].iF.field)
+                    if self.r.cache == True:
+                        self.mesh.save(cache_path(self.p, '0/faMesh.npz'), source)
                 self.r.clean_faces()
                 self.r.clean_points()
-                
-        def get_edge_faces(self): #for very face we have a list with the edges that form it
-                if self.rank == 0:
-                    print('Creating edge-faces list ...')
-                if self.r.eO == {}:
-                    self.r.get_edgeOwner(False)
-                if self.r.eN == {}:
-                    self.r.get_edgeNeighbour(False)                
-                for i in range(self.r.nF):
-                    self.edge_faces.append([])
-                list_eO = self.r.eO['edges']
-                list_eN = self.r.eN['edges']
-                for k in range(len(list_eO)):
-                    index = int(list_eO[k])
-                    self.edge_faces[index].append(k)
-                for k in range(len(list_eN)):
-                    index = int(list_eN[k])
-                    self.edge_faces[index].append(k)
-                                        
-        def get_edges(self): #creates self.ec, which is a list of vectors. For every edge one vector, including the boundary edges.
-                if self.rank == 0:    
-                    print('Creating ordered list of edges ...')
-                if self.r.ec == {}:
-                    self.r.get_ec(False)
-                self.order_edges(self.r.ec['0'].iF.field)
                 self.r.clean_ec()
-                
-        def order_edges(self, ec): #order self.edge_faces, now the labels follow the order of face_points
-                for i in range(len(self.edge_faces)):
-                    list = []
-                    for j in range(len(self.edge_faces[i])-1):
-                        point = (self.face_points[i][j]+self.face_points[i][j+1])/2
-                        dist = 10**6
-                        for k in range(len(self.edge_faces[i])):
-                            if distxy(point,ec[self.edge_faces[i][k]]) <= dist:
-                                dist = distxy(point,ec[self.edge_faces[i][k]])
-                                index = self.edge_faces[i][k]
-                        list.append(index)
-                        
-                    point = (self.face_points[i][-1]+self.face_points[i][0])/2
-                    dist = 10**6
-                    for k in range(len(self.edge_faces[i])):
-                        if distxy(point,ec[self.edge_faces[i][k]]) < dist:
-                            dist = distxy(point,ec[self.edge_faces[i][k]])
-                            index = self.edge_faces[i][k]
-                    list.append(index)
-                    self.edge_faces[i] = list
-                    
-        def get_face_neighbour(self): #creates a list of lists, where every list have the labels of the neighbour faces
-                if self.rank == 0:    
-                    print('Creating face neighbours list ...')
-                if self.r.eO == {}:
-                    self.r.get_edgeOwner(False)
-                if self.r.eN == {}:
-                    self.r.get_edgeNeighbour(False)                
-                for i in range(self.r.nF):
-                    self.face_neighbour.append([])                
-                list_eO = self.r.eO['edges']
-                list_eN = self.r.eN['edges']
-                for k in range(len(list_eN)):
-                    self.face_neighbour[int(list_eO[k])].append(int(list_eN[k]))
-                    self.face_neighbour[int(list_eN[k])].append(int(list_eO[k]))
 
         def get_scalar_flux_edges(self):
                 if self.r.lp_name != '':
@@ -2049,11 +2724,6 @@ class outPut:
                             print('Calculating edges in flux-transversal profiles ...')            
                         points = self.get_points_tps()
                         dx = math.sqrt(4/math.pi*(self.x[-1]-self.x[0])*(self.y[-1]-self.y[0])/self.r.nF)
-        
-                        if self.r.eO == {}:
-                            self.r.get_edgeOwner(False)
-                        if self.r.eN == {}:
-                            self.r.get_edgeNeighbour(False) 
                         
                         for key in points.keys():
                             edges_sense_list = []
@@ -2371,25 +3041,15 @@ class outPut:
                             output_field[i,j] = round(vector(vector_field[i,j,0],vector_field[i,j,1],vector_field[i,j,2]).mag(),3)
                     
         def get_scalar_field_tpinterpolation(self, field, output_field, key, ix = -1):
+                values = np.asarray(field.iF.field, dtype=np.float64)
+                if ix != -1:
+                    values = values[:,ix]
                 for i in range(output_field.shape[0]):
                     for j in range(output_field.shape[1]):
-                        value = 0
-                        if ix == -1:
-                            if field.iF.u == 'nonuniform':
-                                for k in range(len(self.tp_index_matrix[key][i][j])):
-                                    index = self.tp_index_matrix[key][i][j][k]
-                                    alpha = self.tp_alpha_matrix[key][i][j][k]                                
-                                    value += field.iF.field[index]*alpha
-                            else:
-                                value = field.iF.field[0]
+                        if field.iF.u == 'nonuniform':
+                            value = np.dot(values[self.tp_index_matrix[key][i][j]], self.tp_alpha_matrix[key][i][j])
                         else:
-                            if field.iF.u == 'nonuniform':
-                                for k in range(len(self.tp_index_matrix[key][i][j])):
-                                    index = self.tp_index_matrix[key][i][j][k]
-                                    alpha = self.tp_alpha_matrix[key][i][j][k]
-                                    value += field.iF.field[index].List()[ix]*alpha
-                            else:
-                                value = field.iF.field[0].List()[ix]
+                            value = values[0]
                         output_field[i,j] = round(value,6)
 
         def get_z_tpinterpolation(self, report = True):
@@ -2407,8 +3067,8 @@ class outPut:
                     if (self.r.h_flag == 'on' or self.r.h_flag == 'yes' or self.r.h_flag == True):
                         if report == True:
                             print('Interpolating he field in transversal profiles ...')
-                        if self.r.he == {}:
-                            self.r.get_he(False)                          
+                        if ('0' in self.r.he.keys()) == False:
+                            self.r.get_he(False, 0)
                         for key in self.tp.keys():
                             he_tp = np.zeros((len(self.tp[key]),self.n_tp+1)) 
                             self.get_scalarinput_tpinterpolation(self.r.he, he_tp, key, 0)
@@ -2723,19 +3383,18 @@ class outPut:
                     if runCase_field == {}:
                         runCase_func(False) 
                     for t in range(len(self.t)):
-                        self.get_scalar_field_interpolation(runCase_field,outPut_field[t,:,:],t,alpha,n_iterations)
+                        self.get_scalar_field_interpolation(runCase_field,outPut_field[t,:,:],self.t[t],alpha,n_iterations)
                 else:
                     if (str(time) in runCase_field.keys()) == False:
                         runCase_func(False, time)
-                    t = self.t.index(time)
-                    self.get_scalar_field_interpolation(runCase_field,outPut_field,t,alpha,n_iterations)
+                    self.get_scalar_field_interpolation(runCase_field,outPut_field,time,alpha,n_iterations)
 
         def get_vectorinput_interpolation(self, runCase_field, runCase_func, outPut_field, outPut_field_m, alpha, n_iterations, time):
                 if time == -1:
                     if runCase_field == {}:
                         runCase_func(False) 
                     for t in range(len(self.t)):
-                        self.get_vector_field_interpolation(runCase_field, outPut_field[t,:,:,:],t,alpha,n_iterations)
+                        self.get_vector_field_interpolation(runCase_field, outPut_field[t,:,:,:],self.t[t],alpha,n_iterations)
 
                     for t in range(len(self.t)):
                         for i in range(len(self.x)):
@@ -2744,42 +3403,31 @@ class outPut:
                 else:
                     if (str(time) in runCase_field.keys()) == False:
                         runCase_func(False, time)
-                    t = self.t.index(time)
-                    self.get_vector_field_interpolation(runCase_field,outPut_field,t,alpha,n_iterations)
+                    self.get_vector_field_interpolation(runCase_field,outPut_field,time,alpha,n_iterations)
                     
                     for i in range(len(self.x)):
                         for j in range(len(self.y)):
                             outPut_field_m[i,j] = round(math.sqrt(outPut_field[i,j,0]**2+outPut_field[i,j,1]**2+outPut_field[i,j,2]**2),6) 
                                                                                                       
-        def get_scalar_field_interpolation(self,runCase_field,output_field,t,alpha,n_iterations):
-                field = runCase_field[str(self.t[t])].iF.field
-                field_u = runCase_field[str(self.t[t])].iF.u
-                scalar_field = np.zeros((len(self.x),len(self.y)))
+        def get_scalar_field_interpolation(self,runCase_field,output_field,time,alpha,n_iterations): #time is a value, not an index of self.t, so the inputs of time 0 work with any time selection
+                field = runCase_field[str(time)].iF.field
+                field_u = runCase_field[str(time)].iF.u
                 if field_u == 'uniform':
                     scalar_field = np.ones((len(self.x),len(self.y)))*field[0]
                 else:
-                    for i in range(len(self.x)):
-                        for j in range(len(self.y)):                        
-                            for k in range(len(self.index_matrix[i][j])):
-                                scalar_field[i,j] += field[self.index_matrix[i][j][k]]*self.alpha_matrix[i][j][k]
+                    scalar_field = self.interpolate(np.asarray(field, dtype=np.float64))
 
                 surface_smoother(scalar_field,output_field,alpha,n_iterations)
       
-        def get_vector_field_interpolation(self,runCase_field,output_field,t,alpha,n_iterations):
-                field = runCase_field[str(self.t[t])].iF.field
-                field_u = runCase_field[str(self.t[t])].iF.u
+        def get_vector_field_interpolation(self,runCase_field,output_field,time,alpha,n_iterations):
+                field = runCase_field[str(time)].iF.field
+                field_u = runCase_field[str(time)].iF.u
                 vector_field = np.zeros((len(self.x),len(self.y),3))
-                if field_u == 'uniform':
-                    vector_field[:,:,0] = np.ones((len(self.x),len(self.y)))*field[0].x
-                    vector_field[:,:,1] = np.ones((len(self.x),len(self.y)))*field[0].y
-                    vector_field[:,:,2] = np.ones((len(self.x),len(self.y)))*field[0].z
-                else:
-                    for i in range(len(self.x)):
-                        for j in range(len(self.y)):                        
-                            for k in range(len(self.index_matrix[i][j])):
-                                vector_field[i,j,0] += field[self.index_matrix[i][j][k]].x*self.alpha_matrix[i][j][k]
-                                vector_field[i,j,1] += field[self.index_matrix[i][j][k]].y*self.alpha_matrix[i][j][k]
-                                vector_field[i,j,2] += field[self.index_matrix[i][j][k]].z*self.alpha_matrix[i][j][k]
+                for ix in range(3):
+                    if field_u == 'uniform':
+                        vector_field[:,:,ix] = np.ones((len(self.x),len(self.y)))*field[0,ix]
+                    else:
+                        vector_field[:,:,ix] = self.interpolate(field[:,ix])
 
                 surface_smoother(vector_field[:,:,0],output_field[:,:,0],alpha,n_iterations)
                 surface_smoother(vector_field[:,:,1],output_field[:,:,1],alpha,n_iterations)
@@ -3209,15 +3857,15 @@ class outPut:
                         vpf = point1  
                     
                 list_points = []
-                list_points.append(self.face_points[list_faces[0]][self.get_point_in_face(list_faces[0],vpi)])
+                list_points.append(self.get_face_point(list_faces[0],self.get_point_in_face(list_faces[0],vpi)))
                 
                 for i in range(len(list_faces)-1):
                     edge_index = self.get_common_edge(list_faces[i],list_faces[i+1])
-                    point_1 = self.face_points[list_faces[i]][edge_index] #first point of the common edge
-                    if edge_index != len(self.face_points[list_faces[i]])-1:
-                        point_2 = self.face_points[list_faces[i]][edge_index+1] #second point of the common edge
+                    point_1 = self.get_face_point(list_faces[i],edge_index) #first point of the common edge
+                    if edge_index != len(self.mesh.face_edges(list_faces[i]))-1:
+                        point_2 = self.get_face_point(list_faces[i],edge_index+1) #second point of the common edge
                     else:
-                        point_2 = self.face_points[list_faces[i]][0]
+                        point_2 = self.get_face_point(list_faces[i],0)
 
                     if get_closer_point(m,vpi,point_1,point_2) == 1:
                         point_f = point_1
@@ -3226,7 +3874,7 @@ class outPut:
                         
                     list_points.append(point_f)
                 
-                list_points.append(self.face_points[list_faces[-1]][self.get_point_in_face(list_faces[-1],vpf)])
+                list_points.append(self.get_face_point(list_faces[-1],self.get_point_in_face(list_faces[-1],vpf)))
                 
                 i = 0
                 while True:
@@ -3249,15 +3897,15 @@ class outPut:
                     index_point_f = self.get_point_in_face(list_faces[i],list_points[i+1])
                     
                     if index_point_i != index_point_f:
-                        n = len(self.face_points[list_faces[i]])
+                        n = len(self.mesh.face_edges(list_faces[i]))
                         sense = choose_sense(n,index_point_i,index_point_f)
                         if sense == 1:
                             while True:
-                                list_edges.append(self.edge_faces[list_faces[i]][index_point_i])
+                                list_edges.append(self.mesh.face_edges(list_faces[i])[index_point_i])
                                 index_point_i +=1
                                 if index_point_i == n:
                                     index_point_i = 0
-                                new_list_points.append(self.face_points[list_faces[i]][index_point_i])
+                                new_list_points.append(self.get_face_point(list_faces[i],index_point_i))
                                 if index_point_i == index_point_f:
                                     break
                         else:
@@ -3265,8 +3913,8 @@ class outPut:
                                 index_point_i -=1
                                 if index_point_i ==-1:
                                     index_point_i = n-1
-                                list_edges.append(self.edge_faces[list_faces[i]][index_point_i])
-                                new_list_points.append(self.face_points[list_faces[i]][index_point_i])
+                                list_edges.append(self.mesh.face_edges(list_faces[i])[index_point_i])
+                                new_list_points.append(self.get_face_point(list_faces[i],index_point_i))
                                 if index_point_i == index_point_f:
                                     break
                                 
@@ -3275,8 +3923,8 @@ class outPut:
         def get_edges_sense(self,list_edges,list_points, dx): #returns the sense of each edge in list_edges
                 edges_sense = []
                 for i in range(len(list_points)-1):
-                    face_owner = int(self.r.eO['edges'][list_edges[i]])
-                    face_neighbour = int(self.r.eN['edges'][list_edges[i]])
+                    face_owner = int(self.mesh.owner[list_edges[i]])
+                    face_neighbour = int(self.mesh.neighbour[list_edges[i]])
                     dx_i = dx
                     while True:
                         point_t = get_point_t(list_points[i], list_points[i+1], dx_i)
@@ -3314,13 +3962,12 @@ class outPut:
                 for k in range(len(self.index_matrix[i][j])):
                     if not(self.index_matrix[i][j][k] in list_index):
                         list_index.append(self.index_matrix[i][j][k])
-                poligons = []
-                for k in range(len(list_index)):
-                    poligons.append(self.face_points[list_index[k]])
-                for k in range(len(poligons)):
-                    if face_in(poligons[k],v) == True:
-                        face_index = list_index[k]
-                        return face_index
+                if len(list_index) > 0:
+                    is_in = faces_in([self.mesh.face_points(k) for k in list_index],v)
+                    for k in range(len(list_index)):
+                        if is_in[k] == True:
+                            face_index = list_index[k]
+                            return face_index
                 if face_index == -1:
                     return face_index
                       
@@ -3330,23 +3977,22 @@ class outPut:
                 return [i,j]
 
         def get_point_in_face(self,index,v): #knowing that v belogs to index, which is a face, we determine which is the closest point in the face (index) to v
-                list = self.face_points[index]
-                dist = 10**6
-                for i in range(len(list)):
-                    if distxy(list[i],v)<=dist:
-                        dist = distxy(list[i],v)
-                        point_index = i
+                dist = distxy_array(v.x,v.y,self.mesh.face_points(index))
+                point_index = len(dist)-1-int(np.argmin(dist[::-1])) #the last closest point
                 return point_index
+
+        def get_face_point(self,index,k): #returns the point k of the face index as a vector
+                p = self.mesh.face_points(index)[k]
+                return vector(p[0],p[1],p[2])
             
         def is_face_neighbour(self,index1,index2): #returns true if the face index1 is a neighbour of the face index2
-                if index2 in self.face_neighbour[index1]:
-                    return True
-                else:
-                    return False
+                return self.mesh.is_neighbour(index1,index2)
 
         def get_common_edge(self,index1,index2): #returns the index of the common edge between two faces
-                for i in range(len(self.edge_faces[index1])):
-                    if self.edge_faces[index1][i] in self.edge_faces[index2]:
+                edges1 = self.mesh.face_edges(index1)
+                edges2 = self.mesh.face_edges(index2)
+                for i in range(len(edges1)):
+                    if edges1[i] in edges2:
                         return i
 
 
@@ -3546,8 +4192,8 @@ class outPut:
                                 rectangle = []
                                 
                                 for j in range(len(polygon)):
-                                    rectangle.append(vector(polygon[j][0]-off[0], polygon[j][1]-off[1], 0))
-                                poligons.append(rectangle)    
+                                    rectangle.append([polygon[j][0]-off[0], polygon[j][1]-off[1], 0])
+                                poligons.append(np.array(rectangle, dtype=np.float64))    
                        
                             if time == -1:
                                 for t in range(len(self.t)):
@@ -3622,12 +4268,12 @@ class outPut:
                     
                     if self.r.rho_w == -1 or self.r.rho_s == -1:
                         self.r.get_densities(False)                    
-                    if self.r.n == {}:
-                        self.r.get_n(False,0)
-                    if self.r.A == {}:
-                        self.r.get_A(False,0)
-                    if self.r.c == {}:
-                        self.r.get_c(False,0)
+                    if ('0' in self.r.n.keys()) == False:
+                        self.r.get_n(False, 0)
+                    if ('0' in self.r.A.keys()) == False:
+                        self.r.get_A(False, 0)
+                    if ('0' in self.r.c.keys()) == False:
+                        self.r.get_c(False, 0)
  
                     n = self.r.n['0'].iF.field
                     c = self.r.c['0'].iF.field
@@ -3638,28 +4284,18 @@ class outPut:
                             h = self.get_field_t(self.t[t],self.r.h, self.r.get_h)
                             Cv = self.get_field_t(self.t[t],self.r.Cv, self.r.get_Cv)
                                                                                     
-                            sum_num = vector(0,0,0)
-                            sum_den = 0
-                            for i in range(self.r.nF):
-                                sum_den += (self.r.rho_w+Cv[i]*(self.r.rho_s-self.r.rho_w))*A[i]*h[i]
-                                sum_num += (c[i]-n[i]*1/2*h[i])*(self.r.rho_w+Cv[i]*(self.r.rho_s-self.r.rho_w))*A[i]*h[i]
-                                    
-                            self.rcg[t,0] = sum_num.x/sum_den
-                            self.rcg[t,1] = sum_num.y/sum_den
-                            self.rcg[t,2] = sum_num.z/sum_den
+                            self.rcg[t,:] = self.get_rcg_t(c, n, A, h, Cv)
                     else:                        
                         h = self.get_field_t(time,self.r.h, self.r.get_h)
                         Cv = self.get_field_t(time,self.r.Cv, self.r.get_Cv)
                                                 
-                        sum_num = vector(0,0,0)
-                        sum_den = 0
-                        for i in range(self.r.nF):
-                            sum_den += (self.r.rho_w+Cv[i]*(self.r.rho_s-self.r.rho_w))*A[i]*h[i]
-                            sum_num += (c[i]-n[i]*1/2*h[i])*(self.r.rho_w+Cv[i]*(self.r.rho_s-self.r.rho_w))*A[i]*h[i]
-                                    
-                        self.rcg[0,0] = sum_num.x/sum_den
-                        self.rcg[0,1] = sum_num.y/sum_den
-                        self.rcg[0,2] = sum_num.z/sum_den
+                        self.rcg[0,:] = self.get_rcg_t(c, n, A, h, Cv)
+
+        def get_rcg_t(self, c, n, A, h, Cv):
+                h = np.asarray(h, dtype=np.float64)
+                m = (self.r.rho_w+np.asarray(Cv, dtype=np.float64)*(self.r.rho_s-self.r.rho_w))*np.asarray(A, dtype=np.float64)*h
+                sum_num = ((c-n*1/2*h[:,None])*m[:,None]).sum(axis=0)
+                return sum_num/m.sum()
 
         def get_M(self, report = True, time = -1): #Mass of the whole fluid   
                 if (self.M_flag == 'on' or self.M_flag == 'yes' or self.M_flag == True):
@@ -3672,8 +4308,8 @@ class outPut:
 
                     if self.r.rho_w == -1 or self.r.rho_s == -1:
                         self.r.get_densities(False)                    
-                    if self.r.A == {}:
-                        self.r.get_A(False,0)
+                    if ('0' in self.r.A.keys()) == False:
+                        self.r.get_A(False, 0)
                     if self.r.hmin == -1:
                         self.r.get_hmin(False)
                         
@@ -3708,8 +4344,8 @@ class outPut:
                     else:
                         self.V = np.zeros((1,1))
 
-                    if self.r.A == {}:
-                        self.r.get_A(False,0)
+                    if ('0' in self.r.A.keys()) == False:
+                        self.r.get_A(False, 0)
                     if self.r.hmin == -1:
                         self.r.get_hmin(False)
                         
@@ -3742,8 +4378,8 @@ class outPut:
                     else:
                         self.Vsed = np.zeros((1,1))
 
-                    if self.r.A == {}:
-                        self.r.get_A(False,0)
+                    if ('0' in self.r.A.keys()) == False:
+                        self.r.get_A(False, 0)
                     if self.r.tps == {}:
                         self.r.get_transportProperties(False)
                         
@@ -3920,16 +4556,7 @@ class outPut:
 
 ########################################  writing functions  #########################################################
 
-        def create_t_size(self, size):
-                for i in range(size):
-                    sub_list = []
-                    for j in range(int(len(self.t)/size)):
-                        sub_list.append(self.t[j*size+i])
-                    self.t_size.append(sub_list)
-                for i in range(len(self.t)-int(len(self.t)/size)*size):
-                    self.t_size[i+1].append(self.t[int(len(self.t)/size)*size+i])            
-
-        def write_output(self, path, size, time = -1):
+        def write_output(self, path, size, time = -1, comm = None):
                 if self.rank == 0:
                     print('Writing output files ...')
                     self.write_t(path)
@@ -3943,22 +4570,25 @@ class outPut:
                     self.write_z_tp(path)
                     self.write_he_tp(path)
                 self.create_dir(path, size, time)
-                self.write_fields(path, size, time)              
-
-        def create_dir(self, path, size, time):
+                self.write_fields(path, size, time, comm)              
+
+        def write_time(self, path, time): #output of a time added to the case after write_output, used by the follow mode
+                self.get_rF_VyM(False)
+                self.create_dir(path, 1, time)
+                self.write_fields(path, 1, time)
+                #t, rF_M and rF_V are replaced when the fields of the time are written, so a Results opened meanwhile does not list a time that is
+                #missing or half-written. t goes last, because the Results keeps only the first len(t) values of rF_M and rF_V //AG
+                self.replace_list(path, 'rF_M', self.rF_M[:,0])
+                self.replace_list(path, 'rF_V', self.rF_V[:,0])
+                self.replace_list(path, 't', self.t)
+
+        def create_dir(self, path, size, time): #with several ranks the directory of a time is created by the rank that takes it
                 if size == 1:
                     if time == -1:
                         for t in self.t:
                             os.mkdir(path+'/'+str(t))
                     else:
                         os.mkdir(path+'/'+str(time))
-                else:
-                    if len(self.t_size) == 0:
-                        self.create_t_size(size)
-                        
-                    if time == -1:
-                        for t in self.t_size[self.rank]:
-                            os.mkdir(path+'/'+str(t))
                         
         def write_x(self, path):
                 self.write_list(path, 'x', self.x)
@@ -4040,7 +4670,7 @@ class outPut:
                         fi.write("\n")
                     fi.close()
 
-        def write_fields(self, path, size, time):
+        def write_fields(self, path, size, time, comm = None):
                 import time as timex
                 if time == -1:
                     if size == 1:
@@ -4051,14 +4681,11 @@ class outPut:
                             self.write_tpFields(path,t)
                             self.write_timeFields(path,t)
                             self.r.clean_fields(False, t)
+                    elif comm == None:
+                        write_processes(self, path, self.t, size)
                     else:
-                        for t in self.t_size[self.rank]:
-                            print('   Writing output fields for time = '+ str(t)+ ' at time = ' + date(timex.gmtime())+ ' with rank = ' + str(self.rank))
-                            self.write_areaFields(path,t)
-                            self.write_edgeFields(path,t)
-                            self.write_tpFields(path,t)
-                            self.write_timeFields(path,t)
-                            self.r.clean_fields(False, t)
+                        for t in queue_times(comm, self.t):
+                            self.write_queued_time(path, t)
                 else:
                     print('   Writing output fields for time = '+ str(time)+ ' at time = ' + date(timex.gmtime()))
                     self.write_areaFields(path,time)
@@ -4067,6 +4694,19 @@ class outPut:
                     self.write_timeFields(path,time)
                     self.r.clean_fields(False, time)
 
+        def write_queued_time(self, path, t): #a time taken from the queue by a rank of the mpi or processes backends
+                import time as timex
+                start = timex.time()
+                os.mkdir(path+'/'+str(t))
+                print('   Writing output fields for time = '+ str(t)+ ' at time = ' + date(timex.gmtime())+ ' with rank = ' + str(self.rank))
+                self.write_areaFields(path,t)
+                self.write_edgeFields(path,t)
+                self.write_tpFields(path,t)
+                self.write_timeFields(path,t)
+                self.r.clean_fields(False, t)
+                self.t_rank.append(t)
+                self.t_busy += timex.time()-start
+
         def write_areaFields(self, path, t):
                     self.write_h(path,t)
                     self.write_pb(path,t)
@@ -4323,6 +4963,10 @@ class outPut:
                     fi.write(str(round(list[i], nround))+" ")
                 fi.close()                  
 
+        def replace_list(self, path, name, list, nround = 3): #the list is written in a temporary file that replaces the old one in one step
+                self.write_list(path, name+'.tmp', list, nround)
+                os.replace(path+'/'+name+'.tmp', path+'/'+name)
+
         def write_scalarfield(self, path, name, field, time, nround= 3):
                 if time == -1:
                     for t in range(len(self.t)):
@@ -4470,15 +5114,18 @@ def curve_smoother(input,  alpha, n_iterations):
     
     return output
 
-def face_in(List,v):
-    is_in = True
-    for i in range(len(List)-1):
-        if check_in(List[i],List[i+1],v) != True:
-            is_in = False
-            break
-    if check_in(List[-1],List[0],v) != True:
-        is_in = False                
-    return is_in
+def face_in(List,v): #List is a (n,3) array with the points of the face
+    return bool(check_in(List,np.roll(List,-1,axis=0),v).all())
+
+def faces_in(List,v): #List is a list of (n,3) arrays, the result says for every face if v is inside it
+    sizes = np.array([len(points) for points in List])
+    end = np.cumsum(sizes)
+    start = end-sizes
+    index_next = np.arange(end[-1])+1
+    index_next[end-1] = start
+    v1 = np.concatenate(List)
+    is_in = check_in(v1,v1[index_next],v)
+    return np.logical_and.reduceat(is_in,start)
 
 def get_closer_point(m,P0,P1,P2): #determines which point, P1 or P2, is the closest to P0
     dp1 = abs(m*(P1.x-P0.x)+P0.y-P1.y)/math.sqrt(m**2+1)
@@ -4488,31 +5135,13 @@ def get_closer_point(m,P0,P1,P2): #determines which point, P1 or P2, is the clos
     else:
         return 1
 
-def check_in(v1,v2,v_check):
-    quadrant = get_quadrant(v1,v2)
-    if v2.x != v1.x:
-        y_check = (v2.y-v1.y)/(v2.x-v1.x)*(v_check.x-v1.x)+v1.y
-        if quadrant ==1 or quadrant ==4:
-            if v_check.y <= y_check:
-                return True
-            else:
-                return False
-        else:
-            if v_check.y >= y_check:
-                return True
-            else:
-                return False 
-    else:
-        if quadrant ==1:
-            if v_check.x >= v1.x:
-                return True
-            else:
-                return False
-        else:
-            if v_check.x <= v1.x:
-                return True
-            else:
-                return False   
+def check_in(v1,v2,v_check): #v1 and v2 are (n,3) arrays with the first and the second point of every edge
+    dx = v2[:,0]-v1[:,0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        y_check = (v2[:,1]-v1[:,1])/dx*(v_check.x-v1[:,0])+v1[:,1]
+    is_in = np.where(dx > 0, v_check.y <= y_check, v_check.y >= y_check) #quadrants 1 and 4 have the inside below the edge
+    is_in_vertical = np.where(v2[:,1] >= v1[:,1], v_check.x >= v1[:,0], v_check.x <= v1[:,0])
+    return np.where(dx == 0, is_in_vertical, is_in)
 
 def choose_sense(n, index_i, index_f): #n is the number of points in the face.
     if index_f > index_i:
@@ -4622,6 +5251,21 @@ def date_format(x):
     else:
         return str(x)
 
+def default_backend(): #mpi ranks only under mpirun with mpi4py installed, a pool of processes otherwise
+    launched = False
+    for key in ['OMPI_COMM_WORLD_SIZE', 'PMI_SIZE', 'PMIX_RANK', 'MPI_LOCALNRANKS', 'MV2_COMM_WORLD_SIZE']:
+        if (key in os.environ) == True:
+            launched = True
+    if launched == True:
+        try:
+            import mpi4py
+            return 'mpi'
+        except ImportError:
+            print('mpi4py is not installed, using the processes backend')
+            return 'processes'
+    print('Not launched by mpirun, using the processes backend (-backend mpi to use the mpi ranks)')
+    return 'processes'
+
 def date(t):
     yr = date_format(t[0])
     mo = date_format(t[1])
@@ -4651,8 +5295,46 @@ def write_summary(path, lp, tp, dx, dy, rx, ry, alpha, niter, alphafield, niterf
         fi.write("\n")
         fi.close()    
 
+#In follow mode the case is checked every interval seconds while the solver is running. Every new time is written as soon as all its files
+#are complete, and the times are taken in order, so a time is never written before an older one. In parallel runs the new times are searched
+#in processor0 and reconstructed with Par_reconstructPar once they are complete in every processor. The follow mode ends when endTime is written.
+def follow_case(r, o, path, output_path, interval, workers = 1):
+    import time
+    names = r.field_names()
+    r.get_controlDict(False)
+    rec = None
+    print('Following '+path+' every '+str(interval)+' s ...')
+    try:
+        while True:
+            times = []
+            if r.np > 1:
+                create_time(path+'/processor0', times)
+            else:
+                create_time(path, times)
+            for t in times:
+                if (t in r.t) == True or (len(r.t) > 0 and t < r.t[-1]):
+                    continue
+                if complete_time(path, t, names) == False:
+                    if r.np == 1:
+                        break
+                    if all(complete_time(path+'/processor'+str(p), t, names) for p in range(r.np)) == False:
+                        break
+                    if rec == None:
+                        import Par_reconstructPar
+                        rec = Par_reconstructPar.runCase(path, r.h_flag, r.Cv_flag, r.deltaz0_flag, r.Us_flag, r.Q_flag, r.pb_flag, r.tau_flag, r.phi2s_flag, 0, workers, tolerance = r.tolerance)
+                    if (t in rec.t) == False:
+                        rec.t.append(t)
+                    os.makedirs(path+'/'+str(t), exist_ok=True)
+                    rec.write_fields(path, 1, t)
+                r.t.append(t)
+                o.write_time(output_path, t)
+            if len(r.t) > 0 and is_number(str(r.eT)) == True and float(r.t[-1]) >= float(r.eT):
+                break
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print('Follow mode stopped')
+
 def main(argv):
-    from mpi4py import MPI
     import time
     import shutil
     
@@ -4691,6 +5373,18 @@ def main(argv):
     parser.add_argument('-M_flag', help='Activate M calculation', action="store_true")
     parser.add_argument('-V_flag', help='Activate V calculation', action="store_true")
     parser.add_argument('-Vsed_flag', help='Activate Vsed calculation', action="store_true")
+    parser.add_argument('-cache', help='Store the parsed fields in simulationPath/.npyCache and reuse them in the next runs', action="store_true")
+    parser.add_argument('-memory', type=float, help='memory (MB) used by every time-series field, the least recently used times are removed beyond it (0 = no limit)', default=0)
+    parser.add_argument('-workers', type=int, help='number of processes reading the files of the processors', default=1)
+    parser.add_argument('-follow', help='Keep writing the new times while the simulation is running', action="store_true")
+    parser.add_argument('-interval', type=float, help='seconds between two checks of the case in follow mode', default=10)
+    parser.add_argument('-time', type=str, help="times to process, values and ranges separated by commas like '0.5,10:20' or ':5'", default='')
+    parser.add_argument('-latestTime', help='Activate to process the last time', action="store_true")
+    parser.add_argument('-stride', type=int, help='process one of every stride times', default=1)
+    parser.add_argument('-tolerance', type=float, help='largest distance between the edge centres of a processor and the global ones of the same edge', default=1e-6)
+    parser.add_argument('-decomposed', help='Activate to read the fields from the processor directories, reconstructing them in memory', action="store_true")
+    parser.add_argument('-backend', type=str, choices=['mpi', 'processes', 'serial'], help='parallel backend: mpi ranks (mpirun), a pool of processes or a single process (default: mpi under mpirun with mpi4py, processes otherwise)', default='')
+    parser.add_argument('-processes', type=int, help='number of processes of the processes backend', default=os.cpu_count())
     
     args = parser.parse_args()
 
@@ -4727,10 +5421,32 @@ def main(argv):
     M = args.M_flag
     V = args.V_flag
     Vsed = args.Vsed_flag
+    cache = args.cache
+    memory = args.memory
+    workers = args.workers
+    follow = args.follow
+    interval = args.interval
+    selected_time = args.time
+    latestTime = args.latestTime
+    stride = args.stride
+    tolerance = args.tolerance
+    decomposed = args.decomposed
+    backend = args.backend
+    if backend == '':
+        backend = default_backend()
     
-    comm = MPI.COMM_WORLD
-    rank = comm.Get_rank()
-    size = comm.Get_size()
+    if backend == 'mpi':
+        from mpi4py import MPI
+        comm = MPI.COMM_WORLD
+        rank = comm.Get_rank()
+        size = comm.Get_size()
+    else: #the processes backend writes the times in the size processes of a pool
+        comm = None
+        rank = 0
+        if backend == 'processes':
+            size = max(args.processes, 1)
+        else:
+            size = 1
 
     print('Rank = ' + str(rank)+'  started at = ' + str(date(time.gmtime())))
 
@@ -4749,15 +5465,21 @@ def main(argv):
     write_summary(output_path,lp,tp,dx,dy,rx,ry,alpha,niter,alphafield,niterfield,dist,ntp,rank)
 
     if rank == 0:
-        r = runCase(input_path, lp, tp, h, pb, Cv, deltaz0, Us, tau, phi2s, Q, c, n, he, A)
+        r = runCase(input_path, lp, tp, h, pb, Cv, deltaz0, Us, tau, phi2s, Q, c, n, he, A, cache, memory, workers, selected_time, latestTime, stride, False, tolerance, decomposed)
         r.report_Case(output_path+'/'+'Summary.dat')
+        o = outPut(r,dx,dy,rx,ry,alpha,niter,alphafield,niterfield,dist,ntp,rank,Sm,rho,rcg,M,Vsed,V)
     else:
-        r = None
+        o = None
         
-    r = comm.bcast(r, root=0)
-    
-    o = outPut(r,dx,dy,rx,ry,alpha,niter,alphafield,niterfield,dist,ntp,rank,Sm,rho,rcg,M,Vsed,V)
-    o.write_output(output_path, size)
+    if size > 1 and comm != None:
+        o = bcast_output(comm, o)
+        o.rank = rank
+    o.write_output(output_path, size, -1, comm)
+    if size > 1 and comm != None:
+        report_ranks(comm, len(o.t_rank), o.t_busy)
+
+    if follow == True and rank == 0:
+        follow_case(r, o, input_path, output_path, interval, workers)
 
     print('Rank = ' + str(o.rank)+'  ended at = ' + str(date(time.gmtime())))
 
@@ -15,14 +15,28 @@ Author
 @version: 1.10 (21/06/21)
 '''
 
+import numpy as np
 import sys
 import os
+import re
+import gzip
+import json
+import collections
+import concurrent.futures
+import threading
+import multiprocessing
 import argparse
 import shutil
+import copy
+import zipfile
 
 ##########################################  Definitions  ##############################################################
 
-def header(objectName, className, locationName):
+def header(objectName, className, locationName, format = 'ascii'):
+    if format == 'binary':
+        arch = "    arch        \"LSB;label=32;scalar=64\";\n"
+    else:
+        arch = ""
     return ("/*--------------------------------*- C++ -*----------------------------------*\\\n"
             "| =========                 |                                                 |\n"
             "| \\\\      /  F ield         | OpenFOAM: The Open Source CFD Toolbox           |\n"
@@ -33,17 +47,36 @@ def header(objectName, className, locationName):
             "FoamFile\n"
             "{}\n"
             "    version     2.0;\n"
-            "    format      ascii;\n"
+            "    format      {};\n"
+            "{}"
             "    class       {};\n"
             "    location    \"{}\";\n"
             "    object      {};\n"
             "{}\n"
             "// * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * //\n"
-            ).format("{", className, locationName, objectName, "}");
+            ).format("{", format, arch, className, locationName, objectName, "}");
 
 def footer():
     return ("\n"
             "// ************************************************************************* //\n")
+
+def format_list(list, type): #the values of a list as the lines of an ascii file, in one string
+    values = np.asarray(list)
+    if len(values) == 0:
+        return ''
+    if type == 'vector':
+        return ('({} {} {})\n'*len(values)).format(*values.ravel().tolist())
+    return '\n'.join(map(str, values.tolist()))+'\n'
+
+def write_list(fi, list, type, binary = False):
+    fi.write(str(len(list))+"\n")
+    if binary == True: #the values as little endian doubles between the brackets, like the binary format of OpenFOAM //AG
+        fi.write('(')
+        fi.flush()
+        fi.buffer.write(np.ascontiguousarray(list, dtype='<f8').tobytes())
+        fi.write(')'+"\n")
+    else:
+        fi.write('('+"\n"+format_list(list, type)+')'+"\n")
             
 def clean_brackets(list):
     k = 0
@@ -93,27 +126,23 @@ def clean_dots(list):
         if k == len(list):
             break
 
-def clean_spaces_string(list):
-    k = 0
-    while True:
-        if list[k] == '\n':
-            list.remove('\n')
-        elif list[k].split()[0] == '//':
-            list.remove(list[k])
-        else: 
-            k += 1
-        if k == len(list):
-            break
-
-def clean_spaces_list(list):
-    k = 0
-    while True:
-        if len(list[k]) == 0:
-            list.remove([])
-        else: 
-            k += 1
-        if k == len(list):
-            break
+#The files are tokenized line by line: every line that is not empty or a comment gives the list of its words, without the ';'.
+#tokenize is a generator, so the lines are read from the file as the tokens are used and the file is never held in memory as a list of lines
+def read_lines(path): #the lines of a file, read one by one from a buffered binary handle
+    with open_file(path, 'rb') as f:
+        for line in f:
+            yield line.decode()
+
+def tokenize(lines, OF_header = True):
+    for i, line in enumerate(lines):
+        if OF_header == True and i < 16:
+            continue
+        tokens = line.split()
+        if len(tokens) == 0 or tokens[0] == '//':
+            continue
+        clean_dots(tokens)
+        if len(tokens) > 0:
+            yield tokens
 
 def is_number(s):
     try:
@@ -155,7 +184,7 @@ def read_constant(list, dict):
 def read_subdictionary(list,output,name,type):
     subdict = {}
     while True:
-        pop = list.pop(0)
+        pop = list.popleft()
         if pop[0] == '}':
             break
         clean_brackets(pop)
@@ -165,10 +194,10 @@ def read_subdictionary(list,output,name,type):
             read_constant(pop,subdict)
         else:
             if list[0][0]=='{':
-                list.remove(list[0])
+                list.popleft()
                 read_subdictionary(list,subdict,pop[0],'dict')
             elif list[0][0]=='(':
-                list.remove(list[0])
+                list.popleft()
                 read_sublist(list,subdict,pop[0],'dict')
     if type == 'dict':
         output[name] = subdict
@@ -179,13 +208,13 @@ def read_subdictionary(list,output,name,type):
 def read_sublist(list,output,name,type):
     sublist = []
     while True:
-        pop = list.pop(0)
+        pop = list.popleft()
         if pop[0] == ')':
             break
         clean_brackets(pop)
         if len(pop)==1:
             if list[0][0]=='{':
-                list.remove(list[0])
+                list.popleft()
                 read_subdictionary(list,sublist,pop[0],'list')
             else:
                 sublist.append(pop[0])
@@ -197,17 +226,18 @@ def read_sublist(list,output,name,type):
         output.append(name)
         output.append(sublist)
 
-def read_dictionary(list,dict):
+def read_dictionary(list,dict): #the tokens are taken from a deque, so every line is removed in constant time
+    list = collections.deque(list)
     while True:
-        pop = list.pop(0)
+        pop = list.popleft()
         if len(pop)==2:
             read_entry(pop,dict)
         elif len(pop)==1:
             if list[0][0]=='{':
-                list.remove(list[0])
+                list.popleft()
                 read_subdictionary(list,dict,pop[0],'dict')
             elif list[0][0]=='(':
-                list.remove(list[0])
+                list.popleft()
                 read_sublist(list,dict,pop[0],'dict')
         elif len(pop)>2:
             read_constant(pop,dict)          
@@ -215,33 +245,227 @@ def read_dictionary(list,dict):
             break
                
 def get_input(path,list, OF_header = True):
-    input = []
-    with open(path) as f:
-        for line in f:
-            input.append(line)
-    if OF_header == True:
-        input= input[16:(len(input))]
-    clean_spaces_string(input)
-    for i in range(len(input)):
-        list.append(input[i].split())
-        clean_dots(list[i])
-    clean_spaces_list(list)
+    if is_binary(path) == True:
+        data = read_file(path)
+        [text, iF] = binary_to_text(data, get_format(data), '')
+        split_input(text.splitlines(True), list, OF_header)
+    else:
+        list.extend(tokenize(read_lines(path), OF_header))
+
+def split_input(input, list, OF_header = True):
+    list.extend(tokenize(input, OF_header))
+
+#The nonuniform internalField is the biggest block in every field file, so it is parsed with numpy in blocks of 4 MB as it is read
+#and given to the tokenizer as 'internalField nonuniform;'. The rest of the file (dimensions and boundaryField) is tokenized line by line.
+#If the block cannot be parsed the whole file is tokenized as before.
+def get_field_input(path, list, type, OF_header = True):
+    if is_binary(path) == True:
+        data = read_file(path)
+        [text, iF] = binary_to_text(data, get_format(data), type)
+        split_input(text.splitlines(True), list, OF_header)
+        return iF
+    iF = {}
+    with open_file(path, 'rb') as f:
+        try:
+            list.extend(tokenize(field_lines(f, type, iF), OF_header))
+        except ValueError:
+            iF.clear()
+            list.clear()
+            f.seek(0)
+            list.extend(tokenize(field_lines(f, '', iF), OF_header))
+    return iF
+
+def field_lines(f, type, iF): #the lines of a field file, with the nonuniform internalField of the given type read into iF
+    header = re.compile(r'^\s*internalField\s+nonuniform\s+List<'+type+r'>')
+    start = re.compile(r'List<'+type+r'>\s*([0-9]+)\s*\(')
+    pending = collections.deque() #lines already read from f after the internalField
+    while True:
+        if len(pending) > 0:
+            line = pending.popleft()
+        else:
+            line = f.readline().decode()
+            if line == '':
+                return
+        if type != '' and iF == {} and header.match(line) != None:
+            text = line
+            match = start.search(text)
+            while match == None and len(text) < 4096: #the size and the '(' can be in the next lines
+                text += f.readline().decode()
+                match = start.search(text)
+            if match == None:
+                raise ValueError('internalField of '+type+' without size')
+            n = int(match.group(1))
+            rest = text[match.end():]
+            if rest.rstrip().endswith(';'): #the whole list in one line
+                values = read_List_values(rest[:rest.rindex(')')], type)
+                rest = ''
+            else:
+                [values, rest] = read_List_block(f, rest.encode(), type, n)
+            if type == 'vector' and len(values) == 3*n:
+                iF['field'] = values.reshape(n,3)
+            elif type == 'scalar' and len(values) == n:
+                iF['field'] = values
+            else:
+                raise ValueError('internalField with '+str(len(values))+' values instead of '+str(n))
+            iF['u'] = 'nonuniform'
+            pending.extend(rest.splitlines(True))
+            yield 'internalField   nonuniform;\n'
+        else:
+            yield line
+
+def read_List_block(f, data, type, n): #values of a list of size n whose data starts with data and goes on in f, and the text read after its ')'
+    closing = re.compile(rb'\n\s*\)') #the ')' that closes the list is the first one at the beginning of a line
+    if type == 'vector':
+        n = 3*n
+    values = np.empty(n)
+    i = 0
+    while True:
+        match = closing.search(data)
+        if match != None:
+            block = read_List_values(data[:match.start()].decode(), type)
+        else:
+            chunk = f.read(1 << 22)
+            if len(chunk) == 0:
+                raise ValueError('List without end')
+            k = max(data.rfind(b'\n'), 0)
+            block = read_List_values(data[:k].decode(), type)
+            data = data[k:]+chunk
+        if i+len(block) > n:
+            raise ValueError('List with more than '+str(n)+' values')
+        values[i:i+len(block)] = block
+        i += len(block)
+        if match != None:
+            return [values[:i], data[match.end():].decode()]
+
+#With 'writeCompression on' the solver writes h.gz, Us.gz, ... instead of h, Us, ... Every reader opens the files through open_file,
+#which falls back to the compressed file when the plain one does not exist.
+def open_file(path, mode = 'r'):
+    if os.path.exists(path) == False and os.path.exists(path+'.gz') == True:
+        if mode == 'r':
+            mode = 'rt'
+        return gzip.open(path+'.gz', mode)
+    return open(path, mode)
+
+def read_file(path): #the file is read into a bytearray, so the arrays created from it with np.frombuffer are writable
+    if os.path.exists(path) == False and os.path.exists(path+'.gz') == True:
+        data = bytearray()
+        with gzip.open(path+'.gz', 'rb') as f: #decompressed in chunks, the compressed file is never held in memory
+            while True:
+                chunk = f.read(1 << 22)
+                if len(chunk) == 0:
+                    break
+                data += chunk
+        return data
+    with open(path, 'rb') as f:
+        data = bytearray(os.fstat(f.fileno()).st_size)
+        f.readinto(data)
+    return data
+
+#Files written with 'writeFormat binary' keep the FoamFile header and the dictionary entries as text, only the contents of the
+#nonuniform lists are raw bytes. Their sizes and byte order are given by the 'arch' entry of the header. //AG
+def get_format(data):
+    format = {'binary': False, 'label': np.dtype('<i4'), 'scalar': np.dtype('<f8')}
+    header = re.search(rb'FoamFile\s*\{[^}]*\}', data[:4096])
+    if header != None:
+        match = re.search(rb'format\s+(\w+)\s*;', header.group(0))
+        if match != None and match.group(1) == b'binary':
+            format['binary'] = True
+        arch = re.search(rb'arch\s+"([^"]*)"', header.group(0))
+        if arch != None:
+            order = '<'
+            if b'MSB' in arch.group(1):
+                order = '>'
+            label = re.search(rb'label=([0-9]+)', arch.group(1))
+            scalar = re.search(rb'scalar=([0-9]+)', arch.group(1))
+            if label != None:
+                format['label'] = np.dtype(order+'i'+str(int(label.group(1))//8))
+            if scalar != None:
+                format['scalar'] = np.dtype(order+'f'+str(int(scalar.group(1))//8))
+    return format
+
+def read_binary_List(data, start, n, type, format): #returns the values of a binary list whose data starts at start, and the position after its ')'
+    if type == 'label':
+        dtype = format['label']
+    else:
+        dtype = format['scalar']
+    count = n
+    if type == 'vector':
+        count = 3*n
+    values = np.frombuffer(data, dtype=dtype, count=count, offset=start)
+    if type == 'vector':
+        values = values.reshape(n,3)
+    return [values, start+count*dtype.itemsize+1]
+
+def binary_to_text(data, format, type): #writes every binary List<...> in ascii, except a nonuniform internalField of the given type, which is returned as iF
+    iF = {}
+    text = []
+    pos = 0
+    pattern = re.compile(rb'List<(label|scalar|vector)>\s*([0-9]+)\s*\(')
+    while True:
+        match = pattern.search(data, pos)
+        if match == None:
+            break
+        text.append(data[pos:match.start()].decode('latin-1'))
+        list_type = match.group(1).decode()
+        n = int(match.group(2))
+        [values, pos] = read_binary_List(data, match.end(), n, list_type, format)
+        internal = re.search(r'internalField\s+nonuniform\s+$', text[-1])
+        if internal != None and list_type == type and iF == {}:
+            iF['u'] = 'nonuniform'
+            iF['field'] = values
+            text[-1] = text[-1][:internal.start()]+'internalField   nonuniform;'
+            end = re.compile(rb'\s*;').match(data, pos)
+            if end != None:
+                pos = end.end()
+        elif n == 0:
+            text.append('List<'+list_type+'> 0()')
+        else:
+            lines = []
+            if list_type == 'vector':
+                for v in values.tolist():
+                    lines.append('('+str(v[0])+' '+str(v[1])+' '+str(v[2])+')')
+            else:
+                for v in values.tolist():
+                    lines.append(str(v))
+            text.append('List<'+list_type+'> \n'+str(n)+'\n(\n'+'\n'.join(lines)+'\n)')
+    text.append(data[pos:].decode('latin-1'))
+    return [''.join(text), iF]
+
+def is_binary(path):
+    with open_file(path, 'rb') as f:
+        data = f.read(4096)
+    return get_format(data)['binary']
+
+def get_binary_List(path, type): #the list of a binary labelList, scalarField or vectorField file, like faceProcAddressing or faPoints
+    data = read_file(path)
+    header = re.search(rb'FoamFile\s*\{[^}]*\}', data)
+    match = re.compile(rb'([0-9]+)\s*\(').search(data, header.end())
+    [values, pos] = read_binary_List(data, match.end(), int(match.group(1)), type, get_format(data))
+    return values
+
+def get_binary_number(path): #the size of the list of a binary file, read from the beginning of the file only
+    with open_file(path, 'rb') as f:
+        data = f.read(4096)
+    header = re.search(rb'FoamFile\s*\{[^}]*\}', data)
+    match = re.compile(rb'([0-9]+)\s*\(').search(data, header.end())
+    return int(match.group(1))
+
+def read_List_values(block, type):
+    if type == 'vector':
+        block = block.replace('(',' ').replace(')',' ')
+    try:
+        values = np.fromstring(block, dtype=np.float64, sep=' ')
+    except ValueError:
+        values = np.zeros(0)
+    return values
     
 def get_input_number(path,list):
-    input = []
-    with open(path) as f:
-        i = 0
-        for line in f:
-            input.append(line)
-            i += 1
-            if i == 19:
-                break
-    input= input[16:(len(input))]
-    clean_spaces_string(input)
-    for i in range(len(input)):
-        list.append(input[i].split())
-        clean_dots(list[i])
-    clean_spaces_list(list)
+    if is_binary(path) == True:
+        list.append([str(get_binary_number(path))])
+        return
+    with open_file(path, 'rb') as f:
+        lines = [f.readline().decode() for i in range(19)]
+    list.extend(tokenize(lines))
 
 def get_number_faces(path):  
     list = []
@@ -298,44 +522,359 @@ def read_faBoundary(path,dict):
         dict['boundaries'] = subsubdict
         dict['number'] = n
 
+#The addressing of the reconstruction is kept in processor0/constant/faMesh as reconstructAddressing.npz (the index arrays) and reconstructAddressing.json
+#(faBoundaries, sizes and the mtime and size of the mesh files it was built from), and the next runs take it from there while those files and the
+#tolerance do not change. The .json file is written last, so an addressing without it is never read. //AG
+def addressing_path(path):
+    return path+'/processor0/constant/faMesh/reconstructAddressing'
+
+def source_stat(path):
+    if os.path.exists(path) == False and os.path.exists(path+'.gz') == True:
+        path = path+'.gz'
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+def addressing_source(path, n_proc): #the mesh files the addressing is built from
+    files = [path+'/constant/faMesh/faBoundary', path+'/0/edgeNeighbour', path+'/0/ec']
+    for p in range(n_proc):
+        for file in ['constant/faMesh/faBoundary', 'constant/faMesh/faceLabels', 'constant/faMesh/faceProcAddressing', 'constant/faMesh/edgeProcAddressing', '0/ec']:
+            files.append(path+'/processor'+str(p)+'/'+file)
+    return [source_stat(file) for file in files]
+
+#In incremental mode a field of a time is only reconstructed when its files in the processors have changed (mtime or size) since the last time it was
+#written. The mtime and size of the processor files of every written field are kept in output/.reconstructManifest/<time>.json //AG
+def manifest_path(path, time):
+    return path+'/.reconstructManifest/'+str(time)+'.json'
+
+def read_manifest(path, time):
+    try:
+        with open(manifest_path(path, time)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def write_manifest(path, time, manifest):
+    try:
+        os.makedirs(path+'/.reconstructManifest', exist_ok=True)
+        with open(manifest_path(path, time), 'w') as f:
+            json.dump(manifest, f)
+    except OSError:
+        pass
+
+#With the archive option the reconstructed fields of all the times go to a single file instead of the time directories. A .h5 or .hdf5 file (h5py is
+#needed) has a compressed dataset of times x values for the internal field and for every patch with values of each field, chunked by time, so a time
+#or a subset of faces is read without reading the rest. Any other file is a zip of compressed npy arrays like an npz, with one array per time, so a
+#time is read without reading the others. Both have the times, the addressing of the reconstruction and the dimensions and patches of every field,
+#with the same names: times, addressing/faces/processor0, fields/h/internal, fields/h/boundary/<patch>, fields/h/dimensions, fields/h/patches. //AG
+def archive_format(file):
+    if file[-3:] == '.h5' or file[-5:] == '.hdf5':
+        return 'hdf5'
+    return 'npz'
+
+def open_archive(file, times):
+    if archive_format(file) == 'hdf5':
+        try:
+            import h5py
+        except ImportError:
+            raise ValueError('h5py is needed to write the archive '+file)
+        archive = h5py.File(file, 'w')
+    else:
+        archive = zipfile.ZipFile(file, 'w', zipfile.ZIP_DEFLATED)
+    archive_array(archive, 'times', np.array(times, dtype=np.float64))
+    return archive
+
+def archive_array(archive, name, array, index = -1, count = 0): #array of the time index of count times, or an array without time if index = -1
+    array = np.asarray(array)
+    if isinstance(archive, zipfile.ZipFile) == True:
+        if index != -1:
+            name = name+'/'+str(index)
+        with archive.open(name+'.npy', 'w', force_zip64=True) as f:
+            np.lib.format.write_array(f, array, allow_pickle=False)
+    elif index == -1:
+        if array.size > 0:
+            archive.create_dataset(name, data=array, compression='gzip')
+        else:
+            archive.create_dataset(name, data=array)
+    else:
+        if (name in archive) == False:
+            if array.size > 0:
+                chunks = (1, min(len(array), 65536))+array.shape[1:]
+                archive.create_dataset(name, shape=(count,)+array.shape, dtype=array.dtype, chunks=chunks, compression='gzip', fillvalue=np.nan)
+            else:
+                archive.create_dataset(name, shape=(count,)+array.shape, dtype=array.dtype)
+        archive[name][index] = array
+
+def read_archive(file, name, time, faces = None, patch = ''): #values of the field name at time, of the internal field or of a patch, only the faces (slice or sorted indices) if given
+    if patch == '':
+        key = 'fields/'+name+'/internal'
+    else:
+        key = 'fields/'+name+'/boundary/'+patch
+    if archive_format(file) == 'hdf5':
+        import h5py
+        with h5py.File(file, 'r') as f:
+            index = archive_index(f['times'][:], time, file)
+            if faces is None:
+                return f[key][index]
+            return f[key][index, faces]
+    with np.load(file) as f:
+        index = archive_index(f['times'], time, file)
+        values = f[key+'/'+str(index)]
+    if faces is None:
+        return values
+    return values[faces]
+
+def archive_index(times, time, file):
+    index = np.flatnonzero(times == float(time))
+    if len(index) == 0:
+        raise ValueError('time '+str(time)+' not found in the archive '+file)
+    return int(index[0])
+
+#The case index has the times of a case sorted numerically, the number of processor directories and the size and mtime of the files of the times
+#that have been listed. It is built with os.scandir and kept in path/.caseIndex.json. While the mtime of the case directory does not change the times
+#are taken from it, and the files of the last time, which can still be written, are listed again when they are needed.
+indexes = {}  #case indexes already read in this process
+
+def case_index(path):
+    mtime = os.stat(path).st_mtime_ns
+    old = indexes.get(path)
+    if old == None and os.path.exists(path+'/.caseIndex.json') == True:
+        try:
+            with open(path+'/.caseIndex.json') as f:
+                old = json.load(f)
+        except (OSError, ValueError):
+            old = None
+    if old == None:
+        old = {'mtime': -1, 'times': [], 'processors': 0, 'files': {}}
+    if old['mtime'] == mtime:
+        times = old['times']
+        processors = old['processors']
+    else:
+        times = []
+        processors = 0
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir() == False:
+                    continue
+                if is_number(entry.name) == True:
+                    times.append(entry.name)
+                elif entry.name[:9] == 'processor' and entry.name[9:].isdigit() == True:
+                    processors = max(processors, int(entry.name[9:])+1)
+        times.sort(key=float)
+    files = {}
+    for time in times:
+        if (time in old['files']) == True and time != times[-1] and time != old['times'][-1]:
+            files[time] = old['files'][time]
+    index = {'mtime': mtime, 'times': times, 'processors': processors, 'files': files}
+    if index != old:
+        save_index(path, index)
+    indexes[path] = index
+    return index
+
+def save_index(path, index):
+    try:
+        mtime = os.stat(path).st_mtime_ns
+        with open(path+'/.caseIndex.json', 'w') as f:
+            json.dump(index, f)
+        if mtime == index['mtime'] and os.stat(path).st_mtime_ns != mtime: #creating the index changed the mtime of the directory, the index is kept for the new one
+            index['mtime'] = os.stat(path).st_mtime_ns
+            with open(path+'/.caseIndex.json', 'w') as f:
+                json.dump(index, f)
+    except OSError: #read-only cases are indexed again in every run
+        pass
+
+def index_files(path, name): #size and mtime of the files of the time directory name, listed once
+    index = case_index(path)
+    if (name in index['files']) == False:
+        files = {}
+        with os.scandir(path+'/'+name) as entries:
+            for entry in entries:
+                if entry.is_file() == True:
+                    stat = entry.stat()
+                    files[entry.name] = [stat.st_size, stat.st_mtime_ns]
+        index['files'][name] = files
+        save_index(path, index)
+    return index['files'][name]
+
 def number_processors(path):
-    listdir = os.listdir(path)
-    n_processors = 0
-    for i in range(len(listdir)):
-        if listdir[i][:9] == 'processor':
-            if n_processors < int(listdir[i][9:]):
-                n_processors = int(listdir[i][9:])
-    return (n_processors+1)
+    return max(case_index(path)['processors'], 1)
     
 def create_time(path, time):
     del time [:]
-    listdir = os.listdir(path)
-    k = 0
-    while True:
-        if is_number(listdir[k])==True:
-            if float(listdir[k]) == int(float(listdir[k])):
-                time.append(int(float(listdir[k])))
-            else:
-                time.append(float(listdir[k]))
-            k += 1
+    for name in case_index(path)['times']:
+        if float(name) == int(float(name)):
+            time.append(int(float(name)))
         else:
-            listdir.remove(listdir[k])
-        if k == len(listdir):
-            break
-    time.sort()
-
-def create_files_list(path):
-    listdir = os.listdir(path)
-    k = 0
+            time.append(float(name))
+
+#Indices of the times chosen with the -time, -latestTime and -stride options. time is a list of values and ranges separated by commas, like '0.5,10:20' or ':5',
+#stride keeps one of every stride of those times and latestTime adds the last time (only the last time if neither time nor stride are given)
+def select_time(times, time = '', latestTime = False, stride = 1):
+    index = []
+    for i in range(len(times)):
+        if time == '':
+            index.append(i)
+        for entry in time.split(','):
+            if entry == '':
+                continue
+            if ':' in entry:
+                [start, end] = entry.split(':')
+                if (start == '' or float(times[i]) >= float(start)) and (end == '' or float(times[i]) <= float(end)):
+                    index.append(i)
+                    break
+            elif float(times[i]) == float(entry):
+                index.append(i)
+                break
+    index = index[::max(int(stride), 1)]
+    if latestTime == True and len(times) > 0:
+        if time == '' and stride == 1:
+            index = []
+        if ((len(times)-1) in index) == False:
+            index.append(len(times)-1)
+    return index
+
+#With several ranks the times are taken one by one from a counter of rank 0 as the ranks finish the previous one, so a rank that gets quick times
+#(the first ones, with a small flow extent) takes more of them instead of waiting for the ranks with the slow ones. The counter is an MPI window
+#increased with Fetch_and_op, so rank 0 does not wait for requests and writes times as the other ranks. //AG
+def queue_times(comm, times):
+    from mpi4py import MPI
+    if comm.Get_rank() == 0:
+        window = MPI.Win.Allocate(8, 8, comm=comm)  #the memory of Allocate lets the ranks of a node increase the counter without rank 0
+        window.Lock(0, MPI.LOCK_EXCLUSIVE)
+        np.frombuffer(window.tomemory(), dtype=np.int64)[0] = 0
+        window.Unlock(0)
+    else:
+        window = MPI.Win.Allocate(0, 8, comm=comm)
+    comm.Barrier()
+    one = np.ones(1, dtype=np.int64)
+    next = np.zeros(1, dtype=np.int64)
     while True:
-        if listdir[k]=='polyMesh' or listdir[k]=='uniform' or listdir[k]=='meshPhi':
-            listdir.remove(listdir[k])
-        else:
-            k += 1
-        if k == len(listdir):
+        window.Lock(0, MPI.LOCK_SHARED)
+        window.Fetch_and_op(one, next, 0, 0, MPI.SUM)
+        window.Unlock(0)
+        if next[0] >= len(times):
             break
+        yield times[int(next[0])]
+    window.Free()
+
+#comm.bcast pickles what it sends, which is slow for big addressing and interpolation data. bcast_arrays sends a dictionary of numpy arrays of
+#rank 0 as a single byte buffer with comm.Bcast, and the other ranks get the arrays as views of that buffer. //AG
+def bcast_arrays(comm, arrays):
+    if comm.Get_rank() == 0:
+        layout = []
+        size = 0
+        for key in arrays.keys():
+            array = np.ascontiguousarray(arrays[key])
+            layout.append([key, array.dtype.str, array.shape, size])
+            size += -(-array.nbytes//8)*8  #every array starts at a multiple of 8 bytes
+        buffer = np.zeros(size, dtype=np.uint8)
+        for [key, dtype, shape, start] in layout:
+            data = np.ascontiguousarray(arrays[key]).reshape(-1).view(np.uint8)
+            buffer[start:start+len(data)] = data
+        comm.bcast([layout, size], root=0)
+    else:
+        [layout, size] = comm.bcast(None, root=0)
+        buffer = np.empty(size, dtype=np.uint8)
+    comm.Bcast(buffer, root=0)
+    if comm.Get_rank() == 0:
+        return arrays
+    output = {}
+    for [key, dtype, shape, start] in layout:
+        output[key] = np.frombuffer(buffer, dtype=dtype, count=int(np.prod(shape)), offset=start).reshape(shape)
+    return output
+
+def bcast_case(comm, r): #the runCase of rank 0 in every rank. The data only used to build the addressing is not sent and the index arrays go with bcast_arrays
+    if comm.Get_rank() == 0:
+        light = copy.copy(r)
+        for name in ['ec', 'proc_ec', 'proc_faceaddr', 'proc_edgeaddr', 'proc_scatteraddr', 'proc_patchaddr', 'patch_edgeaddr']:
+            setattr(light, name, {})
+        comm.bcast(light, root=0)
+        bcast_arrays(comm, r.get_addressing())
+        return r
+    r = comm.bcast(None, root=0)
+    r.set_addressing(bcast_arrays(comm, {}))
+    return r
+
+def report_ranks(comm, times, busy): #times written and seconds spent by every rank, printed by rank 0
+    report = comm.gather([times, busy], root=0)
+    if comm.Get_rank() == 0:
+        for i in range(len(report)):
+            print('Rank = '+str(i)+'  times = '+str(report[i][0])+'  busy = '+str(round(report[i][1], 2))+' s')
+
+#With the processes backend the times are written by a pool of processes instead of MPI ranks. The processes are forked from the main one, so the
+#runCase built there is shared as copy-on-write memory instead of being sent, and they take the times one by one from the queue of the pool. //AG
+shared = {}  #the runCase of a process of the pool
+
+def share_case(case, ranks):
+    pools.clear()  #the pools of the main process cannot be used in a forked one
+    case.rank = ranks.get()
+    shared['case'] = case
+
+def write_pool_time(path, time):
+    case = shared['case']
+    case.write_queued_time(path, time)
+    return [case.rank, len(case.t_rank), case.t_busy]
+
+def write_processes(case, path, times, processes):
+    if ('fork' in multiprocessing.get_all_start_methods()) == True:
+        context = multiprocessing.get_context('fork')
+    else: #without fork the runCase is pickled for every process
+        context = multiprocessing.get_context()
+    ranks = context.Queue()
+    for i in range(1, processes+1):
+        ranks.put(i)
+    report = {}
+    with concurrent.futures.ProcessPoolExecutor(max_workers=processes, mp_context=context, initializer=share_case, initargs=(case, ranks)) as pool:
+        for [rank, number, busy] in pool.map(write_pool_time, [path]*len(times), times):
+            report[rank] = [number, busy]
+    for rank in sorted(report.keys()):
+        print('Rank = '+str(rank)+'  times = '+str(report[rank][0])+'  busy = '+str(round(report[rank][1], 2))+' s')
+
+def create_files_list(path, time): #names of the files of a time, from the case index. Compressed files are listed with their plain name
+    listdir = []
+    for name in case_index(path)['times']:
+        if float(name) == float(time):
+            for file in index_files(path, name):
+                if file[-3:] == '.gz':
+                    file = file[:-3]
+                listdir.append(file)
     return listdir
 
+#The files of every processor can be read by a pool of processes (workers > 1). The pool is created on first use and reused by every reader.
+#The readers send back numpy arrays and dictionaries of arrays, which are much cheaper to pickle than lists of python objects. //AG
+pools = {}
+
+def get_pool(workers):
+    if (workers in pools.keys()) == False:
+        pools[workers] = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+    return pools[workers]
+
+def map_processors(function, args, workers = 1):
+    if workers > 1 and len(args) > 1:
+        return list(get_pool(workers).map(function, *zip(*args)))
+    return [function(*arg) for arg in args]
+
+#The fields of a time can be reconstructed by a pool of threads (fields > 1), every thread reading, scattering and writing one field. The parsing of
+#the processor files goes to the pool of processes of workers. A memoryBudget keeps the fields that are being reconstructed at the same time below
+#the memory given, a field waits until the ones running leave room for it (a field larger than the whole budget runs alone). //AG
+field_lock = threading.Lock()  #the manifests of the incremental mode are shared by the threads
+
+class memoryBudget:
+        def __init__(self, limit):
+                self.limit = limit  #bytes, 0 = no limit
+                self.used = 0
+                self.condition = threading.Condition()
+
+        def acquire(self, size):
+                with self.condition:
+                    while self.limit > 0 and self.used > 0 and self.used+size > self.limit:
+                        self.condition.wait()
+                    self.used += size
+
+        def release(self, size):
+                with self.condition:
+                    self.used -= size
+                    self.condition.notify_all()
+
 def read_proc_number_faces(path, n_proc, output):
     for p in range(n_proc):
         list = []
@@ -354,29 +893,77 @@ def read_proc_number_edges(path, n_proc, output, proc_fB):
         dict['internal'] = dict['Total'] - sum
         output['processor'+str(p)] = dict
            
-def read_proc_faBoundary(path, n_proc, output):
+def read_proc_faBoundary(path, n_proc, output, workers = 1):
+    args = [(path+'/processor'+str(p),) for p in range(n_proc)]
+    dicts = map_processors(get_faBoundary_dict, args, workers)
     for p in range(n_proc):
-        dict = {}
-        read_faBoundary(path+'/processor'+str(p), dict)
-        output['processor'+str(p)] = dict
+        output['processor'+str(p)] = dicts[p]
 
-def read_proc_faceaddr(path, n_proc, output):
+def get_faBoundary_dict(path):
+    dict = {}
+    read_faBoundary(path, dict)
+    return dict
+
+def read_proc_faceaddr(path, n_proc, output, workers = 1):
+    args = [(path+'/processor'+str(p)+'/constant/faMesh/faceProcAddressing',) for p in range(n_proc)]
+    lists = map_processors(read_labelList, args, workers)
     for p in range(n_proc):
-        list = []
-        get_input(path+'/processor'+str(p)+'/constant/faMesh/faceProcAddressing',list)
-        list = list[2:-1]
-        for i in range(len(list)):
-            list[i] = int(list[i][0])
-        output['processor'+str(p)] = list               
+        output['processor'+str(p)] = lists[p].tolist()
 
-def read_proc_edgeaddr(path, n_proc, output):
+def read_proc_edgeaddr(path, n_proc, output, workers = 1):
+    args = [(path+'/processor'+str(p)+'/constant/faMesh/edgeProcAddressing',) for p in range(n_proc)]
+    lists = map_processors(read_labelList, args, workers)
     for p in range(n_proc):
-        list = []
-        get_input(path+'/processor'+str(p)+'/constant/faMesh/edgeProcAddressing',list)
-        list = list[2:-1]
-        for i in range(len(list)):
-            list[i] = int(list[i][0])
-        output['processor'+str(p)] = list  
+        output['processor'+str(p)] = lists[p].tolist()
+
+def read_labelList(path): #labels of a faceProcAddressing or edgeProcAddressing file
+    if is_binary(path) == True:
+        return get_binary_List(path, 'label')
+    list = []
+    get_input(path,list)
+    list = list[2:-1]
+    for i in range(len(list)):
+        list[i] = int(list[i][0])
+    return np.array(list, dtype=np.int64)
+
+#Vector fields are stored as (n,3) arrays, every other type as a flat array
+def create_List(n, type):
+    if type == 'vector':
+        return np.full((n,3), -9999.0)
+    else:
+        return np.full(n, -9999.0)
+
+#The edge centres of the processors are matched with the global ones through a hash of their coordinates divided by the tolerance.
+#A centre is looked for in its cell and in the 26 cells around it, so two centres closer than the tolerance are always found. //AG
+def hash_points(points, tolerance):
+    grid = {}
+    cells = np.floor(np.asarray(points, dtype=np.float64).reshape(-1,3)/tolerance).astype(np.int64)
+    for i, cell in enumerate(cells.tolist()):
+        grid.setdefault(tuple(cell), []).append(i)
+    return grid
+
+def find_points(grid, points, targets, tolerance): #index in points of every target, the closest one within the tolerance
+    points = np.asarray(points, dtype=np.float64).reshape(-1,3).tolist()
+    targets = np.asarray(targets, dtype=np.float64).reshape(-1,3)
+    cells = np.floor(targets/tolerance).astype(np.int64).tolist()
+    targets = targets.tolist()
+    around = [(0,0,0)] + [(i,j,k) for i in (-1,0,1) for j in (-1,0,1) for k in (-1,0,1) if (i,j,k) != (0,0,0)]
+    indexes = []
+    for n, cell in enumerate(cells):
+        index = -1
+        distance = tolerance
+        for offset in around:
+            for i in grid.get((cell[0]+offset[0], cell[1]+offset[1], cell[2]+offset[2]), []):
+                d = max(abs(points[i][0]-targets[n][0]), abs(points[i][1]-targets[n][1]), abs(points[i][2]-targets[n][2]))
+                if d <= distance:
+                    index = i
+                    distance = d
+            if distance == 0:
+                break
+        if index == -1:
+            raise ValueError('edge centre '+str(targets[n])+' without match within '+str(tolerance))
+        indexes.append(index)
+    return indexes
 
 class areaField:
         def __init__(self,type,internalField, boundaryField, dimension):
@@ -428,13 +1015,12 @@ class internalField:
                             for i in range(n):
                                 self.field.append(float(list[i]))
                         elif type == 'vector':
-                            for i in range(n):
-                                self.field.append(vector(list[i][0],list[i][1],list[i][2]))
+                            self.field = np.array(list[:n], dtype=np.float64).reshape(n,3)
                     elif self.u == 'uniform':
                         if type == 'scalar':
                             self.field.append(float(dict['internalField'][0][1]))
                         elif type == 'vector':
-                            self.field.append(vector(dict['internalField'][0][1:][0],dict['internalField'][0][1:][1],dict['internalField'][0][1:][2]))
+                            self.field = np.array([dict['internalField'][0][1:4]], dtype=np.float64)
                 else:
                     self.u = dict['u']
                     self.field = dict['field']
@@ -492,10 +1078,12 @@ class boundaryField:
                             sublist = []
                             if faBoundary['boundaries'][key] != 0:
                                 if type == 'vector':
-                                    v = vector(value[1:][0],value[1:][1],value[1:][2])
+                                    v = value[1:4]
                                 elif type == 'scalar':
                                     v= float(value[1:][0])
                                 sublist.append(v)                            
+                            if type == 'vector':
+                                sublist = np.array(sublist, dtype=np.float64).reshape(len(sublist),3)
                             subdict['List'] = sublist
                             self.d[key]['value'] = subdict
                         elif self.d[key]['value'][0][0] == 'nonuniform':
@@ -507,10 +1095,12 @@ class boundaryField:
                                 value = self.d[key].pop(str(len(faBoundary['boundaries'][key])))
                                 for i in range(len(value)):
                                     if type == 'vector':
-                                        v = vector(value[i][0],value[i][1],value[i][2])
+                                        v = value[i]
                                     elif type == 'scalar':
                                         v= float(value[i])
                                     sublist.append(v)
+                            if type == 'vector':
+                                sublist = np.array(sublist, dtype=np.float64).reshape(len(sublist),3)
                             subdict['List'] = sublist
                             self.d[key]['value'] = subdict
                 else:
@@ -518,20 +1108,30 @@ class boundaryField:
             for key in pop_list:
                 self.d.pop(key)
                         
-def read_areaField_proc(path, time, name, type, output, n_processors, proc_fB, proc_nF):
+def read_areaField_proc(path, time, name, type, output, n_processors, proc_fB, proc_nF, workers = 1):
+    args = []
+    for p in range(n_processors):
+        args.append((path+'/processor'+str(p)+'/'+str(time)+'/'+name, type, proc_nF['processor'+str(p)], proc_fB['processor'+str(p)]))
+    fields = map_processors(read_proc_field, args, workers)
     dict = {}
     for p in range(n_processors):
-        list = []
-        get_input(path+'/processor'+str(p)+'/'+str(time)+'/'+name,list)
-        list = correct_bFEdgeFields(list,type)
-        field = {}
-        read_dictionary(list,field)
-        dimension = dimensions(field['dimensions'])
-        boundaryfield = boundaryField(field['boundaryField'],type,proc_fB['processor'+str(p)])
-        internalfield = internalField(field,type,proc_nF['processor'+str(p)])
-        dict['processor'+str(p)] = areaField(type,internalfield,boundaryfield,dimension)
+        dict['processor'+str(p)] = fields[p]
     output[str(time)] = dict
 
+def read_proc_field(path, type, number, faBoundary):
+    list = []
+    iF = get_field_input(path,list,type)
+    list = correct_bFEdgeFields(list,type)
+    field = {}
+    read_dictionary(list,field)
+    dimension = dimensions(field['dimensions'])
+    boundaryfield = boundaryField(field['boundaryField'],type,faBoundary)
+    if iF != {}:
+        internalfield = internalField(iF,type,number,False)
+    else:
+        internalfield = internalField(field,type,number)
+    return areaField(type,internalfield,boundaryfield,dimension)
+
 def correct_bFEdgeFields(list,type): #This is incredibly inefficient. It must be improved in a future version. //AG
     # Since this is useful only for simulations generated by the newest versions of OpenFOAM, it might be useful to get the version inside the code
     # and apply the correction only if it is completely necessary. //AG
@@ -544,67 +1144,66 @@ def correct_bFEdgeFields(list,type): #This is incredibly inefficient. It must be
         new_list.append(list[i])
     return new_list
 
-def read_edgeField_proc(path, time, name, type, output, n_processors, proc_fB, proc_nE):
+def read_edgeField_proc(path, time, name, type, output, n_processors, proc_fB, proc_nE, workers = 1):
+    args = []
+    for p in range(n_processors):
+        args.append((path+'/processor'+str(p)+'/'+str(time)+'/'+name, type, proc_nE['processor'+str(p)]['internal'], proc_fB['processor'+str(p)]))
+    fields = map_processors(read_proc_field, args, workers)
     dict = {}
     for p in range(n_processors):
-        list = []
-        get_input(path+'/processor'+str(p)+'/'+str(time)+'/'+name,list)
-        list = correct_bFEdgeFields(list,type)
-        field = {}
-        read_dictionary(list,field)
-        dimension = dimensions(field['dimensions'])
-        boundaryfield = boundaryField(field['boundaryField'],type,proc_fB['processor'+str(p)])
-        internalfield = internalField(field,type,proc_nE['processor'+str(p)]['internal'])
-        dict['processor'+str(p)] = areaField(type,internalfield,boundaryfield,dimension)
+        dict['processor'+str(p)] = fields[p]
     output[str(time)] = dict
 
 def read_edgeField(path,time,name,type,output,number_edges,faBoundary):
     list = []
-    get_input(path+'/'+str(time)+'/'+name,list)
+    iF = get_field_input(path+'/'+str(time)+'/'+name,list,type)
     field = {}
     read_dictionary(list,field)
     dimension = dimensions(field['dimensions'])
     boundaryfield = boundaryField(field['boundaryField'],type,faBoundary)
-    internalfield = internalField(field,type,number_edges)
+    if iF != {}:
+        internalfield = internalField(iF,type,number_edges,False)
+    else:
+        internalfield = internalField(field,type,number_edges)
     output[str(time)] = areaField(type,internalfield,boundaryfield,dimension)
 
 def read_ec(path,output, number_edges,faBoundary):
     read_edgeField(path, 0, 'ec','vector',output, number_edges,faBoundary)
 
-def read_ec_proc(path,output,n_processors, proc_fB, proc_nE):
-    read_edgeField_proc(path, 0, 'ec','vector',output, n_processors, proc_fB, proc_nE)
+def read_ec_proc(path,output,n_processors, proc_fB, proc_nE, workers = 1):
+    read_edgeField_proc(path, 0, 'ec','vector',output, n_processors, proc_fB, proc_nE, workers)
        
-def read_h_proc(path, time, output, n_processors, proc_fB, proc_nF):
-    read_areaField_proc(path, time, 'h','scalar',output, n_processors, proc_fB, proc_nF)
+def read_h_proc(path, time, output, n_processors, proc_fB, proc_nF, workers = 1):
+    read_areaField_proc(path, time, 'h','scalar',output, n_processors, proc_fB, proc_nF, workers)
 
-def read_pb_proc(path, time, output, n_processors, proc_fB, proc_nF):
-    read_areaField_proc(path, time, 'pb','scalar',output, n_processors, proc_fB, proc_nF)
+def read_pb_proc(path, time, output, n_processors, proc_fB, proc_nF, workers = 1):
+    read_areaField_proc(path, time, 'pb','scalar',output, n_processors, proc_fB, proc_nF, workers)
                 
-def read_Cv_proc(path, time, output, n_processors, proc_fB, proc_nF):
-    read_areaField_proc(path, time, 'Cv','scalar',output, n_processors, proc_fB, proc_nF)
+def read_Cv_proc(path, time, output, n_processors, proc_fB, proc_nF, workers = 1):
+    read_areaField_proc(path, time, 'Cv','scalar',output, n_processors, proc_fB, proc_nF, workers)
                 
-def read_deltac0_proc(path, time, output, n_processors, proc_fB, proc_nF):
-    read_areaField_proc(path, time, 'deltac0','scalar',output, n_processors, proc_fB, proc_nF)
+def read_deltac0_proc(path, time, output, n_processors, proc_fB, proc_nF, workers = 1):
+    read_areaField_proc(path, time, 'deltac0','scalar',output, n_processors, proc_fB, proc_nF, workers)
 
-def read_deltah0_proc(path, time, output, n_processors, proc_fB, proc_nF):
-    read_areaField_proc(path, time, 'deltah0','scalar',output, n_processors, proc_fB, proc_nF)
+def read_deltah0_proc(path, time, output, n_processors, proc_fB, proc_nF, workers = 1):
+    read_areaField_proc(path, time, 'deltah0','scalar',output, n_processors, proc_fB, proc_nF, workers)
 
-def read_Us_proc(path, time, output, n_processors, proc_fB, proc_nF):
-    read_areaField_proc(path, time, 'Us','vector',output, n_processors, proc_fB, proc_nF)
+def read_Us_proc(path, time, output, n_processors, proc_fB, proc_nF, workers = 1):
+    read_areaField_proc(path, time, 'Us','vector',output, n_processors, proc_fB, proc_nF, workers)
 
-def read_tau_proc(path, time, output, n_processors, proc_fB, proc_nF):
-    read_areaField_proc(path, time, 'tau','vector',output, n_processors, proc_fB, proc_nF)
+def read_tau_proc(path, time, output, n_processors, proc_fB, proc_nF, workers = 1):
+    read_areaField_proc(path, time, 'tau','vector',output, n_processors, proc_fB, proc_nF, workers)
 
-def read_Q_proc(path, time, output, n_processors, proc_fB, proc_nE):
-    read_edgeField_proc(path, time, 'Q','scalar',output, n_processors, proc_fB, proc_nE)
+def read_Q_proc(path, time, output, n_processors, proc_fB, proc_nE, workers = 1):
+    read_edgeField_proc(path, time, 'Q','scalar',output, n_processors, proc_fB, proc_nE, workers)
 
-def read_phi2s_proc(path, time, output, n_processors, proc_fB, proc_nE):
-    read_edgeField_proc(path, time, 'phi2s','scalar',output, n_processors, proc_fB, proc_nE)
+def read_phi2s_proc(path, time, output, n_processors, proc_fB, proc_nE, workers = 1):
+    read_edgeField_proc(path, time, 'phi2s','scalar',output, n_processors, proc_fB, proc_nE, workers)
 
 ##########################################  runCase class  ##############################################################
 
 class runCase:
-        def __init__(self,path, h='on',Cv='on',deltaz0='on',Us='on',Q='on',pb='on',tau='on', phi2s = 'on', rank = 0):
+        def __init__(self,path, h='on',Cv='on',deltaz0='on',Us='on',Q='on',pb='on',tau='on', phi2s = 'on', rank = 0, workers = 1, time = '', latestTime = False, stride = 1, tolerance = 1e-6, incremental = False, binary = False, fields = 1, field_memory = 0, archive = ''):
                 self.t= []
                 self.h_proc  = {}               
                 self.Cv_proc = {}
@@ -638,8 +1237,22 @@ class runCase:
                 self.proc_ec = {}
                 self.proc_faceaddr = {}
                 self.proc_edgeaddr = {}
-                self.t_size = []  # time list used when runnning in parallel                
+                self.proc_patchaddr = {}  #position in the global patch of every edge of the processor patches
+                self.proc_scatteraddr = {}  #global faces and edges of every processor as index arrays
+                self.patch_edgeaddr = {}  #global edges of every patch as index arrays
+                self.t_rank = []  #times written by this rank when running in parallel
+                self.t_busy = 0  #seconds spent writing them
                 self.rank = rank  #processor number
+                self.workers = workers  #processes reading the processor files
+                self.time_selection = [time, latestTime, stride]  #-time, -latestTime and -stride options
+                self.tolerance = tolerance  #largest distance between the edge centres of a processor and the global ones of the same edge
+                self.incremental = (incremental == 'on' or incremental == 'yes' or incremental == True)  #only the new or changed fields are reconstructed
+                self.binary = (binary == 'on' or binary == 'yes' or binary == True)  #fields written in the binary format of OpenFOAM
+                self.fields = fields  #threads reconstructing the fields of a time at the same time
+                self.field_memory = field_memory  #memory (MB) of the fields reconstructed at the same time (0 = no limit)
+                self.archive = archive  #file with the fields of all the times instead of the time directories ('' = time directories)
+                self.manifests = {}  #mtime and size of the processor files of the fields written, by time
+                self.sources = {}  #mtime and size of the processor files of the fields being written
                
                 self.h_flag  = h
                 self.Cv_flag = Cv
@@ -657,6 +1270,8 @@ class runCase:
         def get_case(self):
                 self.get_time()
                 self.get_files_names()
+                if self.read_addressing() == True:
+                    return
                 self.get_proc_nF()
                 self.get_faBoundary()
                 self.get_nEdges()
@@ -667,16 +1282,21 @@ class runCase:
                 self.get_ec()
                 self.get_proc_ec()
                 self.order_proc_faBoundary()
+                self.get_proc_patchaddr()
+                self.get_proc_scatteraddr()
+                self.write_addressing()
 
         def get_time(self):
                 if self.rank == 0:
                     print ('Reading times ...')
                 create_time(self.p+'/processor0', self.t)
+                index = select_time(self.t, self.time_selection[0], self.time_selection[1], self.time_selection[2])
+                self.t[:] = [self.t[i] for i in index]
 
         def get_files_names(self):
                 if self.rank == 0:
                     print ('Reading files names ...')
-                files_list = create_files_list(self.p+'/processor0'+'/'+str(self.t[-1]))
+                files_list = create_files_list(self.p+'/processor0', self.t[-1])
 
                 if (self.h_flag == 'on' or  self.h_flag == True) and not('h' in files_list):
                     self.h_flag = 'off'
@@ -721,31 +1341,17 @@ class runCase:
         def get_proc_faBoundary(self):
                 if self.rank == 0:
                     print ('Reading processors faBoundary ...')            
-                read_proc_faBoundary(self.p, self.np, self.proc_fB)
+                read_proc_faBoundary(self.p, self.np, self.proc_fB, self.workers)
 
         def get_proc_faceaddr(self):
                 if self.rank == 0:
                     print ('Reading processors faceaddressing ...')            
-                read_proc_faceaddr(self.p, self.np, self.proc_faceaddr)
+                read_proc_faceaddr(self.p, self.np, self.proc_faceaddr, self.workers)
 
         def get_proc_edgeaddr(self):
                 if self.rank == 0:
                     print ('Reading processors edgeaddressing ...')            
-                read_proc_edgeaddr(self.p, self.np, self.proc_edgeaddr)
-
-        def create_t_size(self, size, withZero):
-                for i in range(size):
-                    sub_list = []
-                    for j in range(int(len(self.t)/size)):
-                        sub_list.append(self.t[j*size+i])
-                    self.t_size.append(sub_list)
-                if withZero == False:
-                    self.t_size[0].pop(0)
-                    for i in range(len(self.t)-int(len(self.t)/size)*size):
-                        self.t_size[i].append(self.t[int(len(self.t)/size)*size+i])
-                else:
-                    for i in range(len(self.t)-int(len(self.t)/size)*size):
-                        self.t_size[i+1].append(self.t[int(len(self.t)/size)*size+i])                
+                read_proc_edgeaddr(self.p, self.np, self.proc_edgeaddr, self.workers)
 
         def get_ec(self):
                 if self.rank == 0:
@@ -755,7 +1361,7 @@ class runCase:
         def get_proc_ec(self):
                 if self.rank == 0:
                     print('Reading processor ec field ...')            
-                read_ec_proc(self.p,self.proc_ec,self.np, self.proc_fB, self.proc_nE)
+                read_ec_proc(self.p,self.proc_ec,self.np, self.proc_fB, self.proc_nE, self.workers)
 
         def get_h(self, report = True, time = -1):                
                 if (self.h_flag == 'on' or self.h_flag == 'yes' or self.h_flag == True):
@@ -763,9 +1369,9 @@ class runCase:
                         print('Reading h field ...')
                     if time == -1:
                         for t in self.t:
-                            read_h_proc(self.p, t, self.h_proc, self.np, self.proc_fB, self.proc_nF)
+                            read_h_proc(self.p, t, self.h_proc, self.np, self.proc_fB, self.proc_nF, self.workers)
                     else:
-                        read_h_proc(self.p, time, self.h_proc, self.np, self.proc_fB, self.proc_nF)
+                        read_h_proc(self.p, time, self.h_proc, self.np, self.proc_fB, self.proc_nF, self.workers)
 
         def get_Cv(self, report = True, time = -1):                
                 if (self.Cv_flag == 'on' or self.Cv_flag == 'yes' or self.Cv_flag == True):
@@ -773,9 +1379,9 @@ class runCase:
                         print('Reading Cv field ...')
                     if time == -1:
                         for t in self.t:
-                            read_Cv_proc(self.p, t, self.Cv_proc, self.np, self.proc_fB, self.proc_nF)
+                            read_Cv_proc(self.p, t, self.Cv_proc, self.np, self.proc_fB, self.proc_nF, self.workers)
                     else:
-                        read_Cv_proc(self.p, time, self.Cv_proc, self.np, self.proc_fB, self.proc_nF)
+                        read_Cv_proc(self.p, time, self.Cv_proc, self.np, self.proc_fB, self.proc_nF, self.workers)
 
         def get_pb(self, report = True, time = -1):                
                 if (self.pb_flag == 'on' or self.pb_flag == 'yes' or self.pb_flag == True):
@@ -783,9 +1389,9 @@ class runCase:
                         print('Reading pb field ...')
                     if time == -1:
                         for t in self.t:
-                            read_pb_proc(self.p, t, self.pb_proc, self.np, self.proc_fB, self.proc_nF)
+                            read_pb_proc(self.p, t, self.pb_proc, self.np, self.proc_fB, self.proc_nF, self.workers)
                     else:
-                        read_pb_proc(self.p, time, self.pb_proc, self.np, self.proc_fB, self.proc_nF)
+                        read_pb_proc(self.p, time, self.pb_proc, self.np, self.proc_fB, self.proc_nF, self.workers)
 
         def get_deltaz0(self, report = True, time = -1):                
                 if (self.deltac0_flag == 'on' or self.deltac0_flag == 'yes' or self.deltac0_flag == True):
@@ -793,17 +1399,17 @@ class runCase:
                         print('Reading deltac0 field ...')
                     if time == -1:
                         for t in self.t:
-                            read_deltac0_proc(self.p, t, self.deltac0_proc, self.np, self.proc_fB, self.proc_nF)
+                            read_deltac0_proc(self.p, t, self.deltac0_proc, self.np, self.proc_fB, self.proc_nF, self.workers)
                     else:
-                        read_deltac0_proc(self.p, time, self.deltac0_proc, self.np, self.proc_fB, self.proc_nF)
+                        read_deltac0_proc(self.p, time, self.deltac0_proc, self.np, self.proc_fB, self.proc_nF, self.workers)
                 elif (self.deltah0_flag == 'on' or self.deltah0_flag == 'yes' or self.deltah0_flag == True):
                     if report == True:
                         print('Reading deltah0 field ...')
                     if time == -1:
                         for t in self.t:
-                            read_deltah0_proc(self.p, t, self.deltah0_proc, self.np, self.proc_fB, self.proc_nF)
+                            read_deltah0_proc(self.p, t, self.deltah0_proc, self.np, self.proc_fB, self.proc_nF, self.workers)
                     else:
-                        read_deltah0_proc(self.p, time, self.deltah0_proc, self.np, self.proc_fB, self.proc_nF)
+                        read_deltah0_proc(self.p, time, self.deltah0_proc, self.np, self.proc_fB, self.proc_nF, self.workers)
 
         def get_Us(self, report = True, time = -1):                
                 if (self.Us_flag == 'on' or self.Us_flag == 'yes' or self.Us_flag == True):
@@ -811,9 +1417,9 @@ class runCase:
                         print('Reading Us field ...')
                     if time == -1:
                         for t in self.t:
-                            read_Us_proc(self.p, t, self.Us_proc, self.np, self.proc_fB, self.proc_nF)
+                            read_Us_proc(self.p, t, self.Us_proc, self.np, self.proc_fB, self.proc_nF, self.workers)
                     else:
-                        read_Us_proc(self.p, time, self.Us_proc, self.np, self.proc_fB, self.proc_nF)
+                        read_Us_proc(self.p, time, self.Us_proc, self.np, self.proc_fB, self.proc_nF, self.workers)
 
         def get_tau(self, report = True, time = -1):                
                 if (self.tau_flag == 'on' or self.tau_flag == 'yes' or self.tau_flag == True):
@@ -821,9 +1427,9 @@ class runCase:
                         print('Reading tau field ...')
                     if time == -1:
                         for t in self.t:
-                            read_tau_proc(self.p, t, self.tau_proc, self.np, self.proc_fB, self.proc_nF)
+                            read_tau_proc(self.p, t, self.tau_proc, self.np, self.proc_fB, self.proc_nF, self.workers)
                     else:
-                        read_tau_proc(self.p, time, self.tau_proc, self.np, self.proc_fB, self.proc_nF)
+                        read_tau_proc(self.p, time, self.tau_proc, self.np, self.proc_fB, self.proc_nF, self.workers)
 
         def get_Q(self, report = True, time = -1):                
                 if (self.Q_flag == 'on' or self.Q_flag == 'yes' or self.Q_flag == True):
@@ -831,9 +1437,9 @@ class runCase:
                         print('Reading Q field ...')
                     if time == -1:
                         for t in self.t:
-                            read_Q_proc(self.p, t, self.Q_proc, self.np, self.proc_fB, self.proc_nE)
+                            read_Q_proc(self.p, t, self.Q_proc, self.np, self.proc_fB, self.proc_nE, self.workers)
                     else:
-                        read_Q_proc(self.p, time, self.Q_proc, self.np, self.proc_fB, self.proc_nE)
+                        read_Q_proc(self.p, time, self.Q_proc, self.np, self.proc_fB, self.proc_nE, self.workers)
 
         def get_phi2s(self, report = True, time = -1):                
                 if (self.phi2s_flag == 'on' or self.phi2s_flag == 'yes' or self.phi2s_flag == True):
@@ -841,9 +1447,9 @@ class runCase:
                         print('Reading phi2s field ...')
                     if time == -1:
                         for t in self.t:
-                            read_phi2s_proc(self.p, t, self.phi2s_proc, self.np, self.proc_fB, self.proc_nE)
+                            read_phi2s_proc(self.p, t, self.phi2s_proc, self.np, self.proc_fB, self.proc_nE, self.workers)
                     else:
-                        read_phi2s_proc(self.p, time, self.phi2s_proc, self.np, self.proc_fB, self.proc_nE)
+                        read_phi2s_proc(self.p, time, self.phi2s_proc, self.np, self.proc_fB, self.proc_nE, self.workers)
 
         def create_h(self, report = True, time = -1):                
                 if (self.h_flag == 'on' or self.h_flag == 'yes' or self.h_flag == True):
@@ -936,13 +1542,14 @@ class runCase:
         def create_areaField(self, time, field_proc, field_func, field, type):
                 if (str(time) in field_proc.keys()) == False:
                     field_func(False, time)
-                list = [-9999]*self.nF
+                list = create_List(self.nF, type)
                 for p in range(self.np):
-                    for i in range(self.proc_nF['processor'+str(p)]):
-                        if field_proc[str(time)]['processor'+str(p)].iF.u == 'uniform':
-                            list[self.proc_faceaddr['processor'+str(p)][i]] = field_proc[str(time)]['processor'+str(p)].iF.field[0]
-                        else:
-                            list[self.proc_faceaddr['processor'+str(p)][i]] = field_proc[str(time)]['processor'+str(p)].iF.field[i]
+                    iF = field_proc[str(time)]['processor'+str(p)].iF
+                    faceaddr = self.proc_scatteraddr['processor'+str(p)]['faces']
+                    if iF.u == 'uniform':
+                        list[faceaddr] = iF.field[0]
+                    else:
+                        list[faceaddr] = iF.field[:len(faceaddr)]
                 dict_iF = {}                
                 dict_iF['field'] = list
                 dict_iF['u'] = 'nonuniform'
@@ -960,23 +1567,20 @@ class runCase:
                             dict_bF[patch_key]['type'] = field_proc[str(time)][proc_key].bF.d[patch_key]['type']
                             value_dict = {}
                             value_dict['uniform'] = 'nonuniform'
-                            value_dict['List'] = [-9999]*len(self.fB['boundaries'][patch_key])
+                            value_dict['List'] = create_List(len(self.fB['boundaries'][patch_key]), type)
                             dict_bF[patch_key]['value'] = value_dict
                             
                 for proc_key in field_proc[str(time)].keys():
                     for patch_key in field_proc[str(time)][proc_key].bF.d.keys():
                         if field_proc[str(time)][proc_key].bF.d[patch_key]['type'] == 'fixedValue' or field_proc[str(time)][proc_key].bF.d[patch_key]['type'] == 'calculated':
-                            proc_fB = self.proc_fB[proc_key]['boundaries'][patch_key]
-                            fB = self.fB['boundaries'][patch_key]
+                            patchaddr = self.proc_patchaddr[proc_key][patch_key]
                             values = field_proc[str(time)][proc_key].bF.d[patch_key]['value']['List']
+                            if len(patchaddr) == 0:
+                                continue
                             if field_proc[str(time)][proc_key].bF.d[patch_key]['value']['uniform'] == 'yes':
-                                for i in range(len(self.proc_fB[proc_key]['boundaries'][patch_key])):
-                                    index = fB.index(self.proc_edgeaddr[proc_key][proc_fB[i]])
-                                    dict_bF[patch_key]['value']['List'][index] = values[0]
+                                dict_bF[patch_key]['value']['List'][patchaddr] = values[0]
                             else:
-                                for i in range(len(values)):
-                                    index = fB.index(self.proc_edgeaddr[proc_key][proc_fB[i]])
-                                    dict_bF[patch_key]['value']['List'][index] = values[i]                                
+                                dict_bF[patch_key]['value']['List'][patchaddr] = values[:len(patchaddr)]
                 
                 boundaryfield = boundaryField(dict_bF,type,0,False)                
                 field[str(time)] = areaField(type,internalfield,boundaryfield,dimension)
@@ -984,24 +1588,22 @@ class runCase:
         def create_edgeField(self, time, field_proc, field_func, field, type):
                 if (str(time) in field_proc.keys()) == False:
                     field_func(False, time)
-                list = [-9999]*self.nE['Total']
-
+                list = create_List(self.nE['Total'], type)
                 for p in range(self.np):
-                    if field_proc[str(time)]['processor'+str(p)].iF.u == 'uniform':
-                        for i in range(self.proc_nE['processor'+str(p)]['internal']):
-                            list[self.proc_edgeaddr['processor'+str(p)][i]] = field_proc[str(time)]['processor'+str(p)].iF.field[0]
+                    proc_field = field_proc[str(time)]['processor'+str(p)]
+                    scatteraddr = self.proc_scatteraddr['processor'+str(p)]
+                    if proc_field.iF.u == 'uniform':
+                        list[scatteraddr['edges']] = proc_field.iF.field[0]
                     else:
-                        for i in range(self.proc_nE['processor'+str(p)]['internal']):
-                            list[self.proc_edgeaddr['processor'+str(p)][i]] = field_proc[str(time)]['processor'+str(p)].iF.field[i]
+                        list[scatteraddr['edges']] = proc_field.iF.field[:len(scatteraddr['edges'])]
                     for key in self.proc_fB['processor'+str(p)]['boundaries'].keys():
-                        if field_proc[str(time)]['processor'+str(p)].bF.d[key]['value']['uniform'] == 'yes':
-                            for i in range(len(self.proc_fB['processor'+str(p)]['boundaries'][key])):
-                                index = self.proc_fB['processor'+str(p)]['boundaries'][key][i]
-                                list[self.proc_edgeaddr['processor'+str(p)][index]] = field_proc[str(time)]['processor'+str(p)].bF.d[key]['value']['List'][0]
+                        if len(scatteraddr['boundaries'][key]) == 0:
+                            continue
+                        values = proc_field.bF.d[key]['value']['List']
+                        if proc_field.bF.d[key]['value']['uniform'] == 'yes':
+                            list[scatteraddr['boundaries'][key]] = values[0]
                         else:
-                            for i in range(len(self.proc_fB['processor'+str(p)]['boundaries'][key])):
-                                index = self.proc_fB['processor'+str(p)]['boundaries'][key][i]
-                                list[self.proc_edgeaddr['processor'+str(p)][index]] = field_proc[str(time)]['processor'+str(p)].bF.d[key]['value']['List'][i]
+                            list[scatteraddr['boundaries'][key]] = values[:len(scatteraddr['boundaries'][key])]
                 dict_iF = {}
                 dict_iF['field'] = list[:self.nE['internal']]
                 dict_iF['u'] = 'nonuniform'
@@ -1017,109 +1619,301 @@ class runCase:
                             dict_bF[patch_key]['type'] = 'calculated'
                             value_dict = {}
                             value_dict['uniform'] = 'nonuniform'
-                            value_dict['List'] = [-9999]*len(self.fB['boundaries'][patch_key])
+                            value_dict['List'] = create_List(len(self.fB['boundaries'][patch_key]), type)
                             dict_bF[patch_key]['value'] = value_dict
                             
                 for patch_key in dict_bF.keys():
-                    for i in range(len(self.fB['boundaries'][patch_key])):
-                        dict_bF[patch_key]['value']['List'][i] = list[self.fB['boundaries'][patch_key][i]]
+                    dict_bF[patch_key]['value']['List'][:] = list[self.patch_edgeaddr[patch_key]]
 
                 boundaryfield = boundaryField(dict_bF,type,0,False)
                 field[str(time)] = areaField(type,internalfield,boundaryfield,dimension)
 
+        def get_proc_patchaddr(self): #built once per case with a dictionary from global edge to patch position, so no patch is searched edge by edge
+                patch_index = {}
+                for patch_key in self.fB['boundaries'].keys():
+                    patch_index[patch_key] = {}
+                    for i in range(len(self.fB['boundaries'][patch_key])):
+                        patch_index[patch_key][self.fB['boundaries'][patch_key][i]] = i
+                for proc_key in self.proc_fB.keys():
+                    self.proc_patchaddr[proc_key] = {}
+                    for patch_key in self.proc_fB[proc_key]['boundaries'].keys():
+                        if (patch_key in patch_index) == False:
+                            continue
+                        patchaddr = []
+                        for edge in self.proc_fB[proc_key]['boundaries'][patch_key]:
+                            patchaddr.append(patch_index[patch_key][self.proc_edgeaddr[proc_key][edge]])
+                        self.proc_patchaddr[proc_key][patch_key] = np.array(patchaddr, dtype=np.int64)
+
+        def get_proc_scatteraddr(self): #global positions of every processor face and edge as index arrays, so a field is scattered with one assignment per processor
+                for key in self.fB['boundaries'].keys():
+                    self.patch_edgeaddr[key] = np.array(self.fB['boundaries'][key], dtype=np.int64)
+                for p in range(self.np):
+                    proc_key = 'processor'+str(p)
+                    scatteraddr = {}
+                    scatteraddr['faces'] = np.array(self.proc_faceaddr[proc_key][:self.proc_nF[proc_key]], dtype=np.int64)
+                    scatteraddr['edges'] = np.array(self.proc_edgeaddr[proc_key][:self.proc_nE[proc_key]['internal']], dtype=np.int64)
+                    scatteraddr['boundaries'] = {}
+                    for key in self.proc_fB[proc_key]['boundaries'].keys():
+                        edges = [self.proc_edgeaddr[proc_key][index] for index in self.proc_fB[proc_key]['boundaries'][key]]
+                        scatteraddr['boundaries'][key] = np.array(edges, dtype=np.int64)
+                    self.proc_scatteraddr[proc_key] = scatteraddr
+
+        def read_addressing(self): #True when the addressing is taken from the files of a previous run
+                file = addressing_path(self.p)
+                if os.path.exists(file+'.json') == False:
+                    return False
+                try:
+                    with open(file+'.json') as f:
+                        info = json.load(f)
+                    if info['source'] != addressing_source(self.p, self.np) or info['tolerance'] != self.tolerance:
+                        return False
+                    if self.rank == 0:
+                        print ('Reading addressing ...')
+                    arrays = {}
+                    with np.load(file+'.npz') as data:
+                        for name in data.files:
+                            arrays[tuple(name.split('/'))] = data[name]
+                    self.fB = info['fB']
+                    self.nE = info['nE']
+                    self.proc_fB = info['proc_fB']
+                    self.proc_nF = info['proc_nF']
+                    self.proc_nE = info['proc_nE']
+                    self.set_addressing(arrays)
+                except (OSError, ValueError, KeyError, zipfile.BadZipFile): #files cut or corrupted, the addressing is built again
+                    if self.rank == 0:
+                        print ('Addressing files not valid, building the addressing again ...')
+                    return False
+                return True
+
+        def write_addressing(self):
+                file = addressing_path(self.p)
+                addressing = self.get_addressing()
+                arrays = {}
+                for key in addressing.keys():
+                    arrays['/'.join(key)] = addressing[key]
+                info = {'source': addressing_source(self.p, self.np), 'tolerance': self.tolerance, 'fB': self.fB, 'nE': self.nE, 'proc_fB': self.proc_fB, 'proc_nF': self.proc_nF, 'proc_nE': self.proc_nE}
+                try:
+                    if os.path.exists(file+'.json') == True:
+                        os.remove(file+'.json')
+                    with open(file+'.npz', 'wb') as f:
+                        np.savez(f, **arrays)
+                    with open(file+'.json', 'w') as f:
+                        json.dump(info, f)
+                except OSError: #read-only cases build the addressing in every run
+                    pass
+
+        def get_addressing(self): #index arrays of the reconstruction in one dictionary, keyed by tuples
+                arrays = {}
+                for key in self.patch_edgeaddr.keys():
+                    arrays[('patch', key)] = self.patch_edgeaddr[key]
+                for proc_key in self.proc_scatteraddr.keys():
+                    arrays[('faces', proc_key)] = self.proc_scatteraddr[proc_key]['faces']
+                    arrays[('edges', proc_key)] = self.proc_scatteraddr[proc_key]['edges']
+                    for key in self.proc_scatteraddr[proc_key]['boundaries'].keys():
+                        arrays[('boundaries', proc_key, key)] = self.proc_scatteraddr[proc_key]['boundaries'][key]
+                for proc_key in self.proc_patchaddr.keys():
+                    for key in self.proc_patchaddr[proc_key].keys():
+                        arrays[('patchaddr', proc_key, key)] = self.proc_patchaddr[proc_key][key]
+                return arrays
+
+        def set_addressing(self, arrays): #inverse of get_addressing
+                for proc_key in self.proc_fB.keys():
+                    self.proc_scatteraddr[proc_key] = {}
+                    self.proc_scatteraddr[proc_key]['boundaries'] = {}
+                    self.proc_patchaddr[proc_key] = {}
+                for key in arrays.keys():
+                    if key[0] == 'patch':
+                        self.patch_edgeaddr[key[1]] = arrays[key]
+                    elif key[0] == 'faces' or key[0] == 'edges':
+                        self.proc_scatteraddr[key[1]][key[0]] = arrays[key]
+                    elif key[0] == 'boundaries':
+                        self.proc_scatteraddr[key[1]]['boundaries'][key[2]] = arrays[key]
+                    elif key[0] == 'patchaddr':
+                        self.proc_patchaddr[key[1]][key[2]] = arrays[key]
+
         def order_proc_faBoundary(self):
-                indexes_internal = []
+                indexes_internal = set()
                 for proc_key in self.proc_fB.keys():  
                     for patch_key in self.proc_fB[proc_key]['boundaries'].keys():
-                        for i in range(len(self.proc_fB[proc_key]['boundaries'][patch_key])):
-                            index = self.proc_fB[proc_key]['boundaries'][patch_key][i]            
+                        for index in self.proc_fB[proc_key]['boundaries'][patch_key]:
                             if self.proc_edgeaddr[proc_key][index] < self.nE['internal']:
-                                if not(self.proc_edgeaddr[proc_key][index] in indexes_internal):
-                                    indexes_internal.append(self.proc_edgeaddr[proc_key][index])                                    
-                indexes_internal.sort()
+                                indexes_internal.add(self.proc_edgeaddr[proc_key][index])
+                indexes_internal = sorted(indexes_internal)
                 
                 ec_dict = {}
-                ec_list1 = []
-                ec_list2 = []
-                for i in indexes_internal:
-                    ec_list1.append(i)
-                    ec_list2.append(self.ec['0'].iF.field[i])
-                ec_dict['internal'] = [ec_list1, ec_list2]
+                ec_dict['internal'] = [indexes_internal, self.ec['0'].iF.field[indexes_internal]]
                 ec_patch_dict = {}
                 for key in self.ec['0'].bF.d.keys():
-                    ec_patch_list1 = []
-                    ec_patch_list2 = []
-                    for i in range(len(self.ec['0'].bF.d[key]['value']['List'])):
-                        ec_patch_list1.append(self.fB['boundaries'][key][i])
-                        ec_patch_list2.append(self.ec['0'].bF.d[key]['value']['List'][i])
-                    ec_patch_dict[key] = [ec_patch_list1, ec_patch_list2]
+                    ec_patch_dict[key] = [self.fB['boundaries'][key], self.ec['0'].bF.d[key]['value']['List']]
                 ec_dict['boundary'] = ec_patch_dict
 
-                ec_proc_dict = {}
+                grids = {}
+                grids['internal'] = hash_points(ec_dict['internal'][1], self.tolerance)
+                for key in ec_dict['boundary'].keys():
+                    grids[key] = hash_points(ec_dict['boundary'][key][1], self.tolerance)
+                                            
                 for proc_key in self.proc_ec['0'].keys():
-                    patch_dict = {}
                     for patch_key in self.proc_ec['0'][proc_key].bF.d.keys():
-                        proc_patch_list1 = []
-                        proc_patch_list2 = []
-                        for i in range(len(self.proc_ec['0'][proc_key].bF.d[patch_key]['value']['List'])):
-                            index = self.proc_fB[proc_key]['boundaries'][patch_key][i]
-                            proc_patch_list1.append(index)
-                            proc_patch_list2.append(self.proc_ec['0'][proc_key].bF.d[patch_key]['value']['List'][i])
-                        patch_dict[patch_key] = [proc_patch_list1, proc_patch_list2]
-                    ec_proc_dict[proc_key] = patch_dict
-                                            
-                for key_proc in ec_proc_dict.keys():
-                    for key_patch in ec_proc_dict[key_proc].keys():
-                        if key_patch in ec_dict['boundary'].keys():
-                            for i in range(len(ec_proc_dict[key_proc][key_patch][0])):
-                                index = ec_dict['boundary'][key_patch][1].index(ec_proc_dict[key_proc][key_patch][1][i])
-                                self.proc_edgeaddr[key_proc][ec_proc_dict[key_proc][key_patch][0][i]] = ec_dict['boundary'][key_patch][0][index]
+                        if patch_key in ec_dict['boundary'].keys():
+                            [labels, points] = ec_dict['boundary'][patch_key]
+                            grid = grids[patch_key]
                         else:
-                            for i in range(len(ec_proc_dict[key_proc][key_patch][0])):
-                                index = ec_dict['internal'][1].index(ec_proc_dict[key_proc][key_patch][1][i])
-                                self.proc_edgeaddr[key_proc][ec_proc_dict[key_proc][key_patch][0][i]] = ec_dict['internal'][0][index]
+                            [labels, points] = ec_dict['internal']
+                            grid = grids['internal']
+                        targets = self.proc_ec['0'][proc_key].bF.d[patch_key]['value']['List']
+                        indexes = find_points(grid, points, targets, self.tolerance)
+                        for i in range(len(indexes)):
+                            self.proc_edgeaddr[proc_key][self.proc_fB[proc_key]['boundaries'][patch_key][i]] = labels[indexes[i]]
                         
-        def write_output(self,path,size, time = -1, withZero = False):                    
+        def write_output(self,path,size, time = -1, withZero = False, comm = None):                    
                 if self.rank == 0:
                     print('Writing output files ...')
-                self.create_dir(path, size, time, withZero)
-                self.write_fields(path, size, time) 
+                if self.archive != '':
+                    if self.rank == 0:
+                        self.write_archive(size, time, withZero)
+                    return
+                self.create_dir(path, size, time)
+                self.write_fields(path, size, time, withZero, comm) 
              
-        def create_dir(self, path, size, time, withZero):
+        def write_archive(self, size, time, withZero = False): #the archive is a single file, so it is written by rank 0 alone whatever the backend
+                import time as timex
+                if size > 1:
+                    print('   The archive is written by rank 0 alone, the other ranks are not used')
+                if time == -1:
+                    times = [t for t in self.t if withZero == True or t != 0]
+                else:
+                    times = [time]
+                names = []
+                for name in self.get_fieldDicts().keys():
+                    flag = getattr(self, name+'_flag')
+                    if (flag == 'on' or flag == 'yes' or flag == True):
+                        names.append(name)
+                archive = open_archive(self.archive, times)
+                arrays = self.get_addressing()
+                for key in arrays.keys():
+                    archive_array(archive, 'addressing/'+'/'.join(key), arrays[key])
+                for i in range(len(times)):
+                    print('   Archiving fields for time = '+ str(times[i])+ ' at time = ' + date(timex.gmtime()))
+                    for name in names:
+                        field = self.reconstruct_field(name, times[i])
+                        if i == 0:
+                            archive_array(archive, 'fields/'+name+'/dimensions', np.array(field.dim.List()))
+                            archive_array(archive, 'fields/'+name+'/patches', np.array([[key, field.bF.d[key]['type']] for key in field.bF.d.keys()], dtype='S'))
+                        archive_array(archive, 'fields/'+name+'/internal', np.asarray(field.iF.field, dtype=np.float64), i, len(times))
+                        for key in field.bF.d.keys():
+                            if field.bF.d[key]['type'] == 'fixedValue' or field.bF.d[key]['type'] == 'calculated':
+                                archive_array(archive, 'fields/'+name+'/boundary/'+key, np.asarray(field.bF.d[key]['value']['List'], dtype=np.float64), i, len(times))
+                archive.close()
+
+        def create_dir(self, path, size, time): #with several ranks the directory of a time is created by the rank that takes it
                 if size == 1:
                     if time == -1:
                         for t in self.t:
-                            os.mkdir(path+'/'+str(t))
+                            self.make_time_dir(path, t)
                     else:
-                        os.mkdir(path+'/'+str(time))
+                        self.make_time_dir(path, time)
+
+        def make_time_dir(self, path, time): #in incremental mode the directories written before are kept
+                if self.incremental == True:
+                    os.makedirs(path+'/'+str(time), exist_ok=True)
                 else:
-                    if len(self.t_size) == 0:
-                        self.create_t_size(size, withZero)
-                        
-                    if time == -1:
-                        for t in self.t_size[self.rank]:
-                            os.mkdir(path+'/'+str(t))
+                    os.mkdir(path+'/'+str(time))
 
-        def write_fields(self, path, size, time):
+        def field_changed(self, path, name, time): #False in incremental mode when the field was written from the same processor files
+                if self.incremental == False:
+                    return True
+                source = [source_stat(self.p+'/processor'+str(p)+'/'+str(time)+'/'+name) for p in range(self.np)]
+                self.sources[str(time)+'/'+name] = source
+                with field_lock:
+                    if (str(time) in self.manifests) == False:
+                        self.manifests[str(time)] = read_manifest(path, time)
+                if os.path.exists(path+'/'+str(time)+'/'+name) == False:
+                    return True
+                return self.manifests[str(time)].get(name) != source
+
+        def field_written(self, path, name, time): #the manifest of the time is written by write_allFields once all its fields are written
+                if self.incremental == False:
+                    return
+                with field_lock:
+                    self.manifests[str(time)][name] = self.sources.pop(str(time)+'/'+name)
+
+        def write_fields(self, path, size, time, withZero = False, comm = None):
                 import time as timex
                 if time == -1:
                     if size == 1:
                         for t in self.t:
                             print('   Reconstructing fields for time = '+ str(t)+ ' at time = ' + date(timex.gmtime()))
-                            self.write_areaFields(path,t)
-                            self.write_edgeFields(path,t)
+                            self.write_allFields(path,t)
                             self.clean_fields(False, t)
                     else:
-                        for t in self.t_size[self.rank]:
-                            print('   Reconstructing fields for time = '+ str(t)+ ' at time = ' + date(timex.gmtime())+ ' with rank = ' + str(self.rank))
-                            self.write_areaFields(path,t)
-                            self.write_edgeFields(path,t)
-                            self.clean_fields(False, t)
+                        times = [t for t in self.t if withZero == True or t != 0]
+                        if comm == None:
+                            write_processes(self, path, times, size)
+                        else:
+                            for t in queue_times(comm, times):
+                                self.write_queued_time(path, t)
                 else:
                     print('   Reconstructing fields for time = '+ str(time)+ ' at time = ' + date(timex.gmtime()))
-                    self.write_areaFields(path,time)
-                    self.write_edgeFields(path,time)
+                    self.write_allFields(path,time)
                     self.clean_fields(False, time)
+
+        def write_queued_time(self, path, t): #a time taken from the queue by a rank of the mpi or processes backends
+                import time as timex
+                start = timex.time()
+                self.make_time_dir(path, t)
+                print('   Reconstructing fields for time = '+ str(t)+ ' at time = ' + date(timex.gmtime())+ ' with rank = ' + str(self.rank))
+                self.write_allFields(path,t)
+                self.clean_fields(False, t)
+                self.t_rank.append(t)
+                self.t_busy += timex.time()-start
+
+
+        def write_allFields(self, path, t):
+                if self.fields > 1:
+                    self.write_concurrentFields(path, t)
+                else:
+                    self.write_areaFields(path,t)
+                    self.write_edgeFields(path,t)
+                if self.incremental == True and (str(t) in self.manifests) == True:
+                    write_manifest(path, t, self.manifests.pop(str(t)))
+
+        def write_concurrentFields(self, path, t):
+                writes = {'h': self.write_h, 'Cv': self.write_Cv, 'deltac0': self.write_deltac0, 'deltah0': self.write_deltah0, 'Us': self.write_Us,
+                          'tau': self.write_tau, 'pb': self.write_pb, 'Q': self.write_Q, 'phi2s': self.write_phi2s}
+                names = []
+                for name in writes.keys():
+                    flag = getattr(self, name+'_flag')
+                    if (flag == 'on' or flag == 'yes' or flag == True):
+                        names.append(name)
+                if self.workers > 1:
+                    get_pool(self.workers)  #created before the threads use it
+                budget = memoryBudget(self.field_memory*1e6)
+                with concurrent.futures.ThreadPoolExecutor(max_workers=self.fields) as threads:
+                    futures = [threads.submit(self.write_budgetField, path, t, name, writes[name], budget) for name in names]
+                    for future in futures:
+                        future.result()
+
+        def write_budgetField(self, path, t, name, write, budget):
+                size = self.field_bytes(name)
+                budget.acquire(size)
+                try:
+                    write(path, t)
+                finally:
+                    [create, field, field_proc] = self.get_fieldDicts()[name]
+                    field.pop(str(t), None)
+                    field_proc.pop(str(t), None)
+                    budget.release(size)
+
+        def field_bytes(self, name): #estimated peak memory of the reconstruction of a field: the parsed processor values, the global list and its text
+                if name == 'Q' or name == 'phi2s':
+                    number = self.nE['Total']
+                else:
+                    number = self.nF
+                if name == 'Us' or name == 'tau':
+                    components = 3
+                else:
+                    components = 1
+                return number*(48+64*components)
                 
         def write_areaFields(self, path, t):
                 self.write_h(path,t)
@@ -1135,55 +1929,68 @@ class runCase:
                 self.write_phi2s(path,t)
 
         def write_h(self, path, time):
-                if (self.h_flag == 'on' or self.h_flag == 'yes' or self.h_flag == True):
+                if (self.h_flag == 'on' or self.h_flag == 'yes' or self.h_flag == True) and self.field_changed(path, 'h', time) == True:
                     self.create_h(False, time)
                     self.write_scalarfield(path, 'h', self.h, time, 'areaScalarField')
+                    self.field_written(path, 'h', time)
 
         def write_Cv(self, path, time):
-                if (self.Cv_flag == 'on' or self.Cv_flag == 'yes' or self.Cv_flag == True):
+                if (self.Cv_flag == 'on' or self.Cv_flag == 'yes' or self.Cv_flag == True) and self.field_changed(path, 'Cv', time) == True:
                     self.create_Cv(False, time)
                     self.write_scalarfield(path, 'Cv', self.Cv, time, 'areaScalarField')
+                    self.field_written(path, 'Cv', time)
 
         def write_deltah0(self, path, time):
-                if (self.deltah0_flag == 'on' or self.deltah0_flag == 'yes' or self.deltah0_flag == True):
+                if (self.deltah0_flag == 'on' or self.deltah0_flag == 'yes' or self.deltah0_flag == True) and self.field_changed(path, 'deltah0', time) == True:
                     self.create_deltaz0(False, time)
                     self.write_scalarfield(path, 'deltah0', self.deltah0, time, 'areaScalarField') 
+                    self.field_written(path, 'deltah0', time)
 
         def write_deltac0(self, path, time):
-                if (self.deltac0_flag == 'on' or self.deltac0_flag == 'yes' or self.deltac0_flag == True):
+                if (self.deltac0_flag == 'on' or self.deltac0_flag == 'yes' or self.deltac0_flag == True) and self.field_changed(path, 'deltac0', time) == True:
                     self.create_deltaz0(False, time)
                     self.write_scalarfield(path, 'deltac0', self.deltac0, time, 'areaScalarField') 
+                    self.field_written(path, 'deltac0', time)
 
         def write_Us(self, path, time):
-                if (self.Us_flag == 'on' or self.Us_flag == 'yes' or self.Us_flag == True):
+                if (self.Us_flag == 'on' or self.Us_flag == 'yes' or self.Us_flag == True) and self.field_changed(path, 'Us', time) == True:
                     self.create_Us(False, time)
                     self.write_scalarfield(path, 'Us', self.Us, time, 'areaVectorField')
+                    self.field_written(path, 'Us', time)
 
         def write_tau(self, path, time):
-                if (self.tau_flag == 'on' or self.tau_flag == 'yes' or self.tau_flag == True):
+                if (self.tau_flag == 'on' or self.tau_flag == 'yes' or self.tau_flag == True) and self.field_changed(path, 'tau', time) == True:
                     self.create_tau(False, time)
                     self.write_scalarfield(path, 'tau', self.tau, time, 'areaVectorField')
+                    self.field_written(path, 'tau', time)
 
         def write_pb(self, path, time):
-                if (self.pb_flag == 'on' or self.pb_flag == 'yes' or self.pb_flag == True):
+                if (self.pb_flag == 'on' or self.pb_flag == 'yes' or self.pb_flag == True) and self.field_changed(path, 'pb', time) == True:
                     self.create_pb(False, time)
                     self.write_scalarfield(path, 'pb', self.pb, time, 'areaScalarField')
+                    self.field_written(path, 'pb', time)
                     
         def write_Q(self, path, time):
-                if (self.Q_flag == 'on' or self.Q_flag == 'yes' or self.Q_flag == True):
+                if (self.Q_flag == 'on' or self.Q_flag == 'yes' or self.Q_flag == True) and self.field_changed(path, 'Q', time) == True:
                     self.create_Q(False, time)
                     self.write_scalarfield(path, 'Q', self.Q, time, 'edgeScalarField')
+                    self.field_written(path, 'Q', time)
 
         def write_phi2s(self, path, time):
-                if (self.phi2s_flag == 'on' or self.phi2s_flag == 'yes' or self.phi2s_flag == True):
+                if (self.phi2s_flag == 'on' or self.phi2s_flag == 'yes' or self.phi2s_flag == True) and self.field_changed(path, 'phi2s', time) == True:
                     self.create_phi2s(False, time)
                     self.write_scalarfield(path, 'phi2s', self.phi2s, time, 'edgeScalarField')
+                    self.field_written(path, 'phi2s', time)
 
         def write_scalarfield(self, path, name, field, time, header_class):
+                if self.binary == True:
+                    format = 'binary'
+                else:
+                    format = 'ascii'
                 if time == -1:
                     for t in range(len(self.t)):
                         fi = open(path+'/'+str(self.t[t])+'/'+name, 'w')
-                        fi.write(header(name, header_class, time))
+                        fi.write(header(name, header_class, time, format))
                         self.write_dims(fi, field[str(self.t[t])].dim) 
                         self.write_field(fi, field[str(self.t[t])].iF.field, field[str(self.t[t])].ty)
                         self.write_bfield(fi, field[str(self.t[t])].bF.d, field[str(self.t[t])].ty)                        
@@ -1191,7 +1998,7 @@ class runCase:
                         fi.close()
                 else:
                     fi = open(path+'/'+str(time)+'/'+name, 'w')
-                    fi.write(header(name, header_class, time))
+                    fi.write(header(name, header_class, time, format))
                     self.write_dims(fi, field[str(time)].dim) 
                     self.write_field(fi, field[str(time)].iF.field, field[str(time)].ty)
                     self.write_bfield(fi, field[str(time)].bF.d, field[str(time)].ty)
@@ -1201,15 +2008,7 @@ class runCase:
         def write_field(self, fi, field, type):
                 fi.write("\n")
                 fi.write('internalField   nonuniform List<'+type+'>'+"\n")
-                fi.write(str(len(field))+"\n")
-                fi.write('('+"\n")
-                if type == 'scalar':
-                    for i in range(len(field)):
-                        fi.write(str(field[i])+"\n") 
-                elif type == 'vector':
-                    for i in range(len(field)):
-                        fi.write('('+str(field[i].x)+' '+str(field[i].y)+' '+str(field[i].z)+')'+"\n") 
-                fi.write(')'+"\n")
+                write_list(fi, field, type, self.binary)
                 fi.write(';'+"\n")
                 fi.write("\n") 
 
@@ -1235,35 +2034,31 @@ class runCase:
                     elif bfield[patch_key]['type']  == 'fixedValue':
                         fi.write('        type            '+'fixedValue'+';'+"\n")
                         fi.write('        value           nonuniform List<'+type+'> '+"\n")
-                        fi.write(str(len(bfield[patch_key]['value']['List']))+"\n")
-                        fi.write('('+"\n")
-                        if type == 'scalar':
-                            for i in range(len(bfield[patch_key]['value']['List'])):
-                                fi.write(str(bfield[patch_key]['value']['List'][i])+"\n")                             
-                        elif type == 'vector':
-                            for i in range(len(bfield[patch_key]['value']['List'])):
-                                v = bfield[patch_key]['value']['List'][i]
-                                fi.write('('+str(v.x)+' '+str(v.y)+' '+str(v.z)+')'+"\n") 
-                        fi.write(')'+"\n")
+                        write_list(fi, bfield[patch_key]['value']['List'], type, self.binary)
                         fi.write(';'+"\n")
                     elif bfield[patch_key]['type']  == 'calculated':
                         fi.write('        type            '+'calculated'+';'+"\n") 
                         fi.write('        value           nonuniform List<'+type+'> '+"\n")
-                        fi.write(str(len(bfield[patch_key]['value']['List']))+"\n")
-                        fi.write('('+"\n")
-                        if type == 'scalar':
-                            for i in range(len(bfield[patch_key]['value']['List'])):
-                                fi.write(str(bfield[patch_key]['value']['List'][i])+"\n")                             
-                        elif type == 'vector':
-                            for i in range(len(bfield[patch_key]['value']['List'])):
-                                v = bfield[patch_key]['value']['List'][i]
-                                fi.write('('+str(v.x)+' '+str(v.y)+' '+str(v.z)+')'+"\n") 
-                        fi.write(')'+"\n")
+                        write_list(fi, bfield[patch_key]['value']['List'], type, self.binary)
                         fi.write(';'+"\n")                          
                     fi.write('    '+'}'+"\n")                               
                 fi.write('}'+"\n")
                 fi.write("\n") 
 
+        def get_fieldDicts(self): #create function, reconstructed fields and processor fields of every field name
+                return {'h': [self.create_h, self.h, self.h_proc], 'Cv': [self.create_Cv, self.Cv, self.Cv_proc], 'pb': [self.create_pb, self.pb, self.pb_proc],
+                        'deltac0': [self.create_deltaz0, self.deltac0, self.deltac0_proc], 'deltah0': [self.create_deltaz0, self.deltah0, self.deltah0_proc],
+                        'Us': [self.create_Us, self.Us, self.Us_proc], 'tau': [self.create_tau, self.tau, self.tau_proc],
+                        'Q': [self.create_Q, self.Q, self.Q_proc], 'phi2s': [self.create_phi2s, self.phi2s, self.phi2s_proc]}
+
+        def reconstruct_field(self, name, time): #the reconstructed field name of a time without writing it, used by the decomposed option of read_debris_case
+                [create, field, field_proc] = self.get_fieldDicts()[name]
+                create(False, time)
+                field_proc.pop(str(time), None)
+                if (str(time) in field.keys()) == False:
+                    raise ValueError('field '+name+' not found in the processor directories at time '+str(time))
+                return field.pop(str(time))
+
         def clean_fields(self, report = True, time = -1):
                 if time == -1:
                     if report == True:
@@ -1331,6 +2126,21 @@ def date_format(x):
     else:
         return str(x)
 
+def default_backend(): #mpi ranks only under mpirun with mpi4py installed, a pool of processes otherwise
+    launched = False
+    for key in ['OMPI_COMM_WORLD_SIZE', 'PMI_SIZE', 'PMIX_RANK', 'MPI_LOCALNRANKS', 'MV2_COMM_WORLD_SIZE']:
+        if (key in os.environ) == True:
+            launched = True
+    if launched == True:
+        try:
+            import mpi4py
+            return 'mpi'
+        except ImportError:
+            print('mpi4py is not installed, using the processes backend')
+            return 'processes'
+    print('Not launched by mpirun, using the processes backend (-backend mpi to use the mpi ranks)')
+    return 'processes'
+
 def date(t):
     yr = date_format(t[0])
     mo = date_format(t[1])
@@ -1342,7 +2152,6 @@ def date(t):
     return dy+'/'+mo+'/'+yr+'  '+hr+':'+mi+':'+sc                 
                           
 def main(argv):
-    from mpi4py import MPI
     import time
     
     parser = argparse.ArgumentParser(description='Reconstructing the outputs of a debrisfaSavageHutterFoam simulation')
@@ -1358,6 +2167,18 @@ def main(argv):
     parser.add_argument('-pb_flag', help='Activate to reconstruct pb field ', action="store_true")
     parser.add_argument('-phi2s_flag', help='Activate to reconstruct phi2s field ', action="store_true")
     parser.add_argument('-withZero', help='Activate to reconstruct fields for time 0', action="store_true")
+    parser.add_argument('-workers', type=int, help='number of processes reading the files of the processors in every rank', default=1)
+    parser.add_argument('-time', type=str, help="times to reconstruct, values and ranges separated by commas like '0.5,10:20' or ':5'", default='')
+    parser.add_argument('-latestTime', help='Activate to reconstruct the last time', action="store_true")
+    parser.add_argument('-stride', type=int, help='reconstruct one of every stride times', default=1)
+    parser.add_argument('-tolerance', type=float, help='largest distance between the edge centres of a processor and the global ones of the same edge', default=1e-6)
+    parser.add_argument('-incremental', help='Activate to reconstruct only the fields whose processor files are new or changed since the last reconstruction', action="store_true")
+    parser.add_argument('-binary', help='Activate to write the fields in the binary format of OpenFOAM', action="store_true")
+    parser.add_argument('-backend', type=str, choices=['mpi', 'processes', 'serial'], help='parallel backend: mpi ranks (mpirun), a pool of processes or a single process (default: mpi under mpirun with mpi4py, processes otherwise)', default='')
+    parser.add_argument('-processes', type=int, help='number of processes of the processes backend', default=os.cpu_count())
+    parser.add_argument('-fields', type=int, help='number of fields of a time reconstructed at the same time by a pool of threads (use -workers to parse in processes)', default=1)
+    parser.add_argument('-field_memory', type=float, help='memory (MB) of the fields reconstructed at the same time with -fields (0 = no limit)', default=0)
+    parser.add_argument('-archive', type=str, help='file of the output folder (.npz, or .h5/.hdf5 with h5py) with the fields of all the times instead of the time directories', default='')
         
     args = parser.parse_args()
 
@@ -1373,10 +2194,32 @@ def main(argv):
     phi2s = args.phi2s_flag
 
     withZero = args.withZero
+    workers = args.workers
+    selected_time = args.time
+    latestTime = args.latestTime
+    stride = args.stride
+    tolerance = args.tolerance
+    incremental = args.incremental
+    binary = args.binary
+    backend = args.backend
+    if backend == '':
+        backend = default_backend()
+    fields = args.fields
+    field_memory = args.field_memory
+    archive = args.archive
             
-    comm = MPI.COMM_WORLD
-    rank = comm.Get_rank()
-    size = comm.Get_size()
+    if backend == 'mpi':
+        from mpi4py import MPI
+        comm = MPI.COMM_WORLD
+        rank = comm.Get_rank()
+        size = comm.Get_size()
+    else: #the processes backend writes the times in the size processes of a pool
+        comm = None
+        rank = 0
+        if backend == 'processes':
+            size = max(args.processes, 1)
+        else:
+            size = 1
 
     print('Rank = ' + str(rank)+'  started at = ' + str(date(time.gmtime())))
 
@@ -1384,20 +2227,26 @@ def main(argv):
         path = os.getcwd()
 
     if o != '':        
-        clean_dir(path, o, rank)
+        if incremental == False:
+            clean_dir(path, o, rank)
         make_dir(path, o, rank)
         output = path+'/'+o
     else:
         output = path
+    if archive != '':
+        archive = os.path.join(output, archive)
         
     if rank == 0:
-        r = runCase(path, h, Cv, deltaz0, Us, Q, pb, tau, phi2s, rank)
+        r = runCase(path, h, Cv, deltaz0, Us, Q, pb, tau, phi2s, rank, workers, selected_time, latestTime, stride, tolerance, incremental, binary, fields, field_memory, archive)
     else:
         r = None
         
-    r = comm.bcast(r, root=0)
-    r.rank = rank
-    r.write_output(output, size, -1, withZero)
+    if size > 1 and comm != None:
+        r = bcast_case(comm, r)
+        r.rank = rank
+    r.write_output(output, size, -1, withZero, comm)
+    if size > 1 and comm != None:
+        report_ranks(comm, len(r.t_rank), r.t_busy)
     
     print('Rank = ' + str(r.rank)+'  ended at = ' + str(date(time.gmtime())))
 